@@ -0,0 +1,173 @@
+"""
+Admission control for graph runs.
+
+Sync handlers used to run on Starlette's shared threadpool, so a burst
+queued without bound and every request in it got slow. Handlers wrapped
+with ``AdmissionController.admit`` run on a dedicated pool of ``workers``
+threads instead. Once every worker is busy, at most ``max_queue`` further
+requests may wait for one. Past that, requests are rejected at once with 429. A request that
+waits longer than ``queue_timeout`` seconds is dropped before it runs, with
+503. Both carry a Retry-After. Queue depth, in-flight runs, wait time and
+rejections are exported on /metrics. ``start`` hands back a running task
+for handlers, such as SSE streams, that respond before the run finishes.
+
+Configuration (environment):
+    TRIAGE_WORKERS        graph run threads (default min(32, CPU count + 4))
+    TRIAGE_MAX_QUEUE      requests that may wait for a worker (default 4 x workers)
+    TRIAGE_QUEUE_TIMEOUT  seconds a request may wait before it is dropped (default 2)
+"""
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from typing import Any, Callable, Dict, Optional
+
+from .metrics import ADMISSION_IN_FLIGHT, ADMISSION_QUEUE_DEPTH, ADMISSION_REJECTED, ADMISSION_WAIT
+
+
+class AdmissionRejected(Exception):
+    """The request was not run; ``status`` is 429 (queue full) or 503 (waited too long)."""
+
+    def __init__(self, status: int, detail: str, retry_after: int):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class _Ticket:
+    __slots__ = ("enqueued", "started", "dropped")
+
+    def __init__(self, enqueued: float):
+        self.enqueued = enqueued
+        self.started = False
+        self.dropped = False
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        max_queue: Optional[int] = None,
+        queue_timeout: float = 2.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.workers = workers or min(32, (os.cpu_count() or 1) + 4)
+        self.max_queue = self.workers * 4 if max_queue is None else max_queue
+        self.queue_timeout = queue_timeout
+        self.clock = clock
+        self.waiting = 0
+        self.in_flight = 0
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @classmethod
+    def from_env(cls) -> "AdmissionController":
+        max_queue = os.getenv("TRIAGE_MAX_QUEUE")
+        return cls(
+            workers=int(os.getenv("TRIAGE_WORKERS", "0")) or None,
+            max_queue=int(max_queue) if max_queue else None,
+            queue_timeout=float(os.getenv("TRIAGE_QUEUE_TIMEOUT", "2")),
+        )
+
+    @property
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self.queue_timeout))
+
+    def _pool(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="triage-worker")
+        return self._executor
+
+    def _publish(self) -> None:
+        ADMISSION_QUEUE_DEPTH.set(self.waiting)
+        ADMISSION_IN_FLIGHT.set(self.in_flight)
+
+    def _reject(self, status: int, reason: str, detail: str) -> AdmissionRejected:
+        ADMISSION_REJECTED.labels(reason).inc()
+        return AdmissionRejected(status, detail, self.retry_after)
+
+    async def start(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> "asyncio.Future[Any]":
+        """
+        Queue ``func`` for the pool and return once it has started, with a
+        future for its result. Raises AdmissionRejected if the queue is full
+        or no worker frees up in time.
+        """
+        with self._lock:
+            if self.waiting + self.in_flight >= self.workers + self.max_queue:
+                raise self._reject(429, "queue_full", f"Server busy: {self.waiting} requests already waiting")
+            self.waiting += 1
+            self._publish()
+        ticket = _Ticket(self.clock())
+
+        loop = asyncio.get_running_loop()
+        started = loop.create_future()
+        context = contextvars.copy_context()
+
+        def task() -> Any:
+            with self._lock:
+                if ticket.dropped:
+                    return None
+                ticket.started = True
+                self.waiting -= 1
+                self.in_flight += 1
+                self._publish()
+            ADMISSION_WAIT.observe(self.clock() - ticket.enqueued)
+            loop.call_soon_threadsafe(lambda: started.done() or started.set_result(None))
+            try:
+                return context.run(func, *args, **kwargs)
+            finally:
+                with self._lock:
+                    self.in_flight -= 1
+                    self._publish()
+
+        result = asyncio.wrap_future(self._pool().submit(task))
+        try:
+            await asyncio.wait_for(asyncio.shield(started), self.queue_timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                if not ticket.started:
+                    ticket.dropped = True
+                    self.waiting -= 1
+                    self._publish()
+            if ticket.dropped:
+                raise self._reject(
+                    503, "timeout", f"Server busy: no worker free within {self.queue_timeout:g}s"
+                ) from None
+        return result
+
+    async def run(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run ``func`` on the pool once a worker is free, or raise AdmissionRejected."""
+        return await (await self.start(func, *args, **kwargs))
+
+    def admit(self, func: Callable[..., Any]) -> Callable[..., Any]:
+        """Turn a sync handler into an async one that runs under admission control."""
+
+        @wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            return await self.run(func, *args, **kwargs)
+
+        return wrapper
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "queue_timeout": self.queue_timeout,
+            "waiting": self.waiting,
+            "in_flight": self.in_flight,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
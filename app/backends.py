@@ -0,0 +1,231 @@
+"""
+Order backends for the fetch_order tool.
+
+``LocalOrderBackend`` reads the loaded data snapshot, which was the only
+source before. ``HttpOrderBackend`` calls an order service shaped like our
+own ``GET /orders/get?order_id=`` route. It keeps one pooled async client on
+a private event loop thread, and every caller goes through that loop,
+whether it is a sync graph run on any thread or an async run on another
+loop. That way the connection pool, the in-flight table used to coalesce
+concurrent lookups of the same order, and the TTL cache are all shared.
+
+Configuration (environment):
+    ORDER_BACKEND                 local | http (default local)
+    ORDER_SERVICE_URL             base URL of the order service
+    ORDER_SERVICE_TIMEOUT         seconds per lookup (default 2)
+    ORDER_SERVICE_MAX_CONNECTIONS pool size (default 20)
+    ORDER_CACHE_TTL               seconds to cache found orders (default 30)
+    ORDER_NEGATIVE_TTL            seconds to cache not-found results (default 5)
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class OrderBackendError(RuntimeError):
+    """The order service could not answer (timeout, connection error, 5xx)."""
+
+
+class OrderBackend:
+    """Look up one order by id; None means the order does not exist."""
+
+    def get(self, order_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    async def aget(self, order_id: str) -> Optional[Dict[str, Any]]:
+        return self.get(order_id)
+
+    def close(self) -> None:
+        pass
+
+
+class LocalOrderBackend(OrderBackend):
+    def get(self, order_id: str) -> Optional[Dict[str, Any]]:
+        from .registry import REGISTRY
+
+        return REGISTRY.current.orders.get(order_id)
+
+
+class HttpOrderBackend(OrderBackend):
+    """
+    Async HTTP client for a remote order service.
+
+    Concurrent lookups of the same id share one request (singleflight).
+    Found orders are cached for ``ttl`` seconds and not-found results for
+    ``negative_ttl`` seconds. Failures are never cached. ``transport`` lets
+    tests point the client at an ASGI app.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        timeout: float = 2.0,
+        max_connections: int = 20,
+        ttl: float = 30.0,
+        negative_ttl: float = 5.0,
+        max_entries: int = 10_000,
+        transport: Any = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.transport = transport
+        self.clock = clock
+        self.requests = 0
+        self.coalesced = 0
+        self.cache_hits = 0
+
+        self._cache: Dict[str, Tuple[float, Optional[Dict[str, Any]]]] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._client = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            with self._start_lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    thread = threading.Thread(target=loop.run_forever, name="order-backend", daemon=True)
+                    thread.start()
+                    self._thread, self._loop = thread, loop
+        return self._loop
+
+    def get(self, order_id: str) -> Optional[Dict[str, Any]]:
+        future = asyncio.run_coroutine_threadsafe(self._lookup(order_id), self._ensure_loop())
+        return future.result()
+
+    async def aget(self, order_id: str) -> Optional[Dict[str, Any]]:
+        loop = self._ensure_loop()
+        if asyncio.get_running_loop() is loop:
+            return await self._lookup(order_id)
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(self._lookup(order_id), loop))
+
+    async def _lookup(self, order_id: str) -> Optional[Dict[str, Any]]:
+        # Runs on the backend loop only, so the dicts below need no locking
+        entry = self._cache.get(order_id)
+        if entry is not None:
+            if entry[0] > self.clock():
+                self.cache_hits += 1
+                return entry[1]
+            del self._cache[order_id]
+
+        # The request runs as its own task, so a caller that is cancelled
+        # (e.g. its client disconnected) does not fail the others waiting on it
+        task = self._inflight.get(order_id)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.get_running_loop().create_task(self._fetch(order_id))
+            self._inflight[order_id] = task
+            task.add_done_callback(lambda done: self._finished(order_id, done))
+        return await asyncio.shield(task)
+
+    async def _fetch(self, order_id: str) -> Optional[Dict[str, Any]]:
+        order = await self._request(order_id)
+        self._store(order_id, order)
+        return order
+
+    def _finished(self, order_id: str, task: asyncio.Task) -> None:
+        if self._inflight.get(order_id) is task:
+            del self._inflight[order_id]
+        if not task.cancelled():
+            # Mark the exception retrieved in case every caller went away
+            task.exception()
+
+    def _store(self, order_id: str, order: Optional[Dict[str, Any]]) -> None:
+        ttl = self.ttl if order is not None else self.negative_ttl
+        if ttl <= 0:
+            return
+        if len(self._cache) >= self.max_entries:
+            # Drop the oldest insertion; dicts keep insertion order
+            self._cache.pop(next(iter(self._cache)))
+        self._cache[order_id] = (self.clock() + ttl, order)
+
+    async def _request(self, order_id: str) -> Optional[Dict[str, Any]]:
+        import httpx
+
+        if self._client is None:
+            limits = httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections)
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url, timeout=self.timeout, limits=limits, transport=self.transport
+            )
+        self.requests += 1
+        try:
+            resp = await asyncio.wait_for(
+                self._client.get("/orders/get", params={"order_id": order_id}), self.timeout
+            )
+        except asyncio.TimeoutError as e:
+            raise OrderBackendError(f"order service timed out after {self.timeout}s") from e
+        except httpx.HTTPError as e:
+            raise OrderBackendError(f"order service request failed: {type(e).__name__}: {e}") from e
+
+        if resp.status_code == 404:
+            return None
+        if resp.status_code != 200:
+            raise OrderBackendError(f"order service returned {resp.status_code}")
+        return resp.json()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "requests": self.requests,
+            "coalesced": self.coalesced,
+            "cache_hits": self.cache_hits,
+            "cached": len(self._cache),
+        }
+
+    def close(self) -> None:
+        loop = self._loop
+        if loop is None:
+            return
+        if self._client is not None:
+            asyncio.run_coroutine_threadsafe(self._client.aclose(), loop).result()
+            self._client = None
+        loop.call_soon_threadsafe(loop.stop)
+        self._thread.join()
+        loop.close()
+        self._loop = self._thread = None
+
+
+def backend_from_env() -> OrderBackend:
+    kind = os.getenv("ORDER_BACKEND", "local")
+    if kind == "local":
+        return LocalOrderBackend()
+    if kind == "http":
+        return HttpOrderBackend(
+            os.environ["ORDER_SERVICE_URL"],
+            timeout=float(os.getenv("ORDER_SERVICE_TIMEOUT", "2")),
+            max_connections=int(os.getenv("ORDER_SERVICE_MAX_CONNECTIONS", "20")),
+            ttl=float(os.getenv("ORDER_CACHE_TTL", "30")),
+            negative_ttl=float(os.getenv("ORDER_NEGATIVE_TTL", "5")),
+        )
+    raise ValueError(f"Unknown ORDER_BACKEND: {kind!r}")
+
+
+ORDER_BACKEND: Optional[OrderBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_order_backend() -> OrderBackend:
+    global ORDER_BACKEND
+    if ORDER_BACKEND is None:
+        with _backend_lock:
+            if ORDER_BACKEND is None:
+                ORDER_BACKEND = backend_from_env()
+    return ORDER_BACKEND
+
+
+def configure_order_backend(backend: Optional[OrderBackend]) -> Optional[OrderBackend]:
+    """Install a backend (e.g. one pointed at a test app) and return the previous one."""
+    global ORDER_BACKEND
+    previous, ORDER_BACKEND = ORDER_BACKEND, backend
+    return previous
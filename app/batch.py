@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EXECUTOR = os.getenv("TRIAGE_BATCH_EXECUTOR", "thread")
+DEFAULT_MAX_WORKERS = int(os.getenv("TRIAGE_BATCH_WORKERS", "0")) or None
+DEFAULT_CHUNK_SIZE = int(os.getenv("TRIAGE_BATCH_CHUNK_SIZE", "32"))
+# "langgraph" runs the compiled graph, "direct" the plain-call DirectGraph
+DEFAULT_ENGINE = os.getenv("TRIAGE_ENGINE", "langgraph")
+
+_graphs: Dict[str, Any] = {}
+_graph_lock = threading.Lock()
+
+
+def _get_graph(engine: str = DEFAULT_ENGINE):
+    """Build each engine once per process (thread workers share it)."""
+    graph = _graphs.get(engine)
+    if graph is None:
+        with _graph_lock:
+            graph = _graphs.get(engine)
+            if graph is None:
+                from .graph import build_engine
+
+                graph = _graphs[engine] = build_engine(engine)
+    return graph
+
+
+def _run_chunk(
+    chunk: List[Tuple[int, Dict[str, Any]]],
+    engine: str = DEFAULT_ENGINE,
+    reload: bool = False,
+) -> List[Dict[str, Any]]:
+    if reload:
+        from .registry import REGISTRY
+
+        # Process workers never run the watcher, so each chunk checks the
+        # data files' stamp itself (a few stat calls when nothing changed)
+        try:
+            REGISTRY.reload()
+        except Exception:
+            logger.exception("Data reload failed in batch worker; keeping snapshot %s", REGISTRY.version)
+    graph = _get_graph(engine)
+    results = []
+    for index, state in chunk:
+        try:
+            results.append({"index": index, "ok": True, "result": graph.invoke(state)})
+        except Exception as e:
+            results.append({"index": index, "ok": False, "error": f"{type(e).__name__}: {e}"})
+    return results
+
+
+class BatchRunner:
+    """
+    Run many triage states through the graph on a worker pool.
+
+    Input is consumed lazily in chunks, and at most ``max_in_flight`` chunks
+    are submitted at any time, so memory stays flat for arbitrarily long
+    inputs. Results come back in input order, one dict per item with either
+    ``result`` or ``error`` set. ``engine`` picks the compiled LangGraph
+    ("langgraph") or app.graph.DirectGraph ("direct"). Process workers
+    pick up changed data files before each chunk.
+    """
+
+    def __init__(
+        self,
+        executor: str = DEFAULT_EXECUTOR,
+        max_workers: Optional[int] = DEFAULT_MAX_WORKERS,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_in_flight: Optional[int] = None,
+        engine: str = DEFAULT_ENGINE,
+    ):
+        if executor not in ("thread", "process"):
+            raise ValueError(f"Unknown executor: {executor!r} (expected 'thread' or 'process')")
+        if engine not in ("langgraph", "direct"):
+            raise ValueError(f"Unknown engine: {engine!r} (expected 'langgraph' or 'direct')")
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.engine = engine
+        self.max_in_flight = max_in_flight or self.max_workers * 2
+
+        self.executor = executor
+        pool_cls = ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor
+        self._pool: Executor = pool_cls(max_workers=self.max_workers)
+
+    def __enter__(self) -> "BatchRunner":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True)
+
+    def imap(self, states: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Yield per-item results in input order."""
+        items = enumerate(states)
+        reload = self.executor == "process"
+        pending: Deque[Tuple[List[Tuple[int, Dict[str, Any]]], Future]] = deque()
+
+        def submit_next() -> bool:
+            chunk = list(islice(items, self.chunk_size))
+            if not chunk:
+                return False
+            pending.append((chunk, self._pool.submit(_run_chunk, chunk, self.engine, reload)))
+            return True
+
+        while len(pending) < self.max_in_flight and submit_next():
+            pass
+
+        while pending:
+            chunk, future = pending.popleft()
+            try:
+                results = future.result()
+            except Exception as e:
+                # The worker itself failed (e.g. a crashed process), not a single item
+                error = f"{type(e).__name__}: {e}"
+                results = [{"index": index, "ok": False, "error": error} for index, _ in chunk]
+            submit_next()
+            yield from results
+
+    def run(self, states: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return list(self.imap(states))
+
+
+def triage_batch(states: Iterable[Dict[str, Any]], **kwargs: Any) -> List[Dict[str, Any]]:
+    """
+    Triage a batch of states on a temporary pool.
+
+    Keyword arguments are passed to BatchRunner (executor, max_workers,
+    chunk_size, max_in_flight, engine).
+    """
+    with BatchRunner(**kwargs) as runner:
+        return runner.run(states)
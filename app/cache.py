@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Fields that, when present on a request, mean it carries prior conversation
+# state that the key does not capture, so the graph must run
+STATEFUL_FIELDS = ("messages", "evidence", "order_ids", "issue_type", "recommendation", "needs_admin", "reply_draft")
+
+
+def normalize_text(text: Optional[str]) -> str:
+    return " ".join((text or "").casefold().split())
+
+
+def cache_key(state: Dict[str, Any], version: str) -> Optional[str]:
+    """
+    Build the cache key for a triage request, or None if it is not cacheable.
+
+    The key combines the normalized ticket text, order id, admin decision and
+    notes with the data version, so a data reload never serves stale results.
+    The order id goes in as given: lookups by id are case-sensitive, so
+    "ord1002" and "ORD1002" can triage differently.
+    """
+    if any(state.get(field) for field in STATEFUL_FIELDS):
+        return None
+    parts = (
+        normalize_text(state.get("ticket_text")),
+        state.get("order_id") or "",
+        (state.get("admin_decision") or "").strip().lower(),
+        (state.get("admin_notes") or "").strip(),
+        version,
+    )
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+class TriageCache:
+    """
+    Thread-safe LRU cache with a TTL and a total size bound in bytes.
+
+    Values are stored pickled, which gives an exact size and hands every
+    caller its own copy of the result.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @classmethod
+    def from_env(cls) -> Optional["TriageCache"]:
+        """Return a cache configured from TRIAGE_CACHE_* variables, or None if disabled."""
+        if os.getenv("TRIAGE_CACHE_ENABLED", "").lower() not in ("1", "true", "yes"):
+            return None
+        return cls(
+            max_entries=int(os.getenv("TRIAGE_CACHE_MAX_ENTRIES", "1024")),
+            max_bytes=int(os.getenv("TRIAGE_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+            ttl=float(os.getenv("TRIAGE_CACHE_TTL", "300")),
+        )
+
+    def _remove(self, key: str) -> None:
+        _, blob = self._entries.pop(key)
+        self._bytes -= len(blob)
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, blob = entry
+            if expires_at <= self._clock():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return pickle.loads(blob)
+
+    def put(self, key: str, value: Any) -> bool:
+        """Store a value; returns False if it alone is larger than max_bytes."""
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(blob) > self.max_bytes:
+            return False
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (self._clock() + self.ttl, blob)
+            self._bytes += len(blob)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+        return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
@@ -0,0 +1,280 @@
+"""
+Compact on-disk order catalog.
+
+``python -m app.catalog build`` converts orders.json into an indexed SQLite
+file. SqliteOrderCatalog serves it with the same lookup methods as
+OrderRepository, memory-mapping the file and decoding orders only when they
+are requested, so API workers start fast and share the OS page cache. The
+trigram index behind fuzzy_search is written into the file too.
+"""
+from __future__ import annotations
+
+import argparse
+import heapq
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from .orders import fuzzy_fields, normalize_email, tokenize
+from .trigram import (
+    DEFAULT_LIMIT,
+    DEFAULT_THRESHOLD,
+    TrigramIndex,
+    probe_grams,
+    query_grams,
+    rank,
+    similarity,
+    size_bounds,
+)
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+MOCK_DIR = os.path.join(ROOT, "mock_data")
+
+MMAP_SIZE = int(os.getenv("ORDER_CATALOG_MMAP_SIZE", str(1 << 30)))
+
+SCHEMA = """
+CREATE TABLE orders (
+    pos INTEGER PRIMARY KEY,
+    order_id TEXT,
+    email TEXT,
+    body TEXT NOT NULL
+);
+CREATE TABLE tokens (
+    token TEXT NOT NULL,
+    pos INTEGER NOT NULL
+);
+CREATE TABLE fuzzy_docs (
+    doc INTEGER PRIMARY KEY,
+    size INTEGER NOT NULL,
+    grams TEXT NOT NULL
+);
+CREATE TABLE fuzzy_grams (
+    gram TEXT PRIMARY KEY,
+    docs INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE fuzzy_postings (
+    gram TEXT NOT NULL,
+    doc INTEGER NOT NULL,
+    PRIMARY KEY (gram, doc)
+) WITHOUT ROWID;
+CREATE TABLE fuzzy_items (
+    doc INTEGER NOT NULL,
+    pos INTEGER NOT NULL,
+    PRIMARY KEY (doc, pos)
+) WITHOUT ROWID;
+"""
+
+# Trigrams are joined with a character normalized text never contains
+GRAM_SEP = "|"
+
+INDEXES = """
+CREATE INDEX orders_order_id ON orders (order_id);
+CREATE INDEX orders_email ON orders (email);
+CREATE INDEX tokens_token ON tokens (token);
+"""
+
+
+def build_catalog(orders: Iterable[Dict[str, Any]], path: str, batch_size: int = 10_000) -> int:
+    """
+    Write orders to a new SQLite catalog at ``path`` and return the count.
+
+    Orders are stored as compact JSON alongside the same indexes that
+    OrderRepository keeps in memory, including its trigram index.
+    """
+    tmp_path = f"{path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.executescript("PRAGMA journal_mode = OFF; PRAGMA synchronous = OFF;" + SCHEMA)
+        rows: List[tuple] = []
+        tokens: List[tuple] = []
+        fuzzy = TrigramIndex()
+        count = 0
+
+        def flush() -> None:
+            conn.executemany("INSERT INTO orders VALUES (?, ?, ?, ?)", rows)
+            conn.executemany("INSERT INTO tokens VALUES (?, ?)", tokens)
+            rows.clear()
+            tokens.clear()
+
+        for pos, order in enumerate(orders):
+            email = order.get("email")
+            rows.append(
+                (
+                    pos,
+                    order.get("order_id"),
+                    normalize_email(email) if email else None,
+                    json.dumps(order, separators=(",", ":")),
+                )
+            )
+            for value in (order.get("order_id"), order.get("customer_name")):
+                value_tokens = tokenize(value or "")
+                if value_tokens:
+                    tokens.append((value_tokens[0], pos))
+            for text in fuzzy_fields(order):
+                fuzzy.add(text, pos)
+            count += 1
+            if len(rows) >= batch_size:
+                flush()
+
+        flush()
+        write_fuzzy_index(conn, fuzzy)
+        conn.executescript(INDEXES)
+        conn.commit()
+    finally:
+        conn.close()
+
+    os.replace(tmp_path, path)
+    return count
+
+
+def write_fuzzy_index(conn: sqlite3.Connection, index: TrigramIndex) -> None:
+    doc_freq: Dict[str, int] = {}
+    for doc, (grams, items) in enumerate(index.docs()):
+        conn.execute("INSERT INTO fuzzy_docs VALUES (?, ?, ?)", (doc, len(grams), GRAM_SEP.join(grams)))
+        conn.executemany("INSERT INTO fuzzy_postings VALUES (?, ?)", ((gram, doc) for gram in grams))
+        conn.executemany("INSERT INTO fuzzy_items VALUES (?, ?)", ((doc, pos) for pos in items))
+        for gram in grams:
+            doc_freq[gram] = doc_freq.get(gram, 0) + 1
+    conn.executemany("INSERT INTO fuzzy_grams VALUES (?, ?)", doc_freq.items())
+
+
+class SqliteOrderCatalog:
+    """
+    Read-only order lookups against a catalog written by build_catalog.
+
+    Exposes the same get / find_by_email / search / fuzzy_search interface
+    as OrderRepository. Each thread gets its own read-only connection.
+    fuzzy_search reads the trigram index build_catalog stored in the file,
+    so it runs the same algorithm as TrigramIndex without loading anything.
+    """
+
+    def __init__(self, path: str):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Order catalog not found: {path}")
+        self.path = path
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+            conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+            self._local.conn = conn
+        return conn
+
+    def __len__(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM orders").fetchone()[0]
+
+    def get(self, order_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute(
+            "SELECT body FROM orders WHERE order_id = ? ORDER BY pos LIMIT 1", (order_id,)
+        ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def find_by_email(self, email: str) -> List[Dict[str, Any]]:
+        rows = self._conn().execute(
+            "SELECT body FROM orders WHERE email = ? ORDER BY pos", (normalize_email(email),)
+        )
+        return [json.loads(body) for (body,) in rows]
+
+    def search(self, customer_email: Optional[str] = None, q: Optional[str] = None) -> List[Dict[str, Any]]:
+        conn = self._conn()
+        matches: Dict[int, Dict[str, Any]] = {}
+
+        if customer_email:
+            rows = conn.execute("SELECT pos, body FROM orders WHERE email = ?", (normalize_email(customer_email),))
+            for pos, body in rows:
+                matches[pos] = json.loads(body)
+
+        if q:
+            text = q.lower()
+            query_tokens = list(set(tokenize(text)))
+            if query_tokens:
+                placeholders = ",".join("?" * len(query_tokens))
+                rows = conn.execute(
+                    f"SELECT DISTINCT o.pos, o.body FROM tokens t JOIN orders o ON o.pos = t.pos "
+                    f"WHERE t.token IN ({placeholders})",
+                    query_tokens,
+                )
+                for pos, body in rows:
+                    if pos in matches:
+                        continue
+                    order = json.loads(body)
+                    if order["order_id"].lower() in text or order["customer_name"].lower() in text:
+                        matches[pos] = order
+
+        return [matches[pos] for pos in sorted(matches)]
+
+    def _fuzzy_matches(self, grams: FrozenSet[str], threshold: float) -> List[Tuple[float, int]]:
+        conn = self._conn()
+        try:
+            rows = conn.execute(
+                "SELECT gram, docs FROM fuzzy_grams WHERE gram IN (SELECT value FROM json_each(?))",
+                (json.dumps(list(grams)),),
+            )
+            doc_freq = dict(rows)
+        except sqlite3.OperationalError as e:
+            raise RuntimeError(f"{self.path} has no fuzzy index; rebuild it with python -m app.catalog build") from e
+        probe = [g for g in probe_grams(grams, threshold, lambda g: doc_freq.get(g, 0)) if g in doc_freq]
+        if not probe:
+            return []
+
+        low, high = size_bounds(len(grams), threshold)
+        rows = conn.execute(
+            "SELECT d.doc, d.grams FROM fuzzy_postings p JOIN fuzzy_docs d ON d.doc = p.doc "
+            "WHERE p.gram IN (SELECT value FROM json_each(?)) AND d.size BETWEEN ? AND ?",
+            (json.dumps(probe), low, high),
+        )
+        matches = []
+        for doc, joined in dict(rows).items():
+            score = similarity(grams, frozenset(joined.split(GRAM_SEP)), threshold)
+            if score:
+                matches.append((score, doc))
+        return matches
+
+    def _fuzzy_items(self, docs: List[int], n: int) -> Iterable[int]:
+        # One primary key range per string; a popular product name can carry
+        # a large share of the catalog, and only its first n are needed
+        conn = self._conn()
+        query = "SELECT pos FROM fuzzy_items WHERE doc = ? ORDER BY pos LIMIT ?"
+        return heapq.merge(*([pos for (pos,) in conn.execute(query, (doc, n))] for doc in docs))
+
+    def fuzzy_search(
+        self,
+        q: str,
+        threshold: float = DEFAULT_THRESHOLD,
+        limit: int = DEFAULT_LIMIT,
+    ) -> List[Tuple[Dict[str, Any], float]]:
+        grams = query_grams(q, threshold)
+        if not grams or limit <= 0:
+            return []
+        hits = rank(self._fuzzy_matches(grams, threshold), self._fuzzy_items, limit)
+        conn = self._conn()
+        results = []
+        for pos, score in hits:
+            (body,) = conn.execute("SELECT body FROM orders WHERE pos = ?", (pos,)).fetchone()
+            results.append((json.loads(body), score))
+        return results
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.catalog", description=__doc__.strip().splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Convert orders.json into a SQLite catalog")
+    build.add_argument("--orders", default=os.path.join(MOCK_DIR, "orders.json"))
+    build.add_argument("--out", default=os.path.join(MOCK_DIR, "orders.db"))
+    args = parser.parse_args(argv)
+
+    with open(args.orders, "r", encoding="utf-8") as f:
+        orders = json.load(f)
+    count = build_catalog(orders, args.out)
+    print(f"Wrote {count} orders to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
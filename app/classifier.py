@@ -0,0 +1,267 @@
+"""
+Hashed n-gram linear issue classifier.
+
+Tickets are turned into sparse feature vectors by hashing word unigrams,
+word bigrams and character 4-grams into ``dim`` buckets (crc32, so hashes
+are stable across processes), L2-normalized. A multinomial logistic
+regression over those features is trained with full-batch gradient descent,
+and a softmax temperature is then fitted on out-of-fold scores so that
+``predict_proba`` returns calibrated probabilities rather than raw scores.
+With fewer than CALIBRATION_FOLDS examples of some class there is nothing to
+hold out, and the temperature stays 1.
+
+A batch is scored in one sparse-dense product: the weight rows of every
+feature in the batch are gathered and summed per ticket with
+``np.add.reduceat``. That is X @ W without materializing X.
+
+The keyword table stays authoritative: ``classify_batch`` uses a keyword
+match when there is one and the model otherwise. A model guess below
+MIN_CONFIDENCE is reported as "unknown".
+"""
+from __future__ import annotations
+
+import os
+import re
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+WORD_REGEX = re.compile(r"[a-z0-9']+")
+DEFAULT_DIM = 1 << 16
+TEMPERATURES = np.geomspace(0.05, 20.0, 60)
+CALIBRATION_FOLDS = 3
+# Model predictions below this probability are not trusted (TRIAGE_CLASSIFIER_MIN_CONFIDENCE)
+MIN_CONFIDENCE = float(os.getenv("TRIAGE_CLASSIFIER_MIN_CONFIDENCE", "0.4"))
+
+
+def features(text: str) -> List[str]:
+    words = WORD_REGEX.findall(text.lower())
+    feats = [f"w:{w}" for w in words]
+    feats.extend(f"b:{a} {b}" for a, b in zip(words, words[1:]))
+    for w in words:
+        padded = f"<{w}>"
+        feats.extend(f"c:{padded[i:i + 4]}" for i in range(max(1, len(padded) - 3)))
+    return feats
+
+
+def featurize(texts: Sequence[str], dim: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Hash a batch into CSR-style arrays: feature indices, their values, and the
+    start offset of each row (len(texts) + 1 entries).
+    """
+    indices: List[int] = []
+    offsets = [0]
+    for text in texts:
+        row = {zlib.crc32(f.encode("utf-8")) % dim for f in features(text or "")}
+        indices.extend(row)
+        offsets.append(len(indices))
+    idx = np.asarray(indices, dtype=np.int64)
+    off = np.asarray(offsets, dtype=np.int64)
+    counts = np.diff(off)
+    values = np.repeat(1.0 / np.sqrt(np.maximum(counts, 1)), counts).astype(np.float32)
+    return idx, values, off
+
+
+def sparse_dot(idx: np.ndarray, values: np.ndarray, offsets: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """X @ weights for a CSR batch; empty rows score zero."""
+    n = len(offsets) - 1
+    out = np.zeros((n, weights.shape[1]), dtype=np.float32)
+    if len(idx) == 0:
+        return out
+    gathered = weights[idx] * values[:, None]
+    nonempty = offsets[:-1] < offsets[1:]
+    out[nonempty] = np.add.reduceat(gathered, offsets[:-1][nonempty], axis=0)
+    return out
+
+
+def softmax(scores: np.ndarray) -> np.ndarray:
+    z = scores - scores.max(axis=1, keepdims=True)
+    e = np.exp(z)
+    return e / e.sum(axis=1, keepdims=True)
+
+
+def _take(idx: np.ndarray, values: np.ndarray, offsets: np.ndarray, rows: np.ndarray):
+    """Select rows of a CSR batch."""
+    counts = np.diff(offsets)[rows]
+    starts = offsets[:-1][rows]
+    positions = np.repeat(starts - np.concatenate(([0], np.cumsum(counts)[:-1])), counts) + np.arange(counts.sum())
+    return idx[positions], values[positions], np.concatenate(([0], np.cumsum(counts)))
+
+
+def _fit(
+    idx: np.ndarray,
+    values: np.ndarray,
+    offsets: np.ndarray,
+    y: np.ndarray,
+    n_classes: int,
+    dim: int,
+    epochs: int,
+    learning_rate: float,
+    l2: float,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Full-batch gradient descent on softmax cross-entropy with L2."""
+    n = len(offsets) - 1
+    onehot = np.eye(n_classes, dtype=np.float32)[y]
+    rows = np.repeat(np.arange(n), np.diff(offsets))
+    # Only rows of features that occur can ever move, so update just those
+    active, local = np.unique(idx, return_inverse=True)
+    w = np.zeros((len(active), n_classes), dtype=np.float32)
+    bias = np.zeros(n_classes, dtype=np.float32)
+    for _ in range(epochs):
+        probs = softmax(sparse_dot(local, values, offsets, w) + bias)
+        residual = (probs - onehot) / n
+        contrib = residual[rows] * values[:, None]
+        grad = np.stack([np.bincount(local, contrib[:, c], len(active)) for c in range(n_classes)], axis=1)
+        w -= learning_rate * (grad + l2 * w)
+        bias -= learning_rate * residual.sum(axis=0)
+
+    weights = np.zeros((dim, n_classes), dtype=np.float32)
+    weights[active] = w
+    return weights, bias
+
+
+class IssueClassifier:
+    def __init__(
+        self,
+        labels: Sequence[str],
+        weights: np.ndarray,
+        bias: np.ndarray,
+        dim: int = DEFAULT_DIM,
+        temperature: float = 1.0,
+    ):
+        self.labels = list(labels)
+        self.weights = weights
+        self.bias = bias
+        self.dim = dim
+        self.temperature = temperature
+
+    @classmethod
+    def train(
+        cls,
+        texts: Sequence[str],
+        labels: Sequence[str],
+        dim: int = DEFAULT_DIM,
+        epochs: int = 200,
+        learning_rate: float = 20.0,
+        l2: float = 1e-4,
+    ) -> "IssueClassifier":
+        if not texts or len(texts) != len(labels):
+            raise ValueError("need the same non-zero number of texts and labels")
+
+        classes = sorted(set(labels))
+        y = np.asarray([classes.index(label) for label in labels])
+        idx, values, offsets = featurize(texts, dim)
+        weights, bias = _fit(idx, values, offsets, y, len(classes), dim, epochs, learning_rate, l2)
+
+        # Calibrate on out-of-fold scores; in-sample scores would favour
+        # overconfidence. Needs a few examples of every class to mean anything.
+        temperature = 1.0
+        counts = np.bincount(y)
+        if counts.min() >= CALIBRATION_FOLDS:
+            fold_of = np.empty(len(y), dtype=np.int64)
+            for c in range(len(classes)):
+                members = np.flatnonzero(y == c)
+                fold_of[members] = np.arange(len(members)) % CALIBRATION_FOLDS
+            scores = np.zeros((len(y), len(classes)), dtype=np.float32)
+            for k in range(CALIBRATION_FOLDS):
+                held = np.flatnonzero(fold_of == k)
+                kept = np.flatnonzero(fold_of != k)
+                w, b = _fit(*_take(idx, values, offsets, kept), y[kept], len(classes), dim, epochs, learning_rate, l2)
+                scores[held] = sparse_dot(*_take(idx, values, offsets, held), w) + b
+            temperature = cls._fit_temperature(scores, y)
+        return cls(classes, weights, bias, dim, temperature)
+
+    @staticmethod
+    def _fit_temperature(scores: np.ndarray, y: np.ndarray) -> float:
+        """Pick the softmax temperature with the lowest negative log-likelihood."""
+        best, best_nll = 1.0, float("inf")
+        rows = np.arange(len(y))
+        for t in TEMPERATURES:
+            nll = -np.log(softmax(scores / t)[rows, y] + 1e-12).mean()
+            if nll < best_nll:
+                best, best_nll = float(t), nll
+        return best
+
+    def predict_proba(self, texts: Sequence[str]) -> np.ndarray:
+        idx, values, offsets = featurize(texts, self.dim)
+        return softmax((sparse_dot(idx, values, offsets, self.weights) + self.bias) / self.temperature)
+
+    def predict(self, texts: Sequence[str]) -> List[Tuple[str, float]]:
+        probs = self.predict_proba(texts)
+        best = probs.argmax(axis=1)
+        return [(self.labels[i], float(probs[row, i])) for row, i in enumerate(best)]
+
+
+def training_examples(
+    issues: Iterable[Dict[str, Any]],
+    conversations: Iterable[Dict[str, Any]] = (),
+) -> Tuple[List[str], List[str]]:
+    """
+    Keyword rows, each issue type's own name ("damaged item"), and the first
+    customer turn of labeled conversations.
+    """
+    texts: List[str] = []
+    labels: List[str] = []
+    for row in issues:
+        if isinstance(row, dict) and row.get("keyword") and row.get("issue_type"):
+            texts.append(str(row["keyword"]))
+            labels.append(str(row["issue_type"]))
+    for issue_type in sorted(set(labels)):
+        texts.append(issue_type.replace("_", " "))
+        labels.append(issue_type)
+    for conv in conversations:
+        issue_type = (conv.get("expected_outcome") or {}).get("issue_type")
+        turns = conv.get("turns") or []
+        if issue_type and turns and turns[0].get("message"):
+            texts.append(turns[0]["message"])
+            labels.append(issue_type)
+    return texts, labels
+
+
+def load_conversations(directory: Optional[str]) -> List[Dict[str, Any]]:
+    """Labeled conversations from every *.json file in ``directory``, if it exists."""
+    import json
+
+    if not directory or not os.path.isdir(directory):
+        return []
+    conversations: List[Dict[str, Any]] = []
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(".json"):
+            with open(os.path.join(directory, name), "r", encoding="utf-8") as f:
+                data = json.load(f)
+            conversations.extend(c for c in data if isinstance(c, dict))
+    return conversations
+
+
+def classify_batch(
+    texts: Sequence[str],
+    matcher: Any,
+    classifier: Optional[IssueClassifier],
+    min_confidence: float = MIN_CONFIDENCE,
+) -> List[Dict[str, Any]]:
+    """
+    Classify tickets, keyword table first. Tickets without a keyword match
+    are scored together in one batch; a prediction below ``min_confidence``
+    comes back as "unknown" with its confidence.
+    """
+    results: List[Optional[Dict[str, Any]]] = []
+    pending: List[int] = []
+    for i, text in enumerate(texts):
+        issue_type = matcher.classify((text or "").lower())
+        if issue_type:
+            results.append({"issue_type": issue_type, "confidence": 1.0, "source": "keyword"})
+        else:
+            results.append(None)
+            pending.append(i)
+
+    if pending:
+        if classifier is None:
+            predictions = [("unknown", 0.0)] * len(pending)
+        else:
+            predictions = classifier.predict([texts[i] for i in pending])
+        for i, (issue_type, prob) in zip(pending, predictions):
+            if prob < min_confidence:
+                issue_type = "unknown"
+            results[i] = {"issue_type": issue_type, "confidence": round(prob, 4), "source": "model"}
+    return results  # type: ignore[return-value]
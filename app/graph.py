@@ -1,160 +1,186 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import os
 import re
-from typing import Any, Optional
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, get_type_hints
 
-from langfuse.decorators import observe
+from langgraph.checkpoint.memory import MemorySaver
 from langgraph.graph import StateGraph, START, END
 from langgraph.prebuilt import ToolNode
-from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
-
+from langgraph.prebuilt.tool_node import TOOL_CALL_ERROR_TEMPLATE
+from langgraph.utils.runnable import RunnableCallable
+from langchain_core.messages import AnyMessage, HumanMessage, AIMessage, ToolMessage
+
+from .backends import LocalOrderBackend, get_order_backend
+from .classifier import MIN_CONFIDENCE
+from .metrics import NodeTimer, RunTimer
+from .registry import REGISTRY
 from .state import TriageState
 from .templates import render_reply
-from .tools import fetch_order
+from .tools import _afetch_order, _fetch_order, fetch_order
+from .tracing import observe
 
-ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-MOCK_DIR = os.path.join(ROOT, "mock_data")
 ORDER_ID_REGEX = re.compile(r"\b(ORD\d{4})\b", re.IGNORECASE)
+# Seconds an in-memory checkpoint thread is kept after its last update (0 keeps it)
+CHECKPOINT_TTL = float(os.getenv("TRIAGE_CHECKPOINT_TTL", "86400"))
 
 fetch_order_node = ToolNode([fetch_order])
 
 
-def load_json(filename: str) -> Any:
-    path = os.path.join(MOCK_DIR, filename)
-    if not os.path.exists(path):
-        raise FileNotFoundError(f"Data file not found: {path}")
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except json.JSONDecodeError as e:
-        raise ValueError(f"Invalid JSON in {filename}: {e}") from e
-    except Exception as e:
-        raise RuntimeError(f"Error reading {filename}: {e}") from e
+def new_message(role: str, text: str) -> AnyMessage:
+    if role == "customer":
+        return HumanMessage(content=text)
+    return AIMessage(content=text)
 
 
-issue_keywords = load_json("issues.json")
-
-
-def append_issue_keywords(state: TriageState, role: str, text: str) -> None:
-    msgs = state.get("messages") or []
-    if role == "customer":
-        msgs.append(HumanMessage(content=text))
-    else:
-        msgs.append(AIMessage(content=text))
-    state["messages"] = msgs
+# Nodes return partial updates. `messages` uses an append reducer (see
+# app.state), so a node only emits the messages it adds. A node with
+# nothing to change echoes one key, since LangGraph rejects empty updates.
 
 
 @observe()
 def ingest(state: TriageState) -> TriageState:
     ticket = (state.get("ticket_text") or "").strip()
     if not ticket:
-        append_issue_keywords(
-            state,
-            "assistant",
-            "I did not receive a ticket. Please paste the customer message."
-        )
-        return state
-
-    state["ticket_text"] = ticket
-    state["evidence"] = state.get("evidence") or {}
-
-    msgs = state.get("messages") or []
-
-    # Always add customer message if this is the first turn
-    if not msgs:
-        append_issue_keywords(state, "customer", ticket)
-    else:
-        customer_message_exists = any(
-            isinstance(msg, HumanMessage) and msg.content == ticket
-            for msg in msgs
-        )
-        if not customer_message_exists:
-            append_issue_keywords(state, "customer", ticket)
+        return {
+            "messages": [
+                new_message("assistant", "I did not receive a ticket. Please paste the customer message.")
+            ]
+        }
+
+    update: TriageState = {
+        "ticket_text": ticket,
+        "evidence": state.get("evidence") or {},
+    }
+
+    customer_message_exists = any(
+        isinstance(msg, HumanMessage) and msg.content == ticket
+        for msg in state.get("messages") or []
+    )
+    if not customer_message_exists:
+        update["messages"] = [new_message("customer", ticket)]
 
-    if not state.get("order_id"):
-        m = ORDER_ID_REGEX.search(ticket)
-        if m:
-            state["order_id"] = m.group(1).upper()
+    # Supplied ids and the ones in the text are merged, primary first
+    primary = state.get("order_id")
+    found = [m.upper() for m in ORDER_ID_REGEX.findall(ticket)]
+    order_ids = list(dict.fromkeys([*([primary] if primary else []), *(state.get("order_ids") or []), *found]))
+    if order_ids:
+        update["order_ids"] = order_ids
+        if not primary:
+            update["order_id"] = order_ids[0]
 
-    return state
+    return update
 
 
 
 @observe()
 def classify_issue(state: TriageState) -> TriageState:
     if state.get("issue_type"):
-        return state
+        return {"issue_type": state["issue_type"]}
 
+    snapshot = REGISTRY.current
     text = (state.get("ticket_text") or "").lower()
-    issue_type: Optional[str] = None
+    issue_type: Optional[str] = snapshot.issue_matcher.classify(text)
 
-    for row in issue_keywords:
-        kw = (row.get("keyword") or "").lower()
-        if kw and kw in text:
-            issue_type = row.get("issue_type")
-            break
+    classifier = snapshot.issue_classifier if not issue_type else None
+    if classifier is not None:
+        predicted, prob = classifier.predict([text])[0]
+        if prob >= MIN_CONFIDENCE:
+            issue_type = predicted
+    issue_type = issue_type or "defective_product"
+
+    return {
+        "issue_type": issue_type,
+        "messages": [new_message("assistant", f"The issue is classified as {issue_type}.")],
+    }
 
-    if not issue_type:
-        issue_type = "refund_request" if "refund" in text else "defective_product"
 
-    state["issue_type"] = issue_type
-    append_issue_keywords(state, "assistant", f"The issue is classified as {issue_type}.")
-    return state
+def fetch_call_id(index: int) -> str:
+    return f"call_fetch_order_{index + 1}"
 
 
 @observe()
 def request_fetch_order(state: TriageState) -> TriageState:
-    state.setdefault("evidence", {})
+    evidence = state.get("evidence") or {}
     order_id = state.get("order_id")
 
     if not order_id:
-        state["evidence"]["order"] = {"found": False, "reason": "No order ID provided"}
-        append_issue_keywords(state, "assistant", "Order id is missing. Please provide the order ID.")
-        return state
+        return {
+            "evidence": {**evidence, "order": {"found": False, "reason": "No order ID provided"}},
+            "messages": [new_message("assistant", "Order id is missing. Please provide the order ID.")],
+        }
+
+    # One call per distinct order; ToolNode runs them in parallel
+    order_ids = list(dict.fromkeys([order_id, *(state.get("order_ids") or [])]))
+    return {
+        "messages": [
+            AIMessage(
+                content="Fetching order details.",
+                tool_calls=[
+                    {
+                        "name": "fetch_order",
+                        "args": {"order_id": oid},
+                        "id": fetch_call_id(i),
+                        "type": "tool_call",
+                    }
+                    for i, oid in enumerate(order_ids)
+                ],
+            )
+        ]
+    }
+
+
+def latest_fetch_results(messages: List[AnyMessage]) -> Dict[str, Any]:
+    """
+    Map order id -> fetch_order payload for the most recent fetch request,
+    i.e. the fetch_order ToolMessages after the last AIMessage with tool calls.
+    """
+    results: List[ToolMessage] = []
+    requested: Dict[str, str] = {}
+    for msg in reversed(messages):
+        if isinstance(msg, ToolMessage) and msg.name == "fetch_order":
+            results.append(msg)
+        elif isinstance(msg, AIMessage) and msg.tool_calls:
+            requested = {call["id"]: call["args"].get("order_id") for call in msg.tool_calls}
+            break
 
-    msgs = state.get("messages") or []
-    msgs.append(
-        AIMessage(
-            content="Fetching order details.",
-            tool_calls=[
-                {
-                    "name": "fetch_order",
-                    "args": {"order_id": order_id},
-                    "id": "call_fetch_order_1",
-                    "type": "tool_call",
-                }
-            ],
-        )
-    )
-    state["messages"] = msgs
-    return state
+    by_order: Dict[str, Any] = {}
+    for msg in reversed(results):
+        content = msg.content
+        if isinstance(content, str):
+            try:
+                content = json.loads(content)
+            except Exception:
+                pass
+        order_id = requested.get(msg.tool_call_id)
+        if order_id is None and isinstance(content, dict):
+            order_id = content.get("order_id") or (content.get("order") or {}).get("order_id")
+        by_order[order_id or msg.tool_call_id] = content
+    return by_order
 
 
 @observe()
 def store_order_evidence(state: TriageState) -> TriageState:
-    state.setdefault("evidence", {})
-    msgs = state.get("messages") or []
+    evidence = state.get("evidence") or {}
+    by_order = latest_fetch_results(state.get("messages") or [])
+    if not by_order:
+        return {"evidence": evidence}
 
-    for msg in reversed(msgs):
-        if isinstance(msg, ToolMessage) and msg.name == "fetch_order":
-            content = msg.content
-            if isinstance(content, str):
-                try:
-                    content = json.loads(content)
-                except Exception:
-                    pass
-            state["evidence"]["order"] = content
-            return state
-
-    return state
+    # evidence["order"] stays the primary order, which drives the reply
+    primary = by_order.get(state.get("order_id"), next(iter(by_order.values())))
+    return {"evidence": {**evidence, "order": primary, "orders": by_order}}
 
 
 @observe()
 def propose_recommendation(state: TriageState) -> TriageState:
     if state.get("recommendation"):
-        return state
+        return {"recommendation": state["recommendation"]}
 
     issue_type = state.get("issue_type") or "other"
     order_info = state.get("evidence", {}).get("order", {}) or {}
@@ -179,34 +205,38 @@ def propose_recommendation(state: TriageState) -> TriageState:
         else:
             rec = "Escalate to a human agent for further review."
 
-    state["recommendation"] = rec
-    state["needs_admin"] = True
-    append_issue_keywords(state, "assistant", f"Proposed action: {rec}")
-    append_issue_keywords(state, "assistant", f"Needs admin: {state['needs_admin']}")
-    return state
+    return {
+        "recommendation": rec,
+        "needs_admin": True,
+        "messages": [
+            new_message("assistant", f"Proposed action: {rec}"),
+            new_message("assistant", "Needs admin: True"),
+        ],
+    }
 
 
 @observe()
 def admin_review(state: TriageState) -> TriageState:
     decision = (state.get("admin_decision") or "").strip().lower()
     if decision not in ["approve", "reject"]:
-        state["needs_admin"] = True
-        return state
+        return {"needs_admin": True}
 
-    state["needs_admin"] = False
     notes = (state.get("admin_notes") or "").strip()
-    append_issue_keywords(state, "admin", f"Decision: {decision}. Notes: {notes}")
+    update: TriageState = {
+        "needs_admin": False,
+        "messages": [new_message("admin", f"Decision: {decision}. Notes: {notes}")],
+    }
 
     if decision == "reject":
-        state["recommendation"] = "Ask for clarification and escalate to a human agent."
+        update["recommendation"] = "Ask for clarification and escalate to a human agent."
 
-    return state
+    return update
 
 
 @observe()
 def draft_reply(state: TriageState) -> TriageState:
     if state.get("reply_draft"):
-        return state
+        return {"reply_draft": state["reply_draft"]}
 
     decision = (state.get("admin_decision") or "").strip().lower()
     issue_type = state.get("issue_type") or "other"
@@ -218,19 +248,81 @@ def draft_reply(state: TriageState) -> TriageState:
             "Can you confirm what went wrong and share any details like photos, error messages, or what troubleshooting you tried? "
             "If needed, I will escalate this to a specialist."
         )
-        state["reply_draft"] = reply
-        append_issue_keywords(state, "assistant", reply)
-        return state
-
-    if isinstance(order_payload, dict) and order_payload.get("found"):
+    elif isinstance(order_payload, dict) and order_payload.get("found"):
         order = order_payload["order"]
         reply = render_reply(issue_type, order)
     else:
         reply = "Hi there, can you share your order id so I can look this up and help you quickly?"
 
-    state["reply_draft"] = reply
-    append_issue_keywords(state, "assistant", reply)
-    return state
+    return {"reply_draft": reply, "messages": [new_message("assistant", reply)]}
+
+
+def as_node(func):
+    """
+    Pair a sync node with an async variant that runs it inline, and time both.
+
+    Nodes here are pure, in-memory functions, so under astream/ainvoke they
+    are cheaper to call directly on the event loop than to hop to a thread.
+    """
+    timer = NodeTimer(func.__name__)
+
+    def run(state: TriageState) -> TriageState:
+        with timer.time():
+            return func(state)
+
+    async def arun(state: TriageState) -> TriageState:
+        return run(state)
+
+    return RunnableCallable(run, arun, name=func.__name__, trace=False)
+
+
+def as_timed_runnable(name: str, runnable):
+    """Time a prebuilt runnable node such as the fetch_order ToolNode."""
+    timer = NodeTimer(name)
+
+    def run(state: TriageState, config):
+        with timer.time():
+            return runnable.invoke(state, config)
+
+    async def arun(state: TriageState, config):
+        with timer.time():
+            return await runnable.ainvoke(state, config)
+
+    return RunnableCallable(run, arun, name=name, trace=False)
+
+
+class MeteredGraph:
+    """
+    Compiled graph wrapper that records end-to-end latency, time spent
+    outside nodes, and final state size. Everything else is delegated.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getattr__(self, name):
+        return getattr(self.graph, name)
+
+    def invoke(self, input, config=None, **kwargs):
+        with RunTimer("invoke"):
+            result = self.graph.invoke(input, config, **kwargs)
+        RunTimer.record_state(result)
+        return result
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        with RunTimer("invoke"):
+            result = await self.graph.ainvoke(input, config, **kwargs)
+        RunTimer.record_state(result)
+        return result
+
+    def stream(self, input, config=None, **kwargs):
+        with RunTimer("stream"):
+            yield from self.graph.stream(input, config, **kwargs)
+
+    async def astream(self, input, config=None, **kwargs):
+        with RunTimer("stream"):
+            async for chunk in self.graph.astream(input, config, **kwargs):
+                yield chunk
 
 
 def route_after_admin(state: TriageState) -> str:
@@ -245,17 +337,131 @@ def route_after_classify(state: TriageState) -> str:
     return "request_fetch_order" if state.get("order_id") else "propose_recommendation"
 
 
-def build_graph():
+class ExpiringMemorySaver(MemorySaver):
+    """
+    MemorySaver that forgets threads with no new checkpoint for ``ttl``
+    seconds (0 keeps them forever). Expired threads are swept from put() at
+    most every ``min(ttl, 60)`` seconds, in one pass over the saved writes.
+
+    MemorySaver itself does no locking, and its reads add keys through
+    defaultdicts, so every read and write here holds the lock the sweep
+    holds. The async methods call these.
+    """
+
+    def __init__(self, ttl: float = CHECKPOINT_TTL, clock=time.monotonic):
+        super().__init__()
+        self.ttl = ttl
+        self._clock = clock
+        self._touched: "OrderedDict[str, float]" = OrderedDict()
+        self._next_sweep = clock() + min(ttl, 60.0)
+        self._lock = threading.RLock()
+
+    def get_tuple(self, config):
+        with self._lock:
+            return super().get_tuple(config)
+
+    def list(self, config, **kwargs):
+        with self._lock:
+            items = list(super().list(config, **kwargs))
+        yield from items
+
+    def put_writes(self, config, writes, task_id, *args, **kwargs):
+        with self._lock:
+            return super().put_writes(config, writes, task_id, *args, **kwargs)
+
+    def delete_thread(self, thread_id):
+        with self._lock:
+            self._touched.pop(thread_id, None)
+            return super().delete_thread(thread_id)
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        with self._lock:
+            if self.ttl > 0:
+                now = self._clock()
+                thread_id = config["configurable"]["thread_id"]
+                self._touched[thread_id] = now
+                self._touched.move_to_end(thread_id)
+                if now >= self._next_sweep:
+                    self._next_sweep = now + min(self.ttl, 60.0)
+                    self._sweep(now)
+            return super().put(config, checkpoint, metadata, new_versions)
+
+    def _sweep(self, now: float) -> None:
+        expired = set()
+        while self._touched:
+            thread_id, touched = next(iter(self._touched.items()))
+            if now - touched < self.ttl:
+                break
+            self._touched.popitem(last=False)
+            expired.add(thread_id)
+        # Lookups of unknown threads leave empty entries behind; drop those too
+        for thread_id in [t for t in list(self.storage) if t not in self._touched]:
+            del self.storage[thread_id]
+        if not expired:
+            return
+        for store in (self.writes, getattr(self, "blobs", {})):
+            for key in [k for k in list(store) if k[0] in expired]:
+                del store[key]
+
+
+def make_checkpointer(path: Optional[str] = None):
+    """
+    Return a SQLite checkpointer for ``path`` or an in-memory one if no path
+    is given. The SQLite saver ships in the optional
+    ``langgraph-checkpoint-sqlite`` package. In-memory checkpoints expire
+    after TRIAGE_CHECKPOINT_TTL seconds and live in one process only.
+    """
+    if not path:
+        return ExpiringMemorySaver()
+
+    try:
+        import sqlite3
+
+        from langgraph.checkpoint.sqlite import SqliteSaver
+    except ImportError as e:
+        raise RuntimeError(
+            "SQLite checkpoints require the langgraph-checkpoint-sqlite package"
+        ) from e
+
+    return SqliteSaver(sqlite3.connect(path, check_same_thread=False))
+
+
+def thread_config(thread_id: str) -> dict:
+    return {"configurable": {"thread_id": thread_id}}
+
+
+def resume_with_decision(graph, thread_id: str, admin_decision: str, admin_notes: Optional[str] = None) -> TriageState:
+    """
+    Apply an admin decision to a thread paused before admin_review and run
+    only admin_review -> draft_reply from the saved checkpoint.
+    """
+    config = thread_config(thread_id)
+    snapshot = graph.get_state(config)
+    if "admin_review" not in snapshot.next:
+        raise KeyError(f"Thread {thread_id} is not waiting for admin review")
+
+    graph.update_state(config, {"admin_decision": admin_decision, "admin_notes": admin_notes})
+    return graph.invoke(None, config)
+
+
+def build_graph(checkpointer=None):
+    """
+    Compile the triage graph.
+
+    With a checkpointer, runs pause before admin_review and are keyed by the
+    ``thread_id`` in the config, so an admin decision can be applied later
+    with resume_with_decision instead of re-running the whole pipeline.
+    """
     sg = StateGraph(TriageState)
 
-    sg.add_node("ingest", ingest)
-    sg.add_node("classify_issue", classify_issue)
-    sg.add_node("request_fetch_order", request_fetch_order)
-    sg.add_node("fetch_order", fetch_order_node)
-    sg.add_node("store_order_evidence", store_order_evidence)
-    sg.add_node("propose_recommendation", propose_recommendation)
-    sg.add_node("admin_review", admin_review)
-    sg.add_node("draft_reply", draft_reply)
+    sg.add_node("ingest", as_node(ingest))
+    sg.add_node("classify_issue", as_node(classify_issue))
+    sg.add_node("request_fetch_order", as_node(request_fetch_order))
+    sg.add_node("fetch_order", as_timed_runnable("fetch_order", fetch_order_node))
+    sg.add_node("store_order_evidence", as_node(store_order_evidence))
+    sg.add_node("propose_recommendation", as_node(propose_recommendation))
+    sg.add_node("admin_review", as_node(admin_review))
+    sg.add_node("draft_reply", as_node(draft_reply))
 
     sg.add_edge(START, "ingest")
 
@@ -283,5 +489,171 @@ def build_graph():
     sg.add_edge("admin_review", "draft_reply")
     sg.add_edge("draft_reply", END)
 
-    return sg.compile()
+    if checkpointer is None:
+        return MeteredGraph(sg.compile())
+    return MeteredGraph(sg.compile(checkpointer=checkpointer, interrupt_before=["admin_review"]))
+
+
+
+ENGINES = ("langgraph", "direct")
+
+_STATE_HINTS = get_type_hints(TriageState, include_extras=True)
+STATE_KEYS = tuple(_STATE_HINTS)
+# Channels with a reducer (Annotated[..., reducer]); the rest keep the last value
+STATE_REDUCERS = {
+    key: hint.__metadata__[-1]
+    for key, hint in _STATE_HINTS.items()
+    if getattr(hint, "__metadata__", None) and callable(hint.__metadata__[-1])
+}
+
+
+def apply_update(state: Dict[str, Any], update: Dict[str, Any]) -> None:
+    """Merge a node update into ``state`` the way LangGraph's channels do."""
+    for key, value in update.items():
+        if key not in STATE_REDUCERS:
+            state[key] = value
+        else:
+            state[key] = STATE_REDUCERS[key](state.get(key, []), value)
+
+
+def tool_message(call: Dict[str, Any], payload: Any) -> ToolMessage:
+    """The ToolMessage ToolNode would produce for a fetch_order result."""
+    if isinstance(payload, BaseException):
+        content = TOOL_CALL_ERROR_TEMPLATE.format(error=repr(payload))
+    else:
+        try:
+            content = json.dumps(payload)
+        except Exception:
+            content = str(payload)
+    return ToolMessage(content, name=call["name"], tool_call_id=call["id"])
+
+
+def _fetch_calls(state: TriageState) -> List[Dict[str, Any]]:
+    messages = state.get("messages") or []
+    if not messages or not isinstance(messages[-1], AIMessage):
+        raise ValueError("No AIMessage found in input")
+    return messages[-1].tool_calls
+
+
+def _call_fetch_order(call: Dict[str, Any]) -> Any:
+    try:
+        return _fetch_order(**call["args"])
+    except Exception as e:
+        return e
+
+
+async def _acall_fetch_order(call: Dict[str, Any]) -> Any:
+    try:
+        return await _afetch_order(**call["args"])
+    except Exception as e:
+        return e
+
+
+class DirectGraph:
+    """
+    Runs the triage nodes as plain function calls, in the order build_graph
+    wires them and with the same conditional routes and state reducers.
+
+    LangGraph's Pregel loop, channel copies and the ToolNode/StructuredTool
+    wrapping around fetch_order are skipped; fetch_order's function is
+    called directly and its result wrapped in the same ToolMessage, so the
+    final state is identical. Node metrics and tracing are recorded as
+    before. There is no checkpointing or streaming, so paused threads and
+    /triage/stream stay on the compiled graph.
+    """
+
+    def __init__(self):
+        self._timers = {
+            name: NodeTimer(name)
+            for name in (
+                "ingest", "classify_issue", "request_fetch_order", "fetch_order", "store_order_evidence",
+                "propose_recommendation", "admin_review", "draft_reply",
+            )
+        }
+
+    def _run(self, state: Dict[str, Any], node) -> None:
+        with self._timers[node.__name__].time():
+            update = node(state)
+        apply_update(state, update)
+
+    def _fetch_sync(self, state: Dict[str, Any]) -> None:
+        with self._timers["fetch_order"].time():
+            calls = _fetch_calls(state)
+            if len(calls) > 1 and not isinstance(get_order_backend(), LocalOrderBackend):
+                # Remote lookups overlap, as they do under ToolNode's thread pool
+                with ThreadPoolExecutor(max_workers=len(calls)) as pool:
+                    payloads = list(pool.map(_call_fetch_order, calls))
+            else:
+                payloads = [_call_fetch_order(call) for call in calls]
+            update = {"messages": [tool_message(c, p) for c, p in zip(calls, payloads)]}
+        apply_update(state, update)
+
+    async def _fetch_async(self, state: Dict[str, Any]) -> None:
+        with self._timers["fetch_order"].time():
+            calls = _fetch_calls(state)
+            payloads = await asyncio.gather(*(_acall_fetch_order(call) for call in calls))
+            update = {"messages": [tool_message(c, p) for c, p in zip(calls, payloads)]}
+        apply_update(state, update)
+
+    @staticmethod
+    def _start(input: Dict[str, Any], config: Optional[dict]) -> Dict[str, Any]:
+        if config and (config.get("configurable") or {}).get("thread_id"):
+            raise ValueError("The direct engine does not checkpoint; use build_graph(checkpointer=...)")
+        state: Dict[str, Any] = {}
+        apply_update(state, {k: v for k, v in (input or {}).items() if k in STATE_KEYS})
+        return state
 
+    @staticmethod
+    def _output(state: Dict[str, Any]) -> TriageState:
+        return {key: state[key] for key in STATE_KEYS if key in state}
+
+    def _head(self, state: Dict[str, Any]) -> Optional[str]:
+        """ingest and classify_issue; returns the route after classify, or END."""
+        self._run(state, ingest)
+        if route_after_ingest(state) == END:
+            return END
+        self._run(state, classify_issue)
+        return route_after_classify(state)
+
+    def _tail(self, state: Dict[str, Any]) -> None:
+        self._run(state, propose_recommendation)
+        self._run(state, admin_review)
+        if route_after_admin(state) == "draft_reply":
+            self._run(state, draft_reply)
+
+    def invoke(self, input, config=None, **kwargs):
+        with RunTimer("invoke"):
+            state = self._start(input, config)
+            route = self._head(state)
+            if route != END:
+                if route == "request_fetch_order":
+                    self._run(state, request_fetch_order)
+                    self._fetch_sync(state)
+                    self._run(state, store_order_evidence)
+                self._tail(state)
+            result = self._output(state)
+        RunTimer.record_state(result)
+        return result
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        with RunTimer("invoke"):
+            state = self._start(input, config)
+            route = self._head(state)
+            if route != END:
+                if route == "request_fetch_order":
+                    self._run(state, request_fetch_order)
+                    await self._fetch_async(state)
+                    self._run(state, store_order_evidence)
+                self._tail(state)
+            result = self._output(state)
+        RunTimer.record_state(result)
+        return result
+
+
+def build_engine(engine: str = "langgraph"):
+    """The compiled graph ("langgraph") or the DirectGraph ("direct")."""
+    if engine == "langgraph":
+        return build_graph()
+    if engine == "direct":
+        return DirectGraph()
+    raise ValueError(f"Unknown engine: {engine!r} (expected one of {', '.join(ENGINES)})")
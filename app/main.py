@@ -1,34 +1,119 @@
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-import json, os, re
-from langfuse.decorators import observe, langfuse_context
-from typing import Any, Dict, List, Optional, TypedDict
-from langchain_core.messages import AnyMessage
+import os, re
+from typing import Any, Dict, List, Literal, Optional, TypedDict
 from dotenv import load_dotenv
-import time
+import asyncio, logging, threading, time
+from contextlib import asynccontextmanager
+from app.responses import ORJSONResponse, dumps
 load_dotenv()
+logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Phase 1 Mock API")
-ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-MOCK_DIR = os.path.join(ROOT, "mock_data")
 
-def load(name):
-    with open(os.path.join(MOCK_DIR, name), "r", encoding="utf-8") as f:
-        return json.load(f)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if WARM_START:
+        # Load data and compile the graphs before the first request, not during it
+        REGISTRY.current
+        get_graph()
+        get_engine()
+        get_checkpoint_graph()
+    if RELOAD_INTERVAL > 0:
+        REGISTRY.start_watching(RELOAD_INTERVAL)
+    yield
+    REGISTRY.stop_watching()
+    ADMISSION.close()
+    if BATCH_RUNNER is not None:
+        BATCH_RUNNER.close()
+    backend = configure_order_backend(None)
+    if backend is not None:
+        backend.close()
 
-ORDERS = load("orders.json")
-ISSUES = load("issues.json")
-REPLIES = load("replies.json")
 
-from app.graph import build_graph
-GRAPH = build_graph()
+app = FastAPI(title="Phase 1 Mock API", lifespan=lifespan, default_response_class=ORJSONResponse)
+
+from app.admission import AdmissionController, AdmissionRejected
+from app.backends import configure_order_backend
+from app.batch import DEFAULT_ENGINE, BatchRunner
+from app.cache import TriageCache, cache_key
+from app.metrics import METRICS
+from app.registry import REGISTRY, RELOAD_INTERVAL
+from app.templates import CompiledTemplate, render_reply
+from app.tracing import observe, update_current_trace
+# Opt-in via TRIAGE_CACHE_ENABLED
+TRIAGE_CACHE = TriageCache.from_env()
+# Set TRIAGE_WARM_START=0 to defer data loading and graph compilation to the first request
+WARM_START = os.getenv("TRIAGE_WARM_START", "1") != "0"
+
+# Graph runs on the triage endpoints go through a sized pool and bounded queue
+ADMISSION = AdmissionController.from_env()
+
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected(request: Request, exc: AdmissionRejected):
+    return ORJSONResponse(
+        {"detail": exc.detail}, status_code=exc.status, headers={"Retry-After": str(exc.retry_after)}
+    )
+
+
+# LangGraph is only imported when the first graph is compiled
+GRAPH = None
+CHECKPOINT_GRAPH = None
+DIRECT_GRAPH = None
+_graph_lock = threading.Lock()
+
+
+def get_graph():
+    global GRAPH
+    if GRAPH is None:
+        with _graph_lock:
+            if GRAPH is None:
+                from app.graph import build_graph
+
+                GRAPH = build_graph()
+    return GRAPH
+
+
+def get_engine(engine: str | None = None):
+    """The graph that runs unthreaded tickets: TRIAGE_ENGINE unless ``engine`` overrides it."""
+    global DIRECT_GRAPH
+    if (engine or DEFAULT_ENGINE) != "direct":
+        return get_graph()
+    if DIRECT_GRAPH is None:
+        with _graph_lock:
+            if DIRECT_GRAPH is None:
+                from app.graph import DirectGraph
+
+                DIRECT_GRAPH = DirectGraph()
+    return DIRECT_GRAPH
+
+
+def get_checkpoint_graph():
+    """Paused before admin_review so decisions resume from the saved checkpoint."""
+    global CHECKPOINT_GRAPH
+    if CHECKPOINT_GRAPH is None:
+        with _graph_lock:
+            if CHECKPOINT_GRAPH is None:
+                from app.graph import build_graph, make_checkpointer
+
+                path = os.getenv("TRIAGE_CHECKPOINT_DB")
+                if not path:
+                    logger.warning(
+                        "TRIAGE_CHECKPOINT_DB is not set: checkpoints are kept in this process's memory. "
+                        "/triage/admin only finds threads started on the same worker, so run a single "
+                        "worker or set TRIAGE_CHECKPOINT_DB when running with --workers."
+                    )
+                CHECKPOINT_GRAPH = build_graph(checkpointer=make_checkpointer(path))
+    return CHECKPOINT_GRAPH
 
 
 class TriageInput(BaseModel):
-    messages: List[AnyMessage]
     ticket_text: str
     order_id: str | None = None
-    messages: list[dict] = []
+    order_ids: List[str] | None = None
+    # Plain dicts ({"role": ..., "content": ...}); the graph's messages reducer converts them
+    messages: List[Dict[str, Any]] = []
     issue_type: str | None = None
     evidence: dict = {}
     recommendation: str | None = None
@@ -36,50 +121,127 @@ class TriageInput(BaseModel):
     admin_decision: str | None = None
     admin_notes: str | None = None
     reply_draft: str | None = None
+    thread_id: str | None = None
+
+
+def to_state(body: TriageInput) -> Dict[str, Any]:
+    """Shallow state dict from a validated request, without model_dump's deep copy."""
+    return {name: value for name, value in body if name != "thread_id"}
+
+
+class AdminDecisionInput(BaseModel):
+    thread_id: str
+    admin_decision: str
+    admin_notes: str | None = None
+
+
+class TriageBatchInput(BaseModel):
+    items: List[TriageInput]
+
+
+BATCH_RUNNER: BatchRunner | None = None
+_batch_runner_lock = threading.Lock()
+
+
+def get_batch_runner() -> BatchRunner:
+    global BATCH_RUNNER
+    if BATCH_RUNNER is None:
+        with _batch_runner_lock:
+            if BATCH_RUNNER is None:
+                BATCH_RUNNER = BatchRunner()
+    return BATCH_RUNNER
 
 @app.get("/health")
 def health(): return {"status": "ok"}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/orders/get")
 def orders_get(order_id: str = Query(...)):
-    for o in ORDERS:
-        if o["order_id"] == order_id: return o
+    order = REGISTRY.current.orders.get(order_id)
+    if order is not None: return order
     raise HTTPException(status_code=404, detail="Order not found")
 
 @app.get("/orders/search")
-def orders_search(customer_email: str | None = None, q: str | None = None):
-    matches = []
-    for o in ORDERS:
-        if customer_email and o["email"].lower() == customer_email.lower():
-            matches.append(o)
-        elif q and (o["order_id"].lower() in q.lower() or o["customer_name"].lower() in q.lower()):
-            matches.append(o)
-    return {"results": matches}
+def orders_search(
+    customer_email: str | None = None,
+    q: str | None = None,
+    fuzzy: bool = False,
+    threshold: float = Query(0.3, gt=0, le=1),
+    limit: int = Query(10, ge=1, le=100),
+):
+    """
+    Exact email and free text search, or with ``fuzzy=true`` orders ranked by
+    trigram similarity of q to their name, email, SKUs and item names.
+    """
+    if fuzzy:
+        hits = REGISTRY.current.orders.fuzzy_search(q or "", threshold=threshold, limit=limit)
+        return {"results": [order for order, _ in hits], "scores": [score for _, score in hits]}
+    return {"results": REGISTRY.current.orders.search(customer_email=customer_email, q=q)}
+
+def classify_tickets(texts: List[str]) -> List[Dict[str, Any]]:
+    from app.classifier import classify_batch
+
+    snapshot = REGISTRY.current
+    return classify_batch(texts, snapshot.issue_matcher, snapshot.issue_classifier)
+
 
 @app.post("/classify/issue")
 def classify_issue(payload: dict):
-    text = payload.get("ticket_text", "").lower()
-    for rule in ISSUES:
-        if rule["keyword"] in text:
-            return {"issue_type": rule["issue_type"], "confidence": 0.85}
-    return {"issue_type": "unknown", "confidence": 0.1}
+    return classify_tickets([payload.get("ticket_text") or ""])[0]
+
 
-def render_reply(issue_type: str, order):
-    template = next((r["template"] for r in REPLIES if r["issue_type"] == issue_type), None)
-    if not template: template = "Hi {{customer_name}}, we are reviewing order {{order_id}}."
-    return template.replace("{{customer_name}}", order.get("customer_name","Customer")).replace("{{order_id}}", order.get("order_id",""))
+class ClassifyBatchInput(BaseModel):
+    tickets: List[str]
+
+
+@app.post("/classify/batch")
+def classify_batch(body: ClassifyBatchInput):
+    """Keyword matches first; the rest are scored by the model in one batch."""
+    return {"results": classify_tickets(body.tickets)}
+
+REPLY_FALLBACK = CompiledTemplate("Hi {{customer_name}}, we are reviewing order {{order_id}}.")
+REPLY_DEFAULTS = {"customer_name": "Customer", "order_id": ""}
 
 @app.post("/reply/draft")
 def reply_draft(payload: dict):
-    return {"reply_text": render_reply(payload.get("issue_type"), payload.get("order", {}))}
+    reply = render_reply(
+        payload.get("issue_type"), payload.get("order", {}), fallback=REPLY_FALLBACK, defaults=REPLY_DEFAULTS
+    )
+    return {"reply_text": reply}
+
+
+TRIAGE_FIELDS = frozenset(TriageInput.model_fields) - {"thread_id"}
+
+
+def parse_fields(fields: str | None) -> List[str] | None:
+    """Validate a comma-separated ``fields`` selection for the triage response."""
+    if not fields:
+        return None
+    names = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = sorted(set(names) - TRIAGE_FIELDS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return names
 
 
 @app.post("/triage/invoke")
+@ADMISSION.admit
 @observe()
-def triage_invoke(body: TriageInput):
-    state = body.model_dump()
+def triage_invoke(
+    body: TriageInput,
+    fields: str | None = None,
+    engine: Literal["langgraph", "direct"] | None = None,
+):
+    selected = parse_fields(fields)
+    state = to_state(body)
+    thread_id = body.thread_id
+    if thread_id and engine == "direct":
+        raise HTTPException(status_code=400, detail="engine=direct does not support thread_id")
 
-    langfuse_context.update_current_trace(
+    update_current_trace(
         name="triage_invoke",
         input=state,
         metadata={
@@ -87,11 +249,122 @@ def triage_invoke(body: TriageInput):
             "issue_type": state.get("issue_type"),
             "needs_admin": state.get("needs_admin"),
             "admin_decision": state.get("admin_decision"),
+            "thread_id": thread_id,
         },
         tags=["phase1", "triage"],
     )
 
-    result = GRAPH.invoke(state)
+    if thread_id:
+        from app.graph import thread_config
 
-    langfuse_context.update_current_trace(output=result)
+        result = get_checkpoint_graph().invoke(state, thread_config(thread_id))
+    else:
+        result = run_cached(state, engine)
+
+    update_current_trace(output=result)
+    if selected is not None:
+        # Skip serializing messages and evidence unless the caller asked for them
+        result = {name: result.get(name) for name in selected}
+    # Returned as a response so FastAPI skips jsonable_encoder on the message objects
+    return ORJSONResponse(result)
+
+
+def run_cached(state: dict, engine: str | None = None) -> dict:
+    """Serve repeated tickets from TRIAGE_CACHE when it is enabled."""
+    key = cache_key(state, REGISTRY.version) if TRIAGE_CACHE is not None else None
+    if key is None:
+        return get_engine(engine).invoke(state)
+
+    # Both engines produce the same state, so they share cache entries
+    result = TRIAGE_CACHE.get(key)
+    if result is None:
+        result = get_engine(engine).invoke(state)
+        TRIAGE_CACHE.put(key, result)
     return result
+
+
+@app.get("/cache/stats")
+def cache_stats():
+    if TRIAGE_CACHE is None:
+        return {"enabled": False}
+    return {"enabled": True, **TRIAGE_CACHE.stats()}
+
+
+@app.post("/triage/admin")
+@ADMISSION.admit
+@observe()
+def triage_admin(body: AdminDecisionInput):
+    """Resume a checkpointed thread at admin_review with the admin decision."""
+    update_current_trace(
+        name="triage_admin",
+        metadata={"thread_id": body.thread_id, "admin_decision": body.admin_decision},
+        tags=["phase1", "triage"],
+    )
+    from app.graph import resume_with_decision
+
+    try:
+        result = resume_with_decision(get_checkpoint_graph(), body.thread_id, body.admin_decision, body.admin_notes)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="No triage run is waiting for admin review on this thread")
+
+    update_current_trace(output=result)
+    return ORJSONResponse(result)
+
+
+def sse_event(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {dumps(data).decode()}\n\n"
+
+
+@app.post("/triage/stream")
+async def triage_stream(body: TriageInput, request: Request):
+    """
+    Run the graph under admission control and send each node's state update
+    as an SSE event named after the node. The run holds one worker like any
+    other; closing the connection stops it at the next node.
+    """
+    state = to_state(body)
+    graph = get_graph()
+    loop = asyncio.get_running_loop()
+    updates: asyncio.Queue = asyncio.Queue()
+    closed = threading.Event()
+
+    def run_graph() -> None:
+        try:
+            for chunk in graph.stream(state, stream_mode="updates"):
+                if closed.is_set():
+                    return
+                loop.call_soon_threadsafe(updates.put_nowait, ("updates", chunk))
+        except Exception as e:
+            loop.call_soon_threadsafe(updates.put_nowait, ("error", {"detail": f"{type(e).__name__}: {e}"}))
+        else:
+            loop.call_soon_threadsafe(updates.put_nowait, ("end", {}))
+
+    # Rejections surface as 429/503 before the stream begins
+    await ADMISSION.start(run_graph)
+
+    async def events():
+        try:
+            while True:
+                kind, data = await updates.get()
+                if kind != "updates":
+                    yield sse_event(kind, data)
+                    return
+                if await request.is_disconnected():
+                    return
+                for node, delta in data.items():
+                    yield sse_event(node, delta)
+        finally:
+            closed.set()
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.post("/triage/batch")
+@ADMISSION.admit
+def triage_batch(body: TriageBatchInput):
+    """
+    Takes one admission worker for the whole batch, which drives the shared
+    BatchRunner pool; concurrent batches queue behind other graph runs.
+    """
+    states = (to_state(item) for item in body.items)
+    return ORJSONResponse({"results": get_batch_runner().run(states)})
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton over the keyword table from issues.json.
+
+    The automaton is built once and then scans a ticket in a single pass,
+    regardless of how many keywords are loaded. Each keyword keeps the index
+    of the row it came from, so callers can apply the same "first row wins"
+    priority as a sequential scan over the table.
+    """
+
+    def __init__(self, rows: Iterable[Dict[str, Any]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Row indices that end at each state, including those reached via fail links
+        self._out: List[List[int]] = [[]]
+        self._issue_types: List[Optional[str]] = []
+
+        for idx, row in enumerate(rows):
+            self._issue_types.append(row.get("issue_type"))
+            kw = (row.get("keyword") or "").lower()
+            if kw:
+                self._add(kw, idx)
+
+        self._link()
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict[str, Any]]) -> "KeywordMatcher":
+        return cls(rows)
+
+    def _add(self, keyword: str, row_index: int) -> None:
+        node = 0
+        for ch in keyword:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append(row_index)
+
+    def _link(self) -> None:
+        queue: deque[int] = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find_all(self, text: str) -> List[Tuple[int, int]]:
+        """
+        Return every (end_position, row_index) keyword hit in the text.
+
+        Matching is case-insensitive and substring based, like ``kw in text``.
+        """
+        goto, fail, out = self._goto, self._fail, self._out
+        hits: List[Tuple[int, int]] = []
+        node = 0
+        for pos, ch in enumerate(text.lower()):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for row_index in out[node]:
+                hits.append((pos, row_index))
+        return hits
+
+    def first_row(self, text: str) -> Optional[int]:
+        """Return the lowest matching row index, or None if nothing matches."""
+        goto, fail, out = self._goto, self._fail, self._out
+        best: Optional[int] = None
+        node = 0
+        for ch in text.lower():
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                candidate = min(out[node])
+                if best is None or candidate < best:
+                    best = candidate
+                    if best == 0:
+                        break
+        return best
+
+    def classify(self, text: str) -> Optional[str]:
+        """Return the issue type of the highest priority keyword found in the text."""
+        row_index = self.first_row(text)
+        if row_index is None:
+            return None
+        return self._issue_types[row_index]
@@ -0,0 +1,273 @@
+"""
+In-process metrics with Prometheus text exposition.
+
+Metric children are resolved once per label set and updated under a small
+per-child lock, so recording a sample costs a clock read, a bisect and a few
+integer updates. ``render()`` produces the text served at ``/metrics``.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self) -> object:
+        raise NotImplementedError
+
+    def labels(self, *values: str, **kwargs: str):
+        if kwargs:
+            values = tuple(kwargs[name] for name in self.labelnames)
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+            *self._samples(),
+        ]
+
+
+class _Value:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"
+            for key, child in sorted(self._children.items())
+        ]
+
+
+class Gauge(Counter):
+    type_name = "gauge"
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "count", "_lock")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[idx] += 1
+            self.sum += value
+            self.count += 1
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for key, child in sorted(self._children.items()):
+            with child._lock:
+                counts, total, count = list(child.counts), child.sum, child.count
+            cumulative = 0
+            for bound, n in zip((*self.buckets, float("inf")), counts):
+                cumulative += n
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+METRICS = MetricsRegistry()
+
+NODE_LATENCY = METRICS.register(
+    Histogram("triage_node_latency_seconds", "Time spent inside each graph node.", ["node"])
+)
+NODE_ERRORS = METRICS.register(Counter("triage_node_errors_total", "Graph node calls that raised.", ["node"]))
+GRAPH_LATENCY = METRICS.register(
+    Histogram("triage_graph_latency_seconds", "End-to-end graph run time.", ["mode"])
+)
+GRAPH_OVERHEAD = METRICS.register(
+    Histogram(
+        "triage_graph_overhead_seconds",
+        "Graph run time not spent inside nodes (scheduling, channel updates).",
+        ["mode"],
+    )
+)
+GRAPH_RUNS = METRICS.register(Counter("triage_graph_runs_total", "Graph runs started.", ["mode"]))
+GRAPH_ERRORS = METRICS.register(Counter("triage_graph_errors_total", "Graph runs that raised.", ["mode"]))
+STATE_MESSAGES = METRICS.register(Gauge("triage_state_messages", "Messages in the most recent final state."))
+ADMISSION_QUEUE_DEPTH = METRICS.register(
+    Gauge("triage_admission_queue_depth", "Graph runs admitted and waiting for a worker.")
+)
+ADMISSION_IN_FLIGHT = METRICS.register(Gauge("triage_admission_in_flight", "Graph runs executing on a worker."))
+ADMISSION_WAIT = METRICS.register(
+    Histogram("triage_admission_wait_seconds", "Time admitted graph runs waited for a worker.")
+)
+ADMISSION_REJECTED = METRICS.register(
+    Counter("triage_admission_rejected_total", "Requests turned away by admission control.", ["reason"])
+)
+
+# Accumulates node time for the graph run in progress so the run can report
+# its own scheduling overhead. Nodes run in copies of the caller's context,
+# so they share the same mutable holder.
+_node_time: ContextVar[Optional[List[float]]] = ContextVar("node_time", default=None)
+
+
+class NodeTimer:
+    """Times one node; resolved once per node when the graph is built."""
+
+    __slots__ = ("_latency", "_errors")
+
+    def __init__(self, node: str):
+        self._latency = NODE_LATENCY.labels(node)
+        self._errors = NODE_ERRORS.labels(node)
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self._errors.inc()
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            self._latency.observe(elapsed)
+            acc = _node_time.get()
+            if acc is not None:
+                acc[0] += elapsed
+
+
+class RunTimer:
+    """Times a whole graph run and derives the time spent outside nodes."""
+
+    __slots__ = ("mode", "_acc", "_token", "_start")
+
+    def __init__(self, mode: str):
+        self.mode = mode
+
+    def __enter__(self) -> "RunTimer":
+        GRAPH_RUNS.labels(self.mode).inc()
+        self._acc = [0.0]
+        self._token = _node_time.set(self._acc)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        elapsed = time.perf_counter() - self._start
+        try:
+            _node_time.reset(self._token)
+        except ValueError:
+            # An async stream closed from a different context than it started in
+            pass
+        if exc_type is not None:
+            GRAPH_ERRORS.labels(self.mode).inc()
+        GRAPH_LATENCY.labels(self.mode).observe(elapsed)
+        GRAPH_OVERHEAD.labels(self.mode).observe(max(0.0, elapsed - self._acc[0]))
+
+    @staticmethod
+    def record_state(state: object) -> None:
+        if isinstance(state, dict):
+            STATE_MESSAGES.set(len(state.get("messages") or ()))
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .trigram import DEFAULT_LIMIT, DEFAULT_THRESHOLD, TrigramIndex
+
+TOKEN_REGEX = re.compile(r"[a-z0-9]+")
+LETTERS_REGEX = re.compile(r"[a-z]+")
+
+
+def normalize_email(email: str) -> str:
+    return email.strip().lower()
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_REGEX.findall(text.lower())
+
+
+def fuzzy_fields(order: Dict[str, Any]) -> Iterator[str]:
+    """
+    Strings fuzzy search matches against: customer name, the letters of the
+    email's local part (digits and the shared domain are noise), and each
+    item's SKU and name.
+    """
+    yield order.get("customer_name") or ""
+    email = order.get("email") or ""
+    yield " ".join(LETTERS_REGEX.findall(email.lower().split("@")[0]))
+    for item in order.get("items") or ():
+        if isinstance(item, dict):
+            yield item.get("sku") or ""
+            yield item.get("name") or ""
+
+
+class OrderRepository:
+    """
+    In-memory order catalog with precomputed lookup indexes.
+
+    - order_id -> position, for O(1) lookups by id
+    - normalized email -> positions, for exact customer email search
+    - leading token of order_id / customer_name -> positions, so a free text
+      query only verifies orders whose id or name could appear in it
+    - a trigram index over names, emails, SKUs and item names for ranked
+      fuzzy search (see app.trigram)
+
+    Results are always returned in catalog order.
+    """
+
+    def __init__(self, orders: Iterable[Dict[str, Any]] = ()):
+        self._orders: List[Dict[str, Any]] = []
+        self._by_id: Dict[str, int] = {}
+        self._by_email: Dict[str, List[int]] = {}
+        self._by_token: Dict[str, List[int]] = {}
+        self._fuzzy = TrigramIndex()
+        for order in orders:
+            self.add(order)
+
+    def __len__(self) -> int:
+        return len(self._orders)
+
+    def add(self, order: Dict[str, Any]) -> None:
+        """Append an order and update every index incrementally."""
+        pos = len(self._orders)
+        self._orders.append(order)
+
+        order_id = order.get("order_id")
+        if order_id:
+            self._by_id.setdefault(order_id, pos)
+
+        email = order.get("email")
+        if email:
+            self._by_email.setdefault(normalize_email(email), []).append(pos)
+
+        for value in (order_id, order.get("customer_name")):
+            tokens = tokenize(value or "")
+            if tokens:
+                self._by_token.setdefault(tokens[0], []).append(pos)
+
+        for text in fuzzy_fields(order):
+            self._fuzzy.add(text, pos)
+
+    def get(self, order_id: str) -> Optional[Dict[str, Any]]:
+        pos = self._by_id.get(order_id)
+        return None if pos is None else self._orders[pos]
+
+    def find_by_email(self, email: str) -> List[Dict[str, Any]]:
+        return [self._orders[pos] for pos in self._by_email.get(normalize_email(email), [])]
+
+    def _match_query(self, q: str) -> Set[int]:
+        text = q.lower()
+        matches: Set[int] = set()
+        for token in set(tokenize(text)):
+            for pos in self._by_token.get(token, ()):
+                if pos in matches:
+                    continue
+                order = self._orders[pos]
+                if order["order_id"].lower() in text or order["customer_name"].lower() in text:
+                    matches.add(pos)
+        return matches
+
+    def search(self, customer_email: Optional[str] = None, q: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Return orders whose email equals customer_email (case-insensitive), or
+        whose order id or customer name appears in q.
+        """
+        positions: Set[int] = set()
+        if customer_email:
+            positions.update(self._by_email.get(normalize_email(customer_email), ()))
+        if q:
+            positions.update(self._match_query(q))
+        return [self._orders[pos] for pos in sorted(positions)]
+
+    def fuzzy_search(
+        self,
+        q: str,
+        threshold: float = DEFAULT_THRESHOLD,
+        limit: int = DEFAULT_LIMIT,
+    ) -> List[Tuple[Dict[str, Any], float]]:
+        """
+        Orders whose name, email, SKU or item name is similar to q, as
+        (order, score) pairs, best first. Tolerates typos ("Sara Patle").
+        """
+        return [(self._orders[pos], score) for pos, score in self._fuzzy.search(q, threshold, limit)]
@@ -0,0 +1,255 @@
+"""
+Data registry for issues, replies and orders.
+
+All derived lookup structures (keyword matcher, reply templates, order
+repository) are built together into an immutable DataSnapshot. Readers take
+``REGISTRY.current`` once and use it; a reload builds a complete new snapshot
+off to the side and publishes it with a single attribute assignment, so hot
+paths never lock and never see half-built data.
+
+The first snapshot is built on first access rather than at import, so
+importing the app (or collecting tests) does not parse the data files.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .catalog import SqliteOrderCatalog
+from .matcher import KeywordMatcher
+from .orders import OrderRepository
+from .templates import DEFAULT_FIELDS, CompiledTemplate, build_templates, template_fields
+
+logger = logging.getLogger(__name__)
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+MOCK_DIR = os.path.join(ROOT, "mock_data")
+INTERACTIONS_DIR = os.path.join(ROOT, "interactions")
+
+DATA_FILES = ("issues.json", "replies.json", "orders.json")
+
+
+def load_json(path: str) -> Any:
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Data file not found: {path}")
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid JSON in {os.path.basename(path)}: {e}") from e
+    except Exception as e:
+        raise RuntimeError(f"Error reading {os.path.basename(path)}: {e}") from e
+
+
+@dataclass(frozen=True)
+class DataSnapshot:
+    version: str
+    issues: List[Dict[str, Any]]
+    replies: List[Dict[str, Any]]
+    issue_matcher: KeywordMatcher
+    templates: Dict[str, CompiledTemplate]
+    orders: Any  # OrderRepository or SqliteOrderCatalog
+    # Order fields fetch_order keeps in evidence; None keeps the whole order
+    evidence_fields: Optional[Tuple[str, ...]] = None
+    # Labeled conversations (see app.classifier.training_examples)
+    training_dir: Optional[str] = None
+
+    @cached_property
+    def issue_classifier(self) -> Any:
+        """
+        IssueClassifier trained on this snapshot's keywords and training_dir,
+        or None without labeled data. DataRegistry trains it before it
+        publishes the snapshot, so requests never wait on training. The
+        training dir is not watched data, so a bad file there is logged and
+        classification falls back to keywords instead of failing the load.
+        """
+        from .classifier import IssueClassifier, load_conversations, training_examples
+
+        try:
+            texts, labels = training_examples(self.issues, load_conversations(self.training_dir))
+            if not texts:
+                return None
+            return IssueClassifier.train(texts, labels)
+        except Exception:
+            logger.exception("Issue classifier training failed; using keywords only (%s)", self.training_dir)
+            return None
+
+
+def resolve_evidence_fields(
+    templates: Dict[str, CompiledTemplate],
+    configured: Optional[Sequence[str]] = None,
+) -> Optional[Tuple[str, ...]]:
+    """
+    Order fields to keep in triage evidence. By default these are the fields
+    the reply templates use; ``configured`` adds to them, or ``["*"]`` keeps
+    every field.
+    """
+    configured = [f.strip() for f in configured or () if f.strip()]
+    if "*" in configured:
+        return None
+    fields = dict.fromkeys([*DEFAULT_FIELDS, *template_fields(templates), *configured])
+    return tuple(fields)
+
+
+class DataRegistry:
+    """
+    Owns the current DataSnapshot and rebuilds it when the source files change.
+
+    Changes are detected by file mtime and size. ``catalog_path`` switches
+    order lookups to a SQLite catalog (see app.catalog), which is then watched
+    instead of orders.json. Nothing is loaded until ``current`` is first read.
+    ``evidence_fields`` is passed to resolve_evidence_fields, and
+    ``training_dir`` holds the labeled conversations the issue classifier
+    learns from (not watched; a data reload retrains from it).
+    """
+
+    def __init__(
+        self,
+        data_dir: str = MOCK_DIR,
+        catalog_path: Optional[str] = None,
+        evidence_fields: Optional[Sequence[str]] = None,
+        training_dir: Optional[str] = INTERACTIONS_DIR,
+    ):
+        self.data_dir = data_dir
+        self.catalog_path = catalog_path
+        self.evidence_fields = evidence_fields
+        self.training_dir = training_dir
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self._snapshot: Optional[DataSnapshot] = None
+        # Stamp of data files that failed to load, so they are not retried
+        self._failed_version: Optional[str] = None
+
+    @property
+    def current(self) -> DataSnapshot:
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._reload_lock:
+                if self._snapshot is None:
+                    self._snapshot = self._build(self._stamp())
+                snapshot = self._snapshot
+        return snapshot
+
+    @property
+    def loaded(self) -> bool:
+        return self._snapshot is not None
+
+    @property
+    def version(self) -> str:
+        return self.current.version
+
+    def _paths(self) -> List[str]:
+        paths = [os.path.join(self.data_dir, name) for name in DATA_FILES]
+        if self.catalog_path:
+            paths[-1] = self.catalog_path
+        return paths
+
+    def _stamp(self) -> str:
+        parts: List[Tuple[str, int, int]] = []
+        for path in self._paths():
+            try:
+                st = os.stat(path)
+                parts.append((path, st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                parts.append((path, 0, 0))
+        return hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()[:16]
+
+    def _build(self, version: str) -> DataSnapshot:
+        issues_path, replies_path, orders_path = self._paths()
+        issues = load_json(issues_path)
+        replies = load_json(replies_path)
+        if self.catalog_path:
+            orders = SqliteOrderCatalog(orders_path)
+        else:
+            orders = OrderRepository(load_json(orders_path))
+
+        templates = build_templates(replies)
+        snapshot = DataSnapshot(
+            version=version,
+            issues=issues,
+            replies=replies,
+            issue_matcher=KeywordMatcher.from_rows(issues),
+            templates=templates,
+            orders=orders,
+            evidence_fields=resolve_evidence_fields(templates, self.evidence_fields),
+            training_dir=self.training_dir,
+        )
+        # Train here, on the loading or watcher thread, rather than on the
+        # first request that misses every keyword
+        snapshot.issue_classifier
+        return snapshot
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        Rebuild and publish a new snapshot if the data files changed.
+
+        Returns True if a new snapshot was published. If the new data fails to
+        load, the current snapshot stays in place and the error is raised
+        once; the same files are not retried until they change again.
+        """
+        with self._reload_lock:
+            version = self._stamp()
+            if not force and self._snapshot is not None and version == self._snapshot.version:
+                return False
+            if not force and version == self._failed_version:
+                return False
+            try:
+                snapshot = self._build(version)
+            except Exception:
+                self._failed_version = version
+                raise
+            self._snapshot, self._failed_version = snapshot, None
+            logger.info("Loaded data snapshot %s from %s", version, self.data_dir)
+            return True
+
+    def use(self, data_dir: str, catalog_path: Optional[str] = None) -> None:
+        """Switch to another data directory (e.g. a synthetic dataset) and load it."""
+        with self._reload_lock:
+            previous = (self.data_dir, self.catalog_path)
+            self.data_dir, self.catalog_path = data_dir, catalog_path
+            try:
+                self._snapshot = self._build(self._stamp())
+            except Exception:
+                self.data_dir, self.catalog_path = previous
+                raise
+
+    def start_watching(self, interval: float) -> None:
+        """Poll for changes every ``interval`` seconds on a daemon thread."""
+        if self._watcher is not None:
+            return
+        self._stop.clear()
+
+        def watch() -> None:
+            while not self._stop.wait(interval):
+                try:
+                    self.reload()
+                except Exception:
+                    snapshot = self._snapshot
+                    logger.exception("Data reload failed; keeping snapshot %s", snapshot and snapshot.version)
+
+        self._watcher = threading.Thread(target=watch, name="data-registry-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        if self._watcher is None:
+            return
+        self._stop.set()
+        self._watcher.join()
+        self._watcher = None
+
+
+RELOAD_INTERVAL = float(os.getenv("DATA_RELOAD_INTERVAL", "5"))
+
+REGISTRY = DataRegistry(
+    data_dir=os.getenv("MOCK_DATA_DIR", MOCK_DIR),
+    catalog_path=os.getenv("ORDER_CATALOG_PATH") or None,
+    evidence_fields=os.getenv("TRIAGE_EVIDENCE_FIELDS", "").split(","),
+    training_dir=os.getenv("TRIAGE_TRAINING_DIR", INTERACTIONS_DIR),
+)
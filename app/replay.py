@@ -0,0 +1,246 @@
+"""
+Replay a JSONL ticket export through the triage graph.
+
+Tickets are streamed line by line through a generator pipeline (read, parse,
+build state, run on a BatchRunner, project, write), so memory stays flat
+regardless of file size. Results are appended to a JSONL file in input
+order, and a small checkpoint records the input byte offset, line number and
+output size of everything written so far. Rerunning with the same
+checkpoint resumes after the last checkpointed line; anything written past
+it is truncated and redone.
+
+    python -m app.replay tickets.jsonl --out results.jsonl --workers 8
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .batch import DEFAULT_CHUNK_SIZE, DEFAULT_ENGINE, DEFAULT_EXECUTOR, BatchRunner
+
+TEXT_FIELDS = ("ticket_text", "body", "text", "message")
+ID_FIELDS = ("ticket_id", "id", "request_id", "conversation_id")
+OUTPUT_FIELDS = ("order_id", "order_ids", "issue_type", "recommendation", "needs_admin", "admin_decision", "reply_draft")
+# Bad lines held back behind in-flight tickets before reading pauses
+MAX_PENDING_ERRORS = 1000
+
+
+class Line:
+    """One input line and where it ends, so progress can be checkpointed."""
+
+    __slots__ = ("number", "end", "id", "state", "error")
+
+    def __init__(self, number: int, end: int):
+        self.number = number
+        self.end = end
+        self.id: Any = None
+        self.state: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+
+
+def read_lines(path: str, offset: int = 0, line: int = 0) -> Iterator[Tuple[Line, bytes]]:
+    """Yield non-blank lines starting at byte ``offset`` (which is line number ``line``)."""
+    with open(path, "rb") as f:
+        f.seek(offset)
+        for raw in f:
+            offset += len(raw)
+            line += 1
+            if raw.strip():
+                yield Line(line, offset), raw
+
+
+def parse_lines(
+    lines: Iterable[Tuple[Line, bytes]],
+    admin_decision: Optional[str] = None,
+) -> Iterator[Line]:
+    """Turn raw lines into triage states; bad lines carry an error instead."""
+    for item, raw in lines:
+        try:
+            record = json.loads(raw)
+        except ValueError as e:
+            item.error = f"JSONDecodeError: {e}"
+            yield item
+            continue
+        if not isinstance(record, dict):
+            item.error = "ValueError: expected a JSON object"
+            yield item
+            continue
+
+        item.id = next((record[k] for k in ID_FIELDS if k in record), None)
+        text = next((record[k] for k in TEXT_FIELDS if isinstance(record.get(k), str)), "")
+        state: Dict[str, Any] = {"ticket_text": text, "messages": []}
+        if record.get("order_id"):
+            state["order_id"] = record["order_id"]
+        if admin_decision:
+            state["admin_decision"] = admin_decision
+        item.state = state
+        yield item
+
+
+def run_lines(
+    items: Iterable[Line],
+    runner: BatchRunner,
+    max_errors: int = MAX_PENDING_ERRORS,
+) -> Iterator[Tuple[Line, Dict[str, Any]]]:
+    """
+    Run parsed lines on ``runner`` and yield (line, outcome) in input order.
+
+    Only lines with a state go to the pool; the rest wait in ``pending`` so
+    they are emitted in their original position. Once ``max_errors`` bad
+    lines are waiting, no more input is read: the pool drains, everything
+    pending is emitted, and a fresh pass picks up where reading stopped. A
+    long run of bad lines is therefore written (and checkpointed) as it is
+    read rather than buffered until the next good one.
+    """
+    source = iter(items)
+    pending: Deque[Line] = deque()
+    errors = 0
+    exhausted = False
+
+    def states() -> Iterator[Dict[str, Any]]:
+        nonlocal errors, exhausted
+        for item in source:
+            pending.append(item)
+            if item.state is not None:
+                yield item.state
+                continue
+            errors += 1
+            if errors >= max_errors:
+                return
+        exhausted = True
+
+    def drain_errors() -> Iterator[Tuple[Line, Dict[str, Any]]]:
+        nonlocal errors
+        while pending and pending[0].state is None:
+            item = pending.popleft()
+            errors -= 1
+            yield item, {"ok": False, "error": item.error}
+
+    while not exhausted:
+        for outcome in runner.imap(states()):
+            yield from drain_errors()
+            yield pending.popleft(), outcome
+        yield from drain_errors()
+
+
+def project(item: Line, outcome: Dict[str, Any], fields: Iterable[str] = OUTPUT_FIELDS) -> Dict[str, Any]:
+    record: Dict[str, Any] = {"line": item.number, "id": item.id, "ok": outcome["ok"]}
+    if outcome["ok"]:
+        result = outcome["result"]
+        record["result"] = {k: result.get(k) for k in fields}
+    else:
+        record["error"] = outcome["error"]
+    return record
+
+
+def new_checkpoint() -> Dict[str, int]:
+    return {"offset": 0, "line": 0, "output_offset": 0, "processed": 0}
+
+
+def load_checkpoint(path: str) -> Dict[str, int]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return new_checkpoint()
+
+
+def save_checkpoint(path: str, checkpoint: Dict[str, int]) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def replay(
+    input_path: str,
+    output_path: str,
+    checkpoint_path: Optional[str] = None,
+    checkpoint_every: int = 1000,
+    admin_decision: Optional[str] = None,
+    fields: Iterable[str] = OUTPUT_FIELDS,
+    **runner_kwargs: Any,
+) -> Dict[str, int]:
+    """
+    Stream ``input_path`` through the graph into ``output_path``.
+
+    Keyword arguments are passed to BatchRunner (executor, max_workers,
+    chunk_size, max_in_flight, engine). Returns the final checkpoint. If the
+    output is missing or shorter than the checkpoint says, the replay starts
+    over from the first line.
+    """
+    checkpoint_path = checkpoint_path or f"{output_path}.checkpoint"
+    checkpoint = load_checkpoint(checkpoint_path)
+    fields = tuple(fields)
+
+    output_size = os.path.getsize(output_path) if os.path.exists(output_path) else 0
+    if output_size < checkpoint["output_offset"]:
+        # The results the checkpoint vouches for are gone; start over
+        checkpoint = new_checkpoint()
+    mode = "r+b" if checkpoint["output_offset"] else "wb"
+    with open(output_path, mode) as out, BatchRunner(**runner_kwargs) as runner:
+        # Drop results written after the last checkpoint; they are redone below
+        out.seek(checkpoint["output_offset"])
+        out.truncate()
+
+        items = parse_lines(read_lines(input_path, checkpoint["offset"], checkpoint["line"]), admin_decision)
+        since_save = 0
+        for item, outcome in run_lines(items, runner):
+            record = project(item, outcome, fields)
+            out.write(json.dumps(record, default=str).encode("utf-8") + b"\n")
+            checkpoint = {
+                "offset": item.end,
+                "line": item.number,
+                "output_offset": out.tell(),
+                "processed": checkpoint["processed"] + 1,
+            }
+            since_save += 1
+            if since_save >= checkpoint_every:
+                out.flush()
+                os.fsync(out.fileno())
+                save_checkpoint(checkpoint_path, checkpoint)
+                since_save = 0
+
+        out.flush()
+        os.fsync(out.fileno())
+        save_checkpoint(checkpoint_path, checkpoint)
+    return checkpoint
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.replay", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("input", help="JSONL file, one ticket object per line")
+    parser.add_argument("--out", required=True, help="JSONL results file (appended to when resuming)")
+    parser.add_argument("--checkpoint", help="checkpoint file (default: <out>.checkpoint)")
+    parser.add_argument("--checkpoint-every", type=int, default=1000, help="results between checkpoints")
+    parser.add_argument("--admin-decision", choices=["approve", "reject"], help="apply this decision to every ticket")
+    parser.add_argument("--fields", default=",".join(OUTPUT_FIELDS), help="comma-separated state fields to write")
+    parser.add_argument("--executor", default=DEFAULT_EXECUTOR, choices=["thread", "process"])
+    parser.add_argument("--workers", type=int, help="pool size (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--engine", default=DEFAULT_ENGINE, choices=["langgraph", "direct"])
+    args = parser.parse_args(argv)
+
+    checkpoint = replay(
+        args.input,
+        args.out,
+        checkpoint_path=args.checkpoint,
+        checkpoint_every=args.checkpoint_every,
+        admin_decision=args.admin_decision,
+        fields=args.fields.split(","),
+        executor=args.executor,
+        max_workers=args.workers,
+        chunk_size=args.chunk_size,
+        engine=args.engine,
+    )
+    print(f"Processed {checkpoint['processed']} tickets through line {checkpoint['line']} into {args.out}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+orjson-backed JSON responses.
+
+FastAPI's default path walks every return value with ``jsonable_encoder`` and
+then calls ``json.dumps``. Triage states carry LangChain message objects, and
+that walk dominates encoding time at long histories. ``ORJSONResponse``
+serializes with orjson and only converts models where orjson reaches them.
+Endpoints that return states hand FastAPI a response directly so the
+encoder is skipped altogether.
+
+Messages are written in the same dict form requests accept, so a client can
+post a returned state straight back for the next turn.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict
+
+import orjson
+from pydantic.v1 import BaseModel as V1BaseModel
+from starlette.responses import JSONResponse
+
+
+MESSAGE_FIELDS = ("id", "name", "tool_call_id", "artifact")
+
+
+def message_dict(message: Any) -> Dict[str, Any]:
+    """
+    A LangChain message as ``{type, content, id, name, tool_calls, ...}``.
+
+    convert_to_messages files any key it does not know under
+    additional_kwargs, so those are written flat here and land back in the
+    same place; writing the full field dict would nest one level per turn.
+    """
+    data = {**message.additional_kwargs, "type": message.type, "content": message.content}
+    for name in MESSAGE_FIELDS:
+        value = getattr(message, name, None)
+        if value is not None:
+            data[name] = value
+    tool_calls = getattr(message, "tool_calls", None)
+    if tool_calls:
+        data["tool_calls"] = tool_calls
+    return data
+
+
+def _default(obj: Any) -> Any:
+    # LangChain messages are pydantic v1 models; other v1 models are written
+    # from __dict__, and orjson recurses into nested values itself.
+    if isinstance(obj, V1BaseModel):
+        from langchain_core.messages import BaseMessage
+
+        return message_dict(obj) if isinstance(obj, BaseMessage) else obj.__dict__
+    dump = getattr(obj, "model_dump", None)
+    if callable(dump):
+        return dump(mode="json")
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class ORJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -1,14 +1,53 @@
 from __future__ import annotations
 
-from typing import TypedDict, List, Dict, Any, Optional
-from langchain_core.messages import AnyMessage
+import os
+from typing import Annotated, TypedDict, List, Dict, Any, Optional
+from langchain_core.messages import AnyMessage, SystemMessage
+from langgraph.graph.message import add_messages
+
+# Keep at most this many messages in the state (0 disables compaction)
+MAX_MESSAGES = int(os.getenv("TRIAGE_MAX_MESSAGES", "100"))
+COMPACTION_MARKER_ID = "compacted-history"
+
+
+def compact_messages(messages: List[AnyMessage], max_messages: int = MAX_MESSAGES) -> List[AnyMessage]:
+    """
+    Keep the last ``max_messages`` messages, replacing older ones with a single
+    marker that counts how many were dropped so far.
+    """
+    if max_messages <= 0:
+        return messages
+
+    dropped = 0
+    body = messages
+    if body and body[0].id == COMPACTION_MARKER_ID:
+        dropped = body[0].additional_kwargs.get("compacted", 0)
+        body = body[1:]
+
+    if len(body) <= max_messages:
+        return messages
+
+    dropped += len(body) - max_messages
+    marker = SystemMessage(
+        content=f"[{dropped} earlier messages compacted]",
+        id=COMPACTION_MARKER_ID,
+        additional_kwargs={"compacted": dropped},
+    )
+    return [marker, *body[-max_messages:]]
+
+
+def append_messages(left: List[AnyMessage], right: List[AnyMessage]) -> List[AnyMessage]:
+    """Append reducer for ``messages`` with bounded history."""
+    return compact_messages(add_messages(left, right))
 
 
 class TriageState(TypedDict, total=False):
-    messages: List[AnyMessage]
+    messages: Annotated[List[AnyMessage], append_messages]
     ticket_text: str
     evidence: Dict[str, Any]
     order_id: Optional[str]
+    # Every order id in the ticket, primary (order_id) first
+    order_ids: Optional[List[str]]
     issue_type: Optional[str]
     recommendation: Optional[str]
     needs_admin: Optional[bool]
@@ -1,34 +1,81 @@
 from __future__ import annotations
 
-import json
-import os
-from typing import Any, Dict
-
-ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-MOCK_DIR = os.path.join(ROOT, "mock_data")
-
-
-def load_json(filename: str) -> Any:
-    """Load JSON file with error handling."""
-    path = os.path.join(MOCK_DIR, filename)
-    if not os.path.exists(path):
-        raise FileNotFoundError(f"Data file not found: {path}")
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except json.JSONDecodeError as e:
-        raise ValueError(f"Invalid JSON in {filename}: {e}") from e
-    except Exception as e:
-        raise RuntimeError(f"Error reading {filename}: {e}") from e
-
-
-def _load_templates() -> Dict[str, str]:
-    """Load and validate templates from replies.json."""
-    replies = load_json("replies.json")
-    
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+PLACEHOLDER_REGEX = re.compile(r"\{\{\s*([\w.]+)\s*\}\}")
+
+# Used for fields that are missing or empty on the order
+DEFAULT_FIELDS: Dict[str, str] = {"customer_name": "there", "order_id": "your order"}
+
+DEFAULT_FALLBACK = "Hi there, thanks for reaching out. We are looking into your request and will get back to you shortly."
+
+
+def format_value(value: Any) -> str:
+    """Format an order field for a reply, e.g. a list of items as their names."""
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, dict):
+        return format_value(value["name"]) if "name" in value else str(value)
+    if isinstance(value, (list, tuple)):
+        return ", ".join(format_value(v) for v in value)
+    return str(value)
+
+
+def resolve(data: Any, path: Tuple[str, ...]) -> Any:
+    """Follow a dotted placeholder path through nested dicts and lists."""
+    for key in path:
+        if isinstance(data, dict):
+            data = data.get(key)
+        elif isinstance(data, (list, tuple)) and key.isdigit() and int(key) < len(data):
+            data = data[int(key)]
+        else:
+            return None
+        if data is None:
+            return None
+    return data
+
+
+class CompiledTemplate:
+    """
+    A reply template parsed once into alternating literals and placeholders.
+
+    Placeholders are ``{{field}}`` or dotted paths into the order such as
+    ``{{items.0.name}}``. Rendering is a single join over the segments.
+    """
+
+    __slots__ = ("source", "_literals", "_fields")
+
+    def __init__(self, source: str):
+        self.source = source
+        self._literals: List[str] = []
+        self._fields: List[Tuple[str, Tuple[str, ...]]] = []
+
+        pos = 0
+        for m in PLACEHOLDER_REGEX.finditer(source):
+            self._literals.append(source[pos:m.start()])
+            self._fields.append((m.group(1), tuple(m.group(1).split("."))))
+            pos = m.end()
+        self._literals.append(source[pos:])
+
+    @property
+    def fields(self) -> List[str]:
+        return [name for name, _ in self._fields]
+
+    def render(self, order: Dict[str, Any], defaults: Dict[str, str] = DEFAULT_FIELDS) -> str:
+        parts = [self._literals[0]]
+        for (name, path), literal in zip(self._fields, self._literals[1:]):
+            value = resolve(order, path)
+            parts.append(format_value(value) if value not in (None, "") else defaults.get(name, ""))
+            parts.append(literal)
+        return "".join(parts)
+
+
+def build_templates(replies: Any) -> Dict[str, CompiledTemplate]:
+    """Validate the rows of replies.json and compile templates by issue type."""
     if not isinstance(replies, list):
         raise ValueError("replies.json must contain a list")
-    
+
     templates = {}
     for r in replies:
         if not isinstance(r, dict):
@@ -36,43 +83,62 @@ def _load_templates() -> Dict[str, str]:
         issue_type = r.get("issue_type")
         template = r.get("template")
         if issue_type and template:
-            templates[issue_type] = str(template)
-    
+            templates[issue_type] = CompiledTemplate(str(template))
+
     return templates
 
 
-TEMPLATES: Dict[str, str] = _load_templates()
+def template_fields(templates: Dict[str, CompiledTemplate]) -> List[str]:
+    """Top-level order fields referenced by any template, in first-seen order."""
+    seen: Dict[str, None] = {}
+    for template in templates.values():
+        for name in template.fields:
+            seen.setdefault(name.split(".", 1)[0], None)
+    return list(seen)
 
 
-def render_reply(issue_type: str, order: Dict[str, Any] | None = None) -> str:
+def _current_templates() -> Dict[str, CompiledTemplate]:
+    from .registry import REGISTRY
+
+    return REGISTRY.current.templates
+
+
+def render_reply(
+    issue_type: str,
+    order: Dict[str, Any] | None = None,
+    templates: Optional[Dict[str, CompiledTemplate]] = None,
+    fallback: str | CompiledTemplate = DEFAULT_FALLBACK,
+    defaults: Dict[str, str] = DEFAULT_FIELDS,
+) -> str:
     """
     Render a reply template for the given issue type.
-    
+
     Args:
         issue_type: The type of issue to generate a reply for
         order: Dictionary containing order information (can be None)
-    
+        templates: Compiled templates by issue type (defaults to the current data registry)
+        fallback: Reply, or template to render, when the issue type has no template
+        defaults: Values for placeholders that are missing or empty on the order
+
     Returns:
         Formatted reply string
     """
-    if order is None:
-        order = {}
-    
-    template = TEMPLATES.get(issue_type)
-    if not template:
-        return "Hi there, thanks for reaching out. We are looking into your request and will get back to you shortly."
-
-    # Handle None, empty string, and falsy values
-    customer_name = order.get("customer_name") or "there"
-    order_id = order.get("order_id") or "your order"
-    
-    # Convert to strings and handle edge cases
-    customer_name = str(customer_name).strip() if customer_name else "there"
-    order_id = str(order_id).strip() if order_id else "your order"
-
-    # Replace placeholders (order matters if one contains the other)
-    result = template.replace("{{customer_name}}", customer_name)
-    result = result.replace("{{order_id}}", order_id)
-    
-    return result
+    if templates is None:
+        templates = _current_templates()
+
+    template = templates.get(issue_type) or fallback
+    if isinstance(template, str):
+        return template
+    return template.render(order or {}, defaults)
+
 
+def render_many(
+    items: Iterable[Tuple[str, Dict[str, Any] | None]],
+    templates: Optional[Dict[str, CompiledTemplate]] = None,
+    fallback: str | CompiledTemplate = DEFAULT_FALLBACK,
+    defaults: Dict[str, str] = DEFAULT_FIELDS,
+) -> List[str]:
+    """Render replies for many (issue_type, order) pairs against one template set."""
+    if templates is None:
+        templates = _current_templates()
+    return [render_reply(issue_type, order, templates, fallback, defaults) for issue_type, order in items]
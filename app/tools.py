@@ -1,39 +1,43 @@
 from __future__ import annotations
-import json
-import os
-from typing import Dict, Any
-from langchain_core.tools import tool
+from typing import Dict, Any, Optional, Sequence
+from langchain_core.tools import StructuredTool
 
-ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-MOCK_DIR = os.path.join(ROOT, "mock_data")
+from .backends import OrderBackendError, get_order_backend
+from .registry import REGISTRY
 
 
-def load(name):
-    path = os.path.join(MOCK_DIR, name)
-    if not os.path.exists(path):
-        raise FileNotFoundError(f"Data file not found: {path}")
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except json.JSONDecodeError as e:
-        raise ValueError(f"Invalid JSON in {name}: {e}") from e
-    except Exception as e:
-        raise RuntimeError(f"Error reading {name}: {e}") from e
+def project_order(order: Dict[str, Any], fields: Optional[Sequence[str]]) -> Dict[str, Any]:
+    """Keep only ``fields`` of an order; None keeps the whole record."""
+    if fields is None:
+        return order
+    return {k: order[k] for k in fields if k in order}
+
 
-ORDERS = load("orders.json")
-ISSUES = load("issues.json")
-REPLIES = load("replies.json")
+def order_payload(order_id: str, order: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    if order is None:
+        return {"found": False, "order_id": order_id}
+    return {"found": True, "order": project_order(order, REGISTRY.current.evidence_fields)}
 
-ORDER_ID_TO_ORDER: Dict[str, Dict[str, Any]] = {o["order_id"]: o for o in ORDERS}
 
-@tool
-def fetch_order(order_id: str) -> Dict[str, Any]:
+def _fetch_order(order_id: str) -> Dict[str, Any]:
     """
-    Fetch an order record by order_id from orders.json.
+    Fetch an order record by order_id from the configured order backend.
     Returns a small payload that is safe to store in evidence.
     """
-    order = ORDER_ID_TO_ORDER.get(order_id)
-    if order is None:
-        return {"found": False, "order_id": order_id}
+    try:
+        order = get_order_backend().get(order_id)
+    except OrderBackendError as e:
+        return {"found": False, "order_id": order_id, "error": str(e)}
+    return order_payload(order_id, order)
+
+
+async def _afetch_order(order_id: str) -> Dict[str, Any]:
+    try:
+        order = await get_order_backend().aget(order_id)
+    except OrderBackendError as e:
+        return {"found": False, "order_id": order_id, "error": str(e)}
+    return order_payload(order_id, order)
+
 
-    return {"found": True, "order": order}
\ No newline at end of file
+# Sync graph runs call the function, astream/ainvoke the coroutine
+fetch_order = StructuredTool.from_function(func=_fetch_order, coroutine=_afetch_order, name="fetch_order")
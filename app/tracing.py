@@ -0,0 +1,413 @@
+"""
+Sampled, non-blocking tracing for graph nodes and API handlers.
+
+``observe()`` replaces ``langfuse.decorators.observe``. The outermost observed
+call decides once whether the request is sampled; unsampled requests, and
+every request when tracing is off, only pay for a context variable lookup.
+Sampled traces are recorded in memory with payloads reduced to an allowlist
+of state fields, then serialized, truncated and exported in batches on a
+background thread.
+
+Configuration (environment):
+    TRACING_MODE          off | langfuse | http (default: langfuse if
+                          LANGFUSE_PUBLIC_KEY is set, otherwise off)
+    TRACING_SAMPLE_RATE   fraction of requests to trace (default 1.0)
+    TRACING_FIELDS        comma-separated state fields kept in payloads
+    TRACING_MAX_PAYLOAD   max characters per serialized payload
+    TRACING_ENDPOINT      collector URL for http mode
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+import urllib.request
+import uuid
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FIELDS = (
+    "ticket_text",
+    "order_id",
+    "order_ids",
+    "issue_type",
+    "recommendation",
+    "needs_admin",
+    "admin_decision",
+    "admin_notes",
+    "reply_draft",
+)
+
+
+@dataclass
+class Span:
+    name: str
+    start: float
+    end: float = 0.0
+    input: Any = None
+    output: Any = None
+    error: Optional[str] = None
+
+
+@dataclass
+class Trace:
+    id: str
+    name: str
+    start: float
+    end: float = 0.0
+    input: Any = None
+    output: Any = None
+    error: Optional[str] = None
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    tags: List[str] = field(default_factory=list)
+    spans: List[Span] = field(default_factory=list)
+
+
+# Marks a request whose root call was not sampled, so nested calls skip too
+NOT_SAMPLED = object()
+_active: ContextVar[Any] = ContextVar("active_trace", default=None)
+
+
+def _default(obj: Any) -> Any:
+    dump = getattr(obj, "model_dump", None)
+    if callable(dump):
+        return dump()
+    return str(obj)
+
+
+def encode_payload(value: Any, max_chars: int) -> Any:
+    """Serialize a payload to JSON-safe data, truncating long payloads to a string."""
+    if value is None:
+        return None
+    text = json.dumps(value, default=_default)
+    if len(text) <= max_chars:
+        return json.loads(text)
+    return text[:max_chars] + "...[truncated]"
+
+
+def encode_trace(trace: Trace, max_chars: int) -> Dict[str, Any]:
+    return {
+        "id": trace.id,
+        "name": trace.name,
+        "start": trace.start,
+        "end": trace.end,
+        "input": encode_payload(trace.input, max_chars),
+        "output": encode_payload(trace.output, max_chars),
+        "error": trace.error,
+        "metadata": encode_payload(trace.metadata, max_chars),
+        "tags": trace.tags,
+        "spans": [
+            {
+                "name": s.name,
+                "start": s.start,
+                "end": s.end,
+                "input": encode_payload(s.input, max_chars),
+                "output": encode_payload(s.output, max_chars),
+                "error": s.error,
+            }
+            for s in trace.spans
+        ],
+    }
+
+
+class BatchExporter:
+    """
+    Hands finished traces to ``sink`` in batches from a daemon thread.
+
+    The queue is bounded; when it is full new traces are dropped and counted
+    rather than slowing down the request path.
+    """
+
+    def __init__(
+        self,
+        sink: Callable[[List[Dict[str, Any]]], None],
+        max_payload: int = 2000,
+        max_batch: int = 100,
+        flush_interval: float = 1.0,
+        max_queue: int = 10_000,
+    ):
+        self.sink = sink
+        self.max_payload = max_payload
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.exported = 0
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+        self._thread.start()
+
+    def submit(self, trace: Trace) -> None:
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """Block until everything submitted so far has been handed to the sink."""
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return
+        done.wait(timeout)
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            batch: List[Trace] = []
+            markers: List[threading.Event] = []
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if isinstance(item, threading.Event):
+                    markers.append(item)
+                    break
+                batch.append(item)
+                if len(batch) >= self.max_batch:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            if batch:
+                try:
+                    self.sink([encode_trace(t, self.max_payload) for t in batch])
+                    self.exported += len(batch)
+                except Exception:
+                    logger.exception("Failed to export %d traces", len(batch))
+            for marker in markers:
+                marker.set()
+
+
+class HttpSink:
+    """POST each batch as JSON to a collector endpoint."""
+
+    def __init__(self, url: str, timeout: float = 5.0):
+        self.url = url
+        self.timeout = timeout
+
+    def __call__(self, batch: List[Dict[str, Any]]) -> None:
+        req = urllib.request.Request(
+            self.url,
+            data=json.dumps({"traces": batch}).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+            resp.read()
+
+
+class LangfuseSink:
+    """Forward traces and spans to Langfuse with the low-level client."""
+
+    def __init__(self):
+        from langfuse import Langfuse
+
+        self.client = Langfuse()
+
+    def __call__(self, batch: List[Dict[str, Any]]) -> None:
+        from datetime import datetime, timezone
+
+        def ts(seconds: float) -> datetime:
+            return datetime.fromtimestamp(seconds, tz=timezone.utc)
+
+        for t in batch:
+            trace = self.client.trace(
+                id=t["id"],
+                name=t["name"],
+                input=t["input"],
+                output=t["output"],
+                metadata=t["metadata"],
+                tags=t["tags"],
+            )
+            for s in t["spans"]:
+                trace.span(
+                    name=s["name"],
+                    start_time=ts(s["start"]),
+                    end_time=ts(s["end"]),
+                    input=s["input"],
+                    output=s["output"],
+                    level="ERROR" if s["error"] else "DEFAULT",
+                    status_message=s["error"],
+                )
+        self.client.flush()
+
+
+class Tracer:
+    def __init__(
+        self,
+        exporter: Optional[BatchExporter] = None,
+        sample_rate: float = 1.0,
+        fields: Optional[Iterable[str]] = DEFAULT_FIELDS,
+    ):
+        self.exporter = exporter
+        self.enabled = exporter is not None and sample_rate > 0
+        self.sample_rate = sample_rate
+        self.fields = tuple(fields) if fields is not None else None
+
+    def should_sample(self) -> bool:
+        return self.enabled and (self.sample_rate >= 1.0 or random.random() < self.sample_rate)
+
+    def project(self, value: Any) -> Any:
+        """Keep only allowlisted fields of state-like dicts."""
+        if self.fields is None or not isinstance(value, dict):
+            return value
+        return {k: value[k] for k in self.fields if k in value}
+
+
+def _tracer_from_env() -> Tracer:
+    mode = os.getenv("TRACING_MODE") or ("langfuse" if os.getenv("LANGFUSE_PUBLIC_KEY") else "off")
+    if mode == "off":
+        return Tracer()
+
+    if mode == "langfuse":
+        sink: Callable[[List[Dict[str, Any]]], None] = LangfuseSink()
+    elif mode == "http":
+        sink = HttpSink(os.environ["TRACING_ENDPOINT"])
+    else:
+        raise ValueError(f"Unknown TRACING_MODE: {mode!r}")
+
+    fields = os.getenv("TRACING_FIELDS")
+    return Tracer(
+        exporter=BatchExporter(sink, max_payload=int(os.getenv("TRACING_MAX_PAYLOAD", "2000"))),
+        sample_rate=float(os.getenv("TRACING_SAMPLE_RATE", "1.0")),
+        fields=fields.split(",") if fields else DEFAULT_FIELDS,
+    )
+
+
+TRACER = _tracer_from_env()
+
+
+def configure_tracing(tracer: Tracer) -> Tracer:
+    """Install a tracer (e.g. one exporting to a test collector) and return the previous one."""
+    global TRACER
+    previous, TRACER = TRACER, tracer
+    return previous
+
+
+def update_current_trace(
+    name: Optional[str] = None,
+    input: Any = None,
+    output: Any = None,
+    metadata: Optional[Dict[str, Any]] = None,
+    tags: Optional[List[str]] = None,
+) -> None:
+    """Set fields on the active trace; a no-op when the request is not sampled."""
+    trace = _active.get()
+    if trace is None or trace is NOT_SAMPLED:
+        return
+    if name is not None:
+        trace.name = name
+    if input is not None:
+        trace.input = TRACER.project(input)
+    if output is not None:
+        trace.output = TRACER.project(output)
+    if metadata:
+        trace.metadata.update(metadata)
+    if tags:
+        trace.tags.extend(tags)
+
+
+def _first_arg(args: tuple, kwargs: dict) -> Any:
+    if args:
+        return args[0]
+    return next(iter(kwargs.values()), None)
+
+
+class _Call:
+    """Bookkeeping shared by the sync and async wrappers."""
+
+    __slots__ = ("tracer", "trace", "span", "token")
+
+    def __init__(self, name: str, args: tuple, kwargs: dict):
+        self.tracer = TRACER
+        self.token = None
+        self.span: Optional[Span] = None
+        self.trace = _active.get()
+
+        if self.trace is None:
+            if not self.tracer.should_sample():
+                self.trace = NOT_SAMPLED
+                self.token = _active.set(NOT_SAMPLED)
+                return
+            self.trace = Trace(id=uuid.uuid4().hex, name=name, start=time.time())
+            self.trace.input = self.tracer.project(_first_arg(args, kwargs))
+            self.token = _active.set(self.trace)
+        elif self.trace is not NOT_SAMPLED:
+            self.span = Span(name=name, start=time.time(), input=self.tracer.project(_first_arg(args, kwargs)))
+
+    def finish(self, result: Any = None, error: Optional[BaseException] = None) -> None:
+        if self.trace is NOT_SAMPLED:
+            if self.token is not None:
+                _active.reset(self.token)
+            return
+
+        message = f"{type(error).__name__}: {error}" if error is not None else None
+        if self.span is not None:
+            self.span.end = time.time()
+            self.span.output = self.tracer.project(result)
+            self.span.error = message
+            self.trace.spans.append(self.span)
+            return
+
+        _active.reset(self.token)
+        self.trace.end = time.time()
+        if self.trace.output is None:
+            self.trace.output = self.tracer.project(result)
+        self.trace.error = message
+        self.tracer.exporter.submit(self.trace)
+
+
+def observe(name: Optional[str] = None) -> Callable:
+    """
+    Trace calls to the decorated function.
+
+    The outermost call becomes a trace (if sampled) and nested observed calls
+    become its spans. Inputs and outputs are the first argument and the return
+    value, reduced to the tracer's field allowlist.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__name__
+
+        if asyncio.iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                if not TRACER.enabled:
+                    return await func(*args, **kwargs)
+                call = _Call(span_name, args, kwargs)
+                try:
+                    result = await func(*args, **kwargs)
+                except BaseException as e:
+                    call.finish(error=e)
+                    raise
+                call.finish(result)
+                return result
+
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not TRACER.enabled:
+                return func(*args, **kwargs)
+            call = _Call(span_name, args, kwargs)
+            try:
+                result = func(*args, **kwargs)
+            except BaseException as e:
+                call.finish(error=e)
+                raise
+            call.finish(result)
+            return result
+
+        return wrapper
+
+    return decorator
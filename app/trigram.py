@@ -0,0 +1,173 @@
+"""
+Trigram inverted index for ranked fuzzy search.
+
+Text is split into lowercase words, each word is padded as ``"  word "`` and
+cut into trigrams (the pg_trgm scheme), and two strings are scored by the
+Jaccard similarity of their trigram sets. "sara patle" and "sara patel"
+share 8 of 14 trigrams, so a typo still ranks the right customer first.
+
+Each distinct string is indexed once, however many items carry it, so a
+catalog with millions of orders but a far smaller vocabulary of names,
+products and SKUs stays small. A search only looks at the posting lists of
+the rarest query trigrams: a string with similarity >= threshold must
+share at least ceil(threshold * |query|) trigrams with the query, so it
+must contain one of the |query| - that + 1 rarest. Those candidates are
+then scored exactly.
+"""
+from __future__ import annotations
+
+import heapq
+import math
+import re
+from array import array
+from itertools import groupby, islice
+from typing import Callable, Dict, FrozenSet, Iterable, Iterator, List, Tuple
+
+WORD_REGEX = re.compile(r"[a-z0-9]+")
+DEFAULT_THRESHOLD = 0.3
+DEFAULT_LIMIT = 10
+
+
+def normalize(text: str) -> str:
+    return " ".join(WORD_REGEX.findall(text.lower()))
+
+
+def trigrams(text: str) -> FrozenSet[str]:
+    """Trigrams of already normalized text."""
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+def query_grams(query: str, threshold: float) -> FrozenSet[str]:
+    if not 0 < threshold <= 1:
+        raise ValueError("threshold must be in (0, 1]")
+    return trigrams(normalize(query or ""))
+
+
+def probe_grams(grams: FrozenSet[str], threshold: float, posting_size: Callable[[str], int]) -> List[str]:
+    """The rarest query trigrams; every string at or above threshold holds one."""
+    need = max(1, math.ceil(threshold * len(grams) - 1e-9))
+    return sorted(grams, key=posting_size)[: len(grams) - need + 1]
+
+
+def size_bounds(count: int, threshold: float) -> Tuple[float, float]:
+    """Trigram counts a string can have and still reach threshold against ``count``."""
+    return threshold * count, count / threshold
+
+
+def similarity(grams: FrozenSet[str], doc_grams: FrozenSet[str], threshold: float) -> float:
+    """Jaccard similarity of two trigram sets, or 0.0 below threshold."""
+    size = len(doc_grams)
+    # Jaccard can be at most min/max of the two set sizes
+    if min(size, len(grams)) < threshold * max(size, len(grams)):
+        return 0.0
+    overlap = len(grams & doc_grams)
+    score = overlap / (len(grams) + size - overlap)
+    return score if score >= threshold else 0.0
+
+
+def rank(
+    matches: Iterable[Tuple[float, int]],
+    items: Callable[[List[int], int], Iterable[int]],
+    limit: int,
+) -> List[Tuple[int, float]]:
+    """
+    Turn (score, doc) matches into up to ``limit`` (item, score) pairs, best
+    score first. ``items(docs, n)`` yields at least the first n distinct
+    items of the docs in ascending order; repeats are skipped.
+    """
+    ordered = sorted(matches, key=lambda m: -m[0])
+    seen = set()
+
+    def ranked() -> Iterator[Tuple[int, float]]:
+        for score, group in groupby(ordered, key=lambda m: m[0]):
+            for item in items([doc for _, doc in group], limit + len(seen)):
+                if item not in seen:
+                    seen.add(item)
+                    yield item, round(score, 4)
+
+    return list(islice(ranked(), limit))
+
+
+class TrigramIndex:
+    """
+    Maps strings to integer items (e.g. catalog positions) for fuzzy lookup.
+
+    Items must be added in ascending order, which is how OrderRepository
+    assigns positions; results then come back in that order within a score.
+    """
+
+    def __init__(self) -> None:
+        self._doc_ids: Dict[str, int] = {}
+        self._grams: List[FrozenSet[str]] = []
+        self._items: List[array] = []
+        self._postings: Dict[str, array] = {}
+
+    def __len__(self) -> int:
+        """Number of distinct strings indexed."""
+        return len(self._grams)
+
+    def add(self, text: str, item: int) -> None:
+        # Raw strings are keys too, so repeats skip normalization. A raw key
+        # can only equal a normalized one when normalizing leaves it as is.
+        doc = self._doc_ids.get(text)
+        if doc is None:
+            key = normalize(text or "")
+            if not key:
+                return
+            doc = self._doc_ids.get(key)
+            if doc is not None:
+                self._doc_ids[text] = doc
+        if doc is None:
+            doc = len(self._grams)
+            grams = trigrams(key)
+            self._doc_ids[key] = self._doc_ids[text] = doc
+            self._grams.append(grams)
+            self._items.append(array("q"))
+            for gram in grams:
+                postings = self._postings.get(gram)
+                if postings is None:
+                    postings = self._postings[gram] = array("q")
+                postings.append(doc)
+        items = self._items[doc]
+        if not items or items[-1] != item:
+            items.append(item)
+
+    def docs(self) -> Iterator[Tuple[FrozenSet[str], array]]:
+        """(trigrams, items) of each indexed string, in the order they were added."""
+        return zip(self._grams, self._items)
+
+    def _matches(self, grams: FrozenSet[str], threshold: float) -> List[Tuple[float, int]]:
+        """(score, doc) for every indexed string at or above threshold."""
+        candidates = set()
+        for gram in probe_grams(grams, threshold, lambda g: len(self._postings.get(g, ()))):
+            candidates.update(self._postings.get(gram, ()))
+
+        matches = []
+        for doc in candidates:
+            score = similarity(grams, self._grams[doc], threshold)
+            if score:
+                matches.append((score, doc))
+        return matches
+
+    def _doc_items(self, docs: List[int], n: int) -> Iterator[int]:
+        return heapq.merge(*(self._items[doc] for doc in docs))
+
+    def search(
+        self,
+        query: str,
+        threshold: float = DEFAULT_THRESHOLD,
+        limit: int = DEFAULT_LIMIT,
+    ) -> List[Tuple[int, float]]:
+        """
+        Up to ``limit`` (item, score) pairs, best score first and ascending
+        item order within a score. An item matched by several strings keeps
+        its best score.
+        """
+        grams = query_grams(query, threshold)
+        if not grams or limit <= 0:
+            return []
+        return rank(self._matches(grams, threshold), self._doc_items, limit)
@@ -0,0 +1,108 @@
+"""
+Import-time budget for cold starts.
+
+Imports a module in a fresh interpreter with ``-X importtime`` and reports its
+cumulative import time (best of --runs) and the slowest top-level packages
+it pulled in. Exits non-zero when the time exceeds --budget or when any
+--forbid module was imported, so slow imports creeping back into the
+startup path fail CI.
+
+    python -m benchmarks.importtime app.main --budget 1.5 --forbid langgraph,langfuse
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Any, Dict, List, Optional, Sequence
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Seconds. Roughly 2x the measured cold import of app.main, which is dominated
+# by FastAPI/pydantic; LangGraph and the data files load at startup instead.
+DEFAULT_BUDGETS = {"app.main": 1.5}
+HEAVY_MODULES = ("langgraph", "langchain_core.tools", "langfuse")
+
+
+def parse_importtime(stderr: str) -> Dict[str, Dict[str, float]]:
+    """Map module -> self/cumulative seconds from ``-X importtime`` output."""
+    timings: Dict[str, Dict[str, float]] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        timings[name.strip()] = {"self": int(self_us) / 1e6, "cumulative": int(cumulative_us) / 1e6}
+    return timings
+
+
+def measure_once(module: str) -> Dict[str, Any]:
+    code = f"import sys, json, {module}; print(json.dumps(sorted(sys.modules)))"
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        env={**os.environ, "PYTHONPATH": ROOT},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    timings = parse_importtime(proc.stderr)
+    return {
+        "seconds": timings[module]["cumulative"],
+        "timings": timings,
+        "modules": json.loads(proc.stdout.strip().splitlines()[-1]),
+    }
+
+
+def measure(module: str, runs: int = 3, top: int = 10) -> Dict[str, Any]:
+    """Best-of-``runs`` cumulative import time plus the slowest top-level packages."""
+    samples = [measure_once(module) for _ in range(runs)]
+    best = min(samples, key=lambda s: s["seconds"])
+    packages: Dict[str, float] = {}
+    for name, t in best["timings"].items():
+        root = name.split(".")[0]
+        packages[root] = packages.get(root, 0.0) + t["self"]
+    slowest = sorted(packages.items(), key=lambda kv: kv[1], reverse=True)[:top]
+    return {
+        "module": module,
+        "seconds": best["seconds"],
+        "samples": [s["seconds"] for s in samples],
+        "slowest_packages": [{"package": name, "seconds": secs} for name, secs in slowest],
+        "modules": best["modules"],
+    }
+
+
+def imported(modules: Sequence[str], forbidden: Sequence[str]) -> List[str]:
+    """Forbidden modules (or their submodules) that appear in ``modules``."""
+    return sorted({f for f in forbidden for m in modules if m == f or m.startswith(f + ".")})
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.importtime", description="Check cold import time.")
+    parser.add_argument("module", nargs="?", default="app.main")
+    parser.add_argument("--budget", type=float, help="max cumulative import seconds (default: DEFAULT_BUDGETS)")
+    parser.add_argument("--forbid", default=",".join(HEAVY_MODULES), help="comma-separated modules that must not be imported")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    result = measure(args.module, args.runs)
+    budget = args.budget if args.budget is not None else DEFAULT_BUDGETS.get(args.module)
+    forbidden = imported(result["modules"], [m for m in args.forbid.split(",") if m])
+
+    report = {k: v for k, v in result.items() if k != "modules"}
+    report.update({"budget": budget, "forbidden_imported": forbidden})
+    print(json.dumps(report, indent=2))
+
+    failed = False
+    if budget is not None and result["seconds"] > budget:
+        print(f"IMPORT BUDGET EXCEEDED {args.module}: {result['seconds']:.3f}s > {budget:.3f}s", file=sys.stderr)
+        failed = True
+    for name in forbidden:
+        print(f"FORBIDDEN IMPORT {args.module} pulls in {name}", file=sys.stderr)
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
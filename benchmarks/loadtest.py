@@ -0,0 +1,226 @@
+"""
+HTTP load test for the FastAPI app.
+
+Starts ``app.main:app`` under uvicorn with N workers (or targets --url), then
+drives each endpoint with an async client at stepped concurrency levels and
+reports throughput and p50/p95/p99 latency per level, plus the level where
+latency bends: the first step that adds less than --knee-gain throughput.
+Runs fully offline; tracing is switched off in the server it starts.
+
+    python -m benchmarks.loadtest --workers 4 --levels 1,4,16,64 --duration 10 --out load.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import httpx
+
+from .run import summarize
+from .synthetic import TICKET_TEMPLATES
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    path: str
+    # Builds request kwargs (params/json) for the i-th request
+    make: Callable[[int], Dict[str, Any]]
+
+
+def default_scenarios(order_ids: Sequence[str] = ("ORD1001", "ORD1002", "ORD1004", "ORD1007")) -> List[Scenario]:
+    keywords = ["refund", "damaged", "late", "missing", "charged twice", "wrong item", "not working"]
+
+    def ticket(i: int) -> str:
+        return TICKET_TEMPLATES[i % len(TICKET_TEMPLATES)].format(
+            order_id=order_ids[i % len(order_ids)],
+            keyword=keywords[i % len(keywords)],
+            product="headphones",
+            name="Sara Patel",
+        )
+
+    return [
+        Scenario("triage_invoke", "POST", "/triage/invoke", lambda i: {"json": {"ticket_text": ticket(i), "messages": []}}),
+        Scenario("orders_get", "GET", "/orders/get", lambda i: {"params": {"order_id": order_ids[i % len(order_ids)]}}),
+        Scenario("orders_search", "GET", "/orders/search", lambda i: {"params": {"q": "hi, this is Sara Patel"}}),
+        Scenario("classify_issue", "POST", "/classify/issue", lambda i: {"json": {"ticket_text": ticket(i)}}),
+    ]
+
+
+async def run_level(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    concurrency: int,
+    duration: float,
+    max_requests: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Keep ``concurrency`` requests in flight for ``duration`` seconds (or max_requests)."""
+    latencies: List[float] = []
+    errors = 0
+    counter = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker() -> None:
+        nonlocal errors, counter
+        while time.perf_counter() < deadline and (max_requests is None or counter < max_requests):
+            i = counter
+            counter += 1
+            start = time.perf_counter()
+            try:
+                resp = await client.request(scenario.method, scenario.path, **scenario.make(i))
+                ok = resp.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            if not ok:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    stats = summarize(latencies)
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "elapsed": elapsed,
+        "throughput": len(latencies) / elapsed if elapsed else 0.0,
+        "p50": stats["p50"],
+        "p95": stats["p95"],
+        "p99": stats["p99"],
+        "mean": stats["mean"],
+    }
+
+
+def find_knee(levels: List[Dict[str, Any]], min_gain: float = 0.1) -> Optional[int]:
+    """
+    Return the first concurrency level whose throughput is less than
+    ``min_gain`` above the previous level's, i.e. where added load only
+    buys queueing latency.
+    """
+    for prev, cur in zip(levels, levels[1:]):
+        if prev["throughput"] and cur["throughput"] < prev["throughput"] * (1 + min_gain):
+            return cur["concurrency"]
+    return None
+
+
+async def sweep(
+    client: httpx.AsyncClient,
+    scenarios: Sequence[Scenario],
+    levels: Sequence[int],
+    duration: float,
+    max_requests: Optional[int] = None,
+    knee_gain: float = 0.1,
+) -> Dict[str, Any]:
+    report: Dict[str, Any] = {}
+    for scenario in scenarios:
+        # One untimed request so connection setup and first-call work are excluded
+        await client.request(scenario.method, scenario.path, **scenario.make(0))
+        results = [await run_level(client, scenario, c, duration, max_requests) for c in levels]
+        report[scenario.name] = {"levels": results, "knee": find_knee(results, knee_gain)}
+    return report
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(workers: int, port: int, env: Optional[Dict[str, str]] = None, timeout: float = 30.0) -> subprocess.Popen:
+    """Start uvicorn with tracing disabled and wait until /health answers."""
+    server_env = {k: v for k, v in os.environ.items() if not k.startswith("LANGFUSE_")}
+    server_env.update({"TRACING_MODE": "off", "PYTHONPATH": ROOT})
+    server_env.update(env or {})
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=ROOT,
+        env=server_env,
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with code {proc.returncode}")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                return proc
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("uvicorn did not become healthy in time")
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    lines = []
+    for name, data in report.items():
+        lines.append(f"{name} (knee: {data['knee'] or 'none'})")
+        lines.append(f"  {'conc':>5} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+        for lvl in data["levels"]:
+            lines.append(
+                f"  {lvl['concurrency']:>5} {lvl['throughput']:>9.1f} {lvl['p50'] * 1000:>8.2f} "
+                f"{lvl['p95'] * 1000:>8.2f} {lvl['p99'] * 1000:>8.2f} {lvl['errors']:>7}"
+            )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.loadtest", description="Concurrency sweep against the API.")
+    parser.add_argument("--url", help="target an already running server instead of starting one")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the started server")
+    parser.add_argument("--levels", default="1,2,4,8,16,32", help="comma-separated concurrency levels")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per level")
+    parser.add_argument("--endpoints", help="comma-separated subset of: triage_invoke,orders_get,orders_search,classify_issue")
+    parser.add_argument("--knee-gain", type=float, default=0.1, help="min throughput gain per step before calling it the knee")
+    parser.add_argument("--out", help="write the JSON report here")
+    args = parser.parse_args(argv)
+
+    levels = [int(x) for x in args.levels.split(",")]
+    scenarios = default_scenarios()
+    if args.endpoints:
+        wanted = set(args.endpoints.split(","))
+        scenarios = [s for s in scenarios if s.name in wanted]
+
+    proc = None
+    base_url = args.url
+    if not base_url:
+        port = free_port()
+        proc = start_server(args.workers, port)
+        base_url = f"http://127.0.0.1:{port}"
+
+    async def run() -> Dict[str, Any]:
+        limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+            return await sweep(client, scenarios, levels, args.duration, knee_gain=args.knee_gain)
+
+    try:
+        report = asyncio.run(run())
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+    result = {"meta": {"url": base_url, "workers": None if args.url else args.workers, "levels": levels,
+                       "duration": args.duration}, "endpoints": report}
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+    print(format_report(report))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
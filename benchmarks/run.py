@@ -0,0 +1,244 @@
+"""
+In-process benchmark suite.
+
+Generates a synthetic data set, loads it into the data registry and times
+each graph node, the full graph on both engines, reply rendering, keyword
+matching, order lookups, fuzzy order search, and API request validation and
+response encoding at a given message history length. Results are written as
+JSON and can be compared against a stored baseline; the command exits
+non-zero when any benchmark regresses by more than the tolerance.
+
+    python -m benchmarks.run --orders 100000 --keywords 5000 --tickets 2000 \\
+        --out bench.json --baseline benchmarks/baseline.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from langchain_core.messages import ToolMessage
+
+from app import graph as nodes
+from app.registry import REGISTRY
+from app.templates import render_many, render_reply
+from app.tools import fetch_order
+
+from .synthetic import generate_tickets, write_dataset
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[idx]
+
+
+def summarize(timings: List[float]) -> Dict[str, float]:
+    ordered = sorted(timings)
+    total = sum(ordered)
+    return {
+        "n": len(ordered),
+        "mean": total / len(ordered) if ordered else 0.0,
+        "p50": percentile(ordered, 0.50),
+        "p95": percentile(ordered, 0.95),
+        "p99": percentile(ordered, 0.99),
+        "total": total,
+        "ops_per_sec": len(ordered) / total if total else 0.0,
+    }
+
+
+def time_calls(fn: Callable[[Any], Any], inputs: Sequence[Any], warmup: int = 10) -> Dict[str, float]:
+    """Call fn once per input and summarize per-call wall time in seconds."""
+    for item in inputs[:warmup]:
+        fn(item)
+    clock = time.perf_counter
+    timings = []
+    for item in inputs:
+        start = clock()
+        fn(item)
+        timings.append(clock() - start)
+    return summarize(timings)
+
+
+def run_benchmarks(
+    orders: int = 1000,
+    keywords: int = 1000,
+    tickets: int = 500,
+    seed: int = 0,
+    catalog: bool = False,
+    workdir: Optional[str] = None,
+    history: int = 100,
+) -> Dict[str, Any]:
+    """Run every benchmark against a fresh synthetic data set and return the results."""
+    previous = (REGISTRY.data_dir, REGISTRY.catalog_path)
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        start = time.perf_counter()
+        dataset = write_dataset(tmp, orders, keywords, seed=seed, catalog=catalog)
+        generate_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        REGISTRY.use(**dataset)
+        load_seconds = time.perf_counter() - start
+        try:
+            results = _run(tickets, orders, seed)
+            results["benchmarks"].update(_run_api(history, tickets))
+        finally:
+            REGISTRY.use(*previous)
+
+    results["meta"] = {
+        "orders": orders,
+        "keywords": keywords,
+        "tickets": tickets,
+        "seed": seed,
+        "catalog": catalog,
+        "history": history,
+        "generate_seconds": generate_seconds,
+        "load_seconds": load_seconds,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }
+    return results
+
+
+def _run(ticket_count: int, order_count: int, seed: int) -> Dict[str, Any]:
+    snapshot = REGISTRY.current
+    tickets = list(generate_tickets(ticket_count, order_count, snapshot.issues, seed=seed))
+    order_ids = [t["order_id"] for t in tickets]
+    payloads = [fetch_order.invoke({"order_id": order_id}) for order_id in order_ids]
+    issue_types = [snapshot.issue_matcher.classify(t["ticket_text"]) or "other" for t in tickets]
+    # Evidence only holds projected fields, so take full records from the repository
+    found_orders = [snapshot.orders.get(p["order"]["order_id"]) for p in payloads if p.get("found")]
+
+    tool_messages = [
+        {"messages": [ToolMessage(content=json.dumps(p), name="fetch_order", tool_call_id="call_fetch_order_1")]}
+        for p in payloads
+    ]
+    evidence_states = [
+        {"issue_type": issue_type, "evidence": {"order": p}, "admin_decision": "approve"}
+        for issue_type, p in zip(issue_types, payloads)
+    ]
+    graph = nodes.build_graph()
+    direct = nodes.DirectGraph()
+
+    b: Dict[str, Dict[str, float]] = {}
+    b["node.ingest"] = time_calls(nodes.ingest, [dict(t) for t in tickets])
+    b["node.classify_issue"] = time_calls(nodes.classify_issue, [{"ticket_text": t["ticket_text"]} for t in tickets])
+    b["node.request_fetch_order"] = time_calls(nodes.request_fetch_order, [{"order_id": o} for o in order_ids])
+    b["node.fetch_order"] = time_calls(fetch_order.invoke, [{"order_id": o} for o in order_ids])
+    b["node.store_order_evidence"] = time_calls(nodes.store_order_evidence, tool_messages)
+    b["node.propose_recommendation"] = time_calls(nodes.propose_recommendation, evidence_states)
+    b["node.admin_review"] = time_calls(nodes.admin_review, [{"admin_decision": "approve", "admin_notes": "ok"}] * len(tickets))
+    b["node.draft_reply"] = time_calls(nodes.draft_reply, evidence_states)
+    b["graph.invoke"] = time_calls(graph.invoke, [dict(t) for t in tickets])
+    # Same nodes and routes as plain calls; the difference is LangGraph's overhead
+    b["graph.invoke_direct"] = time_calls(direct.invoke, [dict(t) for t in tickets])
+
+    b["matcher.classify"] = time_calls(snapshot.issue_matcher.classify, [t["ticket_text"] for t in tickets])
+    pairs = list(zip(issue_types, found_orders))
+    b["templates.render_reply"] = time_calls(lambda pair: render_reply(*pair), pairs)
+    b["templates.render_many"] = time_calls(lambda batch: render_many(batch), [pairs])
+    b["templates.render_many"]["per_item_mean"] = b["templates.render_many"]["mean"] / max(1, len(pairs))
+
+    repo = snapshot.orders
+    b["orders.get"] = time_calls(repo.get, order_ids)
+    b["orders.find_by_email"] = time_calls(repo.find_by_email, [o["email"] for o in found_orders])
+    b["orders.search_q"] = time_calls(
+        lambda q: repo.search(q=q), [f"this is {o['customer_name']} about my order" for o in found_orders]
+    )
+    # Names with the last two letters swapped, as a customer might mistype them
+    b["orders.fuzzy_search"] = time_calls(
+        repo.fuzzy_search, [o["customer_name"][:-2] + o["customer_name"][:-3:-1] for o in found_orders]
+    )
+    return {"benchmarks": b}
+
+
+def _run_api(history: int, repeats: int) -> Dict[str, Dict[str, float]]:
+    """
+    Request validation and response encoding for a ticket with ``history``
+    prior messages. The ``*_before`` entries time the paths the API used
+    previously (model_dump, jsonable_encoder + json.dumps) for comparison.
+    """
+    from fastapi.encoders import jsonable_encoder
+
+    from app.main import TriageInput, to_state
+    from app.responses import dumps
+
+    messages = [
+        {"type": "human" if i % 2 == 0 else "ai", "content": f"Message {i} about order ORD1001, still waiting."}
+        for i in range(history)
+    ]
+    payload = {"ticket_text": "I'd like a refund for order ORD1001.", "messages": messages, "admin_decision": "approve"}
+    body = TriageInput.model_validate(payload)
+    result = nodes.build_graph().invoke(to_state(body))
+
+    b: Dict[str, Dict[str, float]] = {}
+    b["api.validate"] = time_calls(TriageInput.model_validate, [payload] * repeats)
+    b["api.state"] = time_calls(to_state, [body] * repeats)
+    b["api.state_before"] = time_calls(lambda m: m.model_dump(), [body] * repeats)
+    b["api.encode"] = time_calls(dumps, [result] * repeats)
+    b["api.encode_before"] = time_calls(lambda r: json.dumps(jsonable_encoder(r)).encode("utf-8"), [result] * repeats)
+    return b
+
+
+def compare(
+    results: Dict[str, Any],
+    baseline: Dict[str, Any],
+    tolerance: float = 0.25,
+    metric: str = "mean",
+) -> List[Dict[str, Any]]:
+    """Return the benchmarks whose metric is more than ``tolerance`` slower than the baseline."""
+    regressions = []
+    for name, stats in results["benchmarks"].items():
+        base = baseline.get("benchmarks", {}).get(name)
+        if not base or not base.get(metric):
+            continue
+        ratio = stats[metric] / base[metric]
+        if ratio > 1 + tolerance:
+            regressions.append({"name": name, "metric": metric, "baseline": base[metric], "current": stats[metric], "ratio": ratio})
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description="Run the in-process benchmark suite.")
+    parser.add_argument("--orders", type=int, default=1000, help="synthetic catalog size")
+    parser.add_argument("--keywords", type=int, default=1000, help="rows in the synthetic keyword table")
+    parser.add_argument("--tickets", type=int, default=500, help="tickets timed per benchmark")
+    parser.add_argument("--history", type=int, default=100, help="prior messages per request in the api.* benchmarks")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--catalog", action="store_true", help="serve orders from a SQLite catalog (use for large --orders)")
+    parser.add_argument("--workdir", help="where to write the synthetic data set (default: system temp dir)")
+    parser.add_argument("--out", help="write results JSON here (default: stdout)")
+    parser.add_argument("--baseline", help="baseline results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown vs baseline, e.g. 0.25 = 25%%")
+    parser.add_argument("--metric", default="mean", choices=["mean", "p50", "p95", "p99"])
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.orders, args.keywords, args.tickets, args.seed, args.catalog, args.workdir, args.history)
+
+    regressions: List[Dict[str, Any]] = []
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance, args.metric)
+        results["regressions"] = regressions
+
+    text = json.dumps(results, indent=2)
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    for r in regressions:
+        print(f"REGRESSION {r['name']}: {r['metric']} {r['current']:.6f}s vs {r['baseline']:.6f}s ({r['ratio']:.2f}x)", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+"""
+Synthetic data sets for benchmarks.
+
+Generators are deterministic for a given seed and yield records lazily, so
+large catalogs can be streamed straight to disk or into a SQLite catalog
+without holding them in memory.
+"""
+from __future__ import annotations
+
+import json
+import os
+import random
+import string
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from app.catalog import build_catalog
+
+FIRST_NAMES = [
+    "Ava", "David", "Sara", "John", "Emily", "Carlos", "Priya", "Marcus", "Noah", "Lina", "Owen", "Maya",
+    "Liam", "Zoe", "Ethan", "Chloe", "Mateo", "Aisha", "Kenji", "Fatima", "Lucas", "Ingrid", "Omar", "Nora",
+]
+LAST_NAMES = [
+    "Chen", "Lee", "Patel", "Smith", "Rivera", "Gomez", "Iyer", "Allen", "Kim", "Alvarez", "Hart", "Gupta",
+    "Novak", "Okafor", "Tanaka", "Haddad", "Silva", "Berg", "Rossi", "Nguyen", "Murphy", "Kowalski",
+]
+PRODUCTS = [
+    "Wireless Mouse", "Bluetooth Speaker", "Noise Cancelling Headphones", "Smart Watch", "Laptop Sleeve",
+    "Wireless Charger", "USB-C Hub", "Mechanical Keyboard", "Webcam Pro", "Portable SSD 1TB", "4K Monitor",
+    "Ergonomic Chair", "Desk Lamp", "Phone Stand", "Gaming Headset", "Fitness Tracker",
+]
+STATUSES = ["delivered", "shipped", "processing", "cancelled"]
+
+# The real keyword table comes first so synthetic tickets still classify
+BASE_ISSUES = [
+    {"keyword": "refund", "issue_type": "refund_request"},
+    {"keyword": "broken", "issue_type": "damaged_item"},
+    {"keyword": "damaged", "issue_type": "damaged_item"},
+    {"keyword": "late", "issue_type": "late_delivery"},
+    {"keyword": "not arrived", "issue_type": "late_delivery"},
+    {"keyword": "missing", "issue_type": "missing_item"},
+    {"keyword": "double charge", "issue_type": "duplicate_charge"},
+    {"keyword": "charged twice", "issue_type": "duplicate_charge"},
+    {"keyword": "wrong item", "issue_type": "wrong_item"},
+    {"keyword": "not working", "issue_type": "defective_product"},
+]
+ISSUE_TYPES = sorted({row["issue_type"] for row in BASE_ISSUES})
+
+TICKET_TEMPLATES = [
+    "Hi, my order {order_id} is {keyword}. Can you help?",
+    "I'm writing about {order_id}: the {product} arrived {keyword} and I am not happy.",
+    "{keyword} again!! order {order_id}, {product}. Please sort this out.",
+    "Hello team, this is {name}. The {product} from {order_id} - {keyword}. Thanks.",
+]
+
+
+def order_id_for(index: int) -> str:
+    return f"ORD{1000 + index}"
+
+
+def generate_orders(count: int, seed: int = 0) -> Iterator[Dict[str, Any]]:
+    rng = random.Random(seed)
+    for i in range(count):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        status = rng.choice(STATUSES)
+        items = []
+        for _ in range(rng.randint(1, 3)):
+            product = rng.choice(PRODUCTS)
+            items.append(
+                {
+                    "sku": f"SKU-{PRODUCTS.index(product):03d}-{rng.choice(string.ascii_uppercase)}",
+                    "name": product,
+                    "quantity": rng.randint(1, 3),
+                }
+            )
+        yield {
+            "order_id": order_id_for(i),
+            "customer_name": f"{first} {last}",
+            "email": f"{first.lower()}.{last.lower()}{i}@example.com",
+            "items": items,
+            "order_date": f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "status": status,
+            "delivery_date": None if status != "delivered" else f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "total_amount": round(rng.uniform(5, 500), 2),
+            "currency": "USD",
+        }
+
+
+def generate_issues(keyword_count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """The base keyword table padded with random keywords up to keyword_count rows."""
+    rng = random.Random(seed)
+    rows = list(BASE_ISSUES)
+    seen = {row["keyword"] for row in rows}
+    while len(rows) < keyword_count:
+        words = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 9))) for _ in range(rng.randint(1, 2))]
+        keyword = " ".join(words)
+        if keyword not in seen:
+            seen.add(keyword)
+            rows.append({"keyword": keyword, "issue_type": rng.choice(ISSUE_TYPES)})
+    return rows
+
+
+def generate_replies() -> List[Dict[str, Any]]:
+    return [
+        {
+            "issue_type": issue_type,
+            "template": (
+                "Hi {{customer_name}}, thanks for contacting us about order {{order_id}} "
+                f"({issue_type.replace('_', ' ')}). Current status: {{{{status}}}}. Items: {{{{items}}}}."
+            ),
+        }
+        for issue_type in ISSUE_TYPES
+    ]
+
+
+def generate_tickets(
+    count: int,
+    order_count: int,
+    issues: Optional[List[Dict[str, Any]]] = None,
+    seed: int = 0,
+) -> Iterator[Dict[str, Any]]:
+    """Triage input states that mention a random order and keyword."""
+    rng = random.Random(seed)
+    keywords = [row["keyword"] for row in (issues or BASE_ISSUES)]
+    for _ in range(count):
+        order_id = order_id_for(rng.randrange(order_count))
+        text = rng.choice(TICKET_TEMPLATES).format(
+            order_id=order_id,
+            keyword=rng.choice(keywords[: len(BASE_ISSUES)] if rng.random() < 0.8 else keywords),
+            product=rng.choice(PRODUCTS).lower(),
+            name=f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+        )
+        # Ids past ORD9999 are not picked up by the ticket regex, so pass them explicitly
+        yield {"ticket_text": text, "order_id": order_id, "messages": []}
+
+
+def write_json_array(path: str, records: Iterable[Dict[str, Any]]) -> int:
+    """Stream records to a JSON array file and return how many were written."""
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[")
+        for record in records:
+            if count:
+                f.write(",")
+            f.write(json.dumps(record, separators=(",", ":")))
+            count += 1
+        f.write("]")
+    return count
+
+
+def write_dataset(
+    directory: str,
+    order_count: int,
+    keyword_count: int,
+    seed: int = 0,
+    catalog: bool = False,
+) -> Dict[str, Any]:
+    """
+    Write issues.json, replies.json and either orders.json or an orders.db
+    SQLite catalog into ``directory``. Returns the paths for DataRegistry.use.
+    """
+    os.makedirs(directory, exist_ok=True)
+    write_json_array(os.path.join(directory, "issues.json"), generate_issues(keyword_count, seed))
+    write_json_array(os.path.join(directory, "replies.json"), generate_replies())
+
+    catalog_path = None
+    if catalog:
+        catalog_path = os.path.join(directory, "orders.db")
+        build_catalog(generate_orders(order_count, seed), catalog_path)
+    else:
+        write_json_array(os.path.join(directory, "orders.json"), generate_orders(order_count, seed))
+    return {"data_dir": directory, "catalog_path": catalog_path}
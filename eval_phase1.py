@@ -1,17 +1,39 @@
+"""
+Evaluate the triage graph against the conversations in interactions/.
+
+Conversations run concurrently on a thread pool and are scored locally
+(issue_type_match, order_id_match, reply_template_match) with per-conversation
+latency. The run writes a JSON and an HTML report and exits non-zero when any
+metric's accuracy is below --min-accuracy or p95 latency is above --max-p95.
+Scores are only sent to Langfuse with --upload, in one batch after the run.
+
+    python eval_phase1.py --workers 8 --out reports/eval.json --html reports/eval.html
+"""
+import argparse
+import html
 import json
 import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
 
 from dotenv import load_dotenv
-from langfuse import Langfuse
 
-from app.graph import build_graph
+from app.graph import build_graph, make_checkpointer, resume_with_decision, thread_config
+from app.registry import REGISTRY
+from app.templates import render_reply
+from benchmarks.run import summarize
 
 
 load_dotenv()
 
 ROOT = os.path.abspath(os.path.dirname(__file__))
 INTERACTIONS_DIR = os.path.join(ROOT, "interactions")
-MOCK_DATA_DIR = os.path.join(ROOT, "mock_data")
+
+METRICS = ("issue_type_match", "order_id_match", "reply_template_match")
+DEFAULT_MIN_ACCURACY = float(os.getenv("EVAL_MIN_ACCURACY", "1.0"))
+DEFAULT_MAX_P95 = float(os.getenv("EVAL_MAX_P95", "0.5"))
 
 
 def load_json(directory: str, name: str):
@@ -19,90 +41,209 @@ def load_json(directory: str, name: str):
     with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
 
-demos = load_json(INTERACTIONS_DIR, "phase1_demo.json")
-orders = load_json(MOCK_DATA_DIR, "orders.json")
-replies = load_json(MOCK_DATA_DIR, "replies.json")
 
+def load_conversations(directory: str = INTERACTIONS_DIR) -> List[Dict[str, Any]]:
+    conversations = []
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(".json"):
+            conversations.extend(load_json(directory, name))
+    return conversations
 
-ORDERS_BY_ID = {o["order_id"]: o for o in orders}
-TEMPLATES = {r["issue_type"]: r["template"] for r in replies}
 
+EXPECTED_REPLY_DEFAULTS = {"customer_name": "Customer", "order_id": ""}
 
-def render_reply(issue_type: str, order: dict) -> str:
-    template = TEMPLATES.get(issue_type)
-    if not template:
-        return ""
-    return (
-        template.replace("{{customer_name}}", order.get("customer_name", "Customer"))
-        .replace("{{order_id}}", order.get("order_id", ""))
-        .strip()
-    )
 
+def expected_reply_for(issue_type: str, order: dict) -> str:
+    return render_reply(issue_type, order, fallback="", defaults=EXPECTED_REPLY_DEFAULTS).strip()
 
-langfuse = Langfuse()
-graph = build_graph()
 
-for demo in demos:
+def evaluate_conversation(graph, demo: Dict[str, Any], thread_id: str) -> Dict[str, Any]:
     conversation_id = demo.get("conversation_id")
     expected = demo.get("expected_outcome", {})
     turns = demo.get("turns", [])
+    record: Dict[str, Any] = {"conversation_id": conversation_id, "thread_id": thread_id}
 
     if not turns:
-        print(f"{conversation_id} skipped, no turns found")
-        continue
-
-    first_user_message = turns[0].get("message", "")
+        record["skipped"] = "no turns found"
+        return record
 
     initial_state = {
-        "ticket_text": first_user_message,
+        "ticket_text": turns[0].get("message", ""),
         "messages": [],
     }
-
-    result_1 = graph.invoke(initial_state)
-
-    result_2 = graph.invoke(
-        {
-            **result_1,
-            "admin_decision": "approve",
-            "admin_notes": "ok",
-        }
-    )
+    record["input"] = initial_state
+
+    start = time.perf_counter()
+    try:
+        # Turn 1 pauses before admin_review; turn 2 resumes only admin_review -> draft_reply
+        graph.invoke(initial_state, thread_config(thread_id))
+        result = resume_with_decision(graph, thread_id, "approve", "ok")
+    except Exception as e:
+        record["latency"] = time.perf_counter() - start
+        record["error"] = f"{type(e).__name__}: {e}"
+        record.update({name: 0 for name in METRICS})
+        return record
+    record["latency"] = time.perf_counter() - start
 
     expected_issue_type = expected.get("issue_type")
     expected_order_id = expected.get("order_id")
+    expected_order = REGISTRY.current.orders.get(expected_order_id or "") or {}
+    expected_reply = expected_reply_for(expected_issue_type or "", expected_order)
+    actual_reply = (result.get("reply_draft") or "").strip()
 
-    issue_type_match = int(result_2.get("issue_type") == expected_issue_type)
-    order_id_match = int(result_2.get("order_id") == expected_order_id)
-
-    expected_order = ORDERS_BY_ID.get(expected_order_id, {})
-    expected_reply = render_reply(expected_issue_type or "", expected_order)
-    actual_reply = (result_2.get("reply_draft") or "").strip()
-    reply_template_match = int(actual_reply == expected_reply)
-
-    trace = langfuse.trace(
-        name="phase1_eval",
-        metadata={
-            "conversation_id": conversation_id,
+    record.update(
+        {
             "expected_issue_type": expected_issue_type,
             "expected_order_id": expected_order_id,
-        },
-        input=initial_state,
-        output=result_2,
+            "issue_type": result.get("issue_type"),
+            "order_id": result.get("order_id"),
+            "reply_draft": actual_reply,
+            "issue_type_match": int(result.get("issue_type") == expected_issue_type),
+            "order_id_match": int(result.get("order_id") == expected_order_id),
+            "reply_template_match": int(actual_reply == expected_reply),
+        }
     )
-
-    langfuse.score(trace_id=trace.id, name="issue_type_match", value=issue_type_match)
-    langfuse.score(trace_id=trace.id, name="order_id_match", value=order_id_match)
-    langfuse.score(
-        trace_id=trace.id,
-        name="reply_template_match",
-        value=reply_template_match,
+    return record
+
+
+def run_eval(conversations: List[Dict[str, Any]], workers: int = 4) -> Dict[str, Any]:
+    graph = build_graph(checkpointer=make_checkpointer())
+    REGISTRY.current  # load data up front so it is not billed to the first conversation
+
+    def run(indexed):
+        i, demo = indexed
+        # Conversation ids may repeat across files, so each run gets its own thread
+        return evaluate_conversation(graph, demo, f"eval-{i}-{demo.get('conversation_id')}")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        results = list(pool.map(run, enumerate(conversations)))
+    elapsed = time.perf_counter() - start
+
+    scored = [r for r in results if "skipped" not in r]
+    latency = summarize([r["latency"] for r in scored])
+    summary = {
+        "conversations": len(results),
+        "scored": len(scored),
+        "errors": sum(1 for r in scored if "error" in r),
+        "elapsed": elapsed,
+        "accuracy": {name: (sum(r[name] for r in scored) / len(scored) if scored else 0.0) for name in METRICS},
+        "latency": {k: latency[k] for k in ("mean", "p50", "p95", "p99")},
+    }
+    return {"summary": summary, "results": results}
+
+
+def check_thresholds(
+    summary: Dict[str, Any],
+    min_accuracy: float = DEFAULT_MIN_ACCURACY,
+    max_p95: Optional[float] = DEFAULT_MAX_P95,
+) -> List[str]:
+    failures = []
+    for name, value in summary["accuracy"].items():
+        if value < min_accuracy:
+            failures.append(f"{name} accuracy {value:.3f} < {min_accuracy:.3f}")
+    if max_p95 is not None and summary["latency"]["p95"] > max_p95:
+        failures.append(f"p95 latency {summary['latency']['p95']:.3f}s > {max_p95:.3f}s")
+    return failures
+
+
+def render_html(report: Dict[str, Any]) -> str:
+    summary = report["summary"]
+    rows = []
+    for r in report["results"]:
+        cells = [
+            r.get("conversation_id"),
+            *(r.get(name, "") for name in METRICS),
+            f"{r['latency'] * 1000:.1f}" if "latency" in r else "",
+            r.get("error") or r.get("skipped") or "",
+        ]
+        rows.append("<tr>" + "".join(f"<td>{html.escape(str(c))}</td>" for c in cells) + "</tr>")
+    accuracy = "".join(f"<li>{name}: {value:.3f}</li>" for name, value in summary["accuracy"].items())
+    latency = ", ".join(f"{k} {v * 1000:.1f} ms" for k, v in summary["latency"].items())
+    failures = "".join(f"<li>{html.escape(f)}</li>" for f in report.get("failures", [])) or "<li>none</li>"
+    header = "".join(f"<th>{h}</th>" for h in ("conversation", *METRICS, "latency ms", "error"))
+    return (
+        "<!doctype html><html><head><meta charset='utf-8'><title>Phase 1 eval</title></head><body>"
+        f"<h1>Phase 1 eval</h1><p>{summary['scored']} of {summary['conversations']} conversations scored, "
+        f"{summary['errors']} errors, {summary['elapsed']:.2f}s total.</p>"
+        f"<h2>Accuracy</h2><ul>{accuracy}</ul><h2>Latency</h2><p>{latency}</p>"
+        f"<h2>Threshold failures</h2><ul>{failures}</ul>"
+        f"<table border='1'><tr>{header}</tr>{''.join(rows)}</table></body></html>"
     )
 
+
+def upload(report: Dict[str, Any]) -> None:
+    """Send every trace and score to Langfuse, then flush once."""
+    from langfuse import Langfuse
+
+    langfuse = Langfuse()
+    for r in report["results"]:
+        if "skipped" in r:
+            continue
+        trace = langfuse.trace(
+            name="phase1_eval",
+            metadata={
+                "conversation_id": r["conversation_id"],
+                "expected_issue_type": r.get("expected_issue_type"),
+                "expected_order_id": r.get("expected_order_id"),
+                "latency": r["latency"],
+            },
+            input=r["input"],
+            output={k: r.get(k) for k in ("issue_type", "order_id", "reply_draft", "error")},
+        )
+        for name in METRICS:
+            langfuse.score(trace_id=trace.id, name=name, value=r[name])
+    langfuse.flush()
+
+
+def write_file(path: str, text: str) -> None:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Evaluate the triage graph on interactions/.")
+    parser.add_argument("--interactions", default=INTERACTIONS_DIR)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--out", help="write the JSON report here")
+    parser.add_argument("--html", help="write the HTML report here")
+    parser.add_argument("--min-accuracy", type=float, default=DEFAULT_MIN_ACCURACY, help="per metric, 0-1")
+    parser.add_argument("--max-p95", type=float, default=DEFAULT_MAX_P95, help="seconds per conversation")
+    parser.add_argument("--upload", action="store_true", help="send traces and scores to Langfuse")
+    args = parser.parse_args(argv)
+
+    report = run_eval(load_conversations(args.interactions), args.workers)
+    report["failures"] = check_thresholds(report["summary"], args.min_accuracy, args.max_p95)
+
+    for r in report["results"]:
+        if "skipped" in r:
+            print(f"{r['conversation_id']} skipped, {r['skipped']}")
+            continue
+        print(
+            f"{r['conversation_id']} "
+            + " ".join(f"{name}={r[name]}" for name in METRICS)
+            + f" latency={r['latency'] * 1000:.1f}ms"
+            + (f" error={r['error']}" if "error" in r else "")
+        )
+    summary = report["summary"]
     print(
-        f"{conversation_id} "
-        f"issue_type_match={issue_type_match} "
-        f"order_id_match={order_id_match} "
-        f"reply_template_match={reply_template_match}"
+        "accuracy "
+        + " ".join(f"{k}={v:.3f}" for k, v in summary["accuracy"].items())
+        + f" p95={summary['latency']['p95'] * 1000:.1f}ms"
     )
 
-print("Done")
+    if args.out:
+        write_file(args.out, json.dumps(report, indent=2, default=str) + "\n")
+    if args.html:
+        write_file(args.html, render_html(report))
+    if args.upload:
+        upload(report)
+
+    for failure in report["failures"]:
+        print(f"FAIL {failure}", file=sys.stderr)
+    return 1 if report["failures"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
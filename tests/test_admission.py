@@ -0,0 +1,77 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.main as main
+from app.admission import AdmissionController, AdmissionRejected
+from app.metrics import METRICS
+
+
+def test_queue_full_and_deadline():
+    controller = AdmissionController(workers=1, max_queue=1, queue_timeout=0.2)
+    release = threading.Event()
+
+    async def scenario():
+        running = asyncio.create_task(controller.run(lambda: release.wait(5) and "first"))
+        await asyncio.sleep(0.05)
+        queued = asyncio.create_task(controller.run(lambda: "never runs"))
+        await asyncio.sleep(0.05)
+        assert controller.stats()["in_flight"] == 1 and controller.stats()["waiting"] == 1
+
+        with pytest.raises(AdmissionRejected) as full:
+            await controller.run(lambda: "rejected")
+        assert full.value.status == 429 and full.value.retry_after == 1
+
+        with pytest.raises(AdmissionRejected) as expired:
+            await queued
+        assert expired.value.status == 503
+
+        release.set()
+        assert await running == "first"
+        assert await controller.run(lambda x: x * 2, 21) == 42
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        controller.close()
+    assert controller.waiting == 0 and controller.in_flight == 0
+    metrics = METRICS.render()
+    assert 'triage_admission_rejected_total{reason="queue_full"}' in metrics
+    assert 'triage_admission_rejected_total{reason="timeout"}' in metrics
+    assert "triage_admission_wait_seconds_count" in metrics
+
+
+def test_api_runs_under_admission_and_rejects_with_retry_after(monkeypatch):
+    client = TestClient(main.app)
+    ticket = {"ticket_text": "I'd like a refund for order ORD1001.", "admin_decision": "approve"}
+    assert client.post("/triage/invoke", json=ticket).json()["issue_type"] == "refund_request"
+    assert client.post("/triage/invoke", params={"fields": "bogus"}, json=ticket).status_code == 400
+
+    # No capacity at all: every graph request is turned away
+    monkeypatch.setattr(main.ADMISSION, "max_queue", -main.ADMISSION.workers)
+    resp = client.post("/triage/invoke", json=ticket)
+    assert resp.status_code == 429
+    assert resp.headers["Retry-After"] == str(main.ADMISSION.retry_after)
+    assert client.post("/triage/admin", json={"thread_id": "t", "admin_decision": "approve"}).status_code == 429
+    assert client.post("/triage/stream", json=ticket).status_code == 429
+    assert client.post("/triage/batch", json={"items": [ticket]}).status_code == 429
+    assert client.get("/orders/get", params={"order_id": "ORD1001"}).status_code == 200
+    assert "triage_admission_queue_depth" in client.get("/metrics").text
+
+
+def test_stream_runs_on_an_admission_worker(monkeypatch):
+    graph = main.get_graph()
+    threads = []
+
+    class RecordingGraph:
+        def stream(self, *args, **kwargs):
+            threads.append(threading.current_thread().name)
+            yield from graph.stream(*args, **kwargs)
+
+    monkeypatch.setattr(main, "get_graph", RecordingGraph)
+    resp = TestClient(main.app).post("/triage/stream", json={"ticket_text": "I'd like a refund for order ORD1001."})
+    assert resp.status_code == 200
+    assert resp.text.rstrip().endswith("event: end\ndata: {}")
+    assert threads and threads[0].startswith("triage-worker")
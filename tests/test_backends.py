@@ -0,0 +1,121 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.backends import HttpOrderBackend, OrderBackendError, configure_order_backend
+from app.graph import build_graph
+from app.main import app
+from app.tools import fetch_order
+
+
+class CountingTransport(httpx.AsyncBaseTransport):
+    """ASGI transport to the API that counts requests and can add latency."""
+
+    def __init__(self, delay=0.0):
+        self.inner = httpx.ASGITransport(app=app)
+        self.delay = delay
+        self.calls = 0
+
+    async def handle_async_request(self, request):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return await self.inner.handle_async_request(request)
+
+
+class Clock:
+    now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def make_backend():
+    backends = []
+
+    def make(**kwargs):
+        backend = HttpOrderBackend("http://orders.test", **kwargs)
+        backends.append(backend)
+        return backend
+
+    yield make
+    for backend in backends:
+        backend.close()
+
+
+def test_lookup_and_negative_cache(make_backend):
+    clock, transport = Clock(), CountingTransport()
+    backend = make_backend(transport=transport, ttl=30, negative_ttl=5, clock=clock)
+
+    assert backend.get("ORD1001")["customer_name"] == "Ava Chen"
+    assert backend.get("ORD1001")["customer_name"] == "Ava Chen"
+    assert backend.get("ORD9999") is None
+    assert backend.get("ORD9999") is None
+    assert transport.calls == 2
+
+    clock.now = 6  # not-found entry expired, found entry still fresh
+    assert backend.get("ORD9999") is None
+    assert backend.get("ORD1001") is not None
+    assert transport.calls == 3
+    assert backend.stats()["cache_hits"] == 3
+
+
+def test_concurrent_lookups_are_coalesced(make_backend):
+    transport = CountingTransport(delay=0.05)
+    backend = make_backend(transport=transport)
+
+    async def lookups():
+        return await asyncio.gather(*(backend.aget("ORD1002") for _ in range(10)))
+
+    results = asyncio.run(lookups())
+    assert all(r["order_id"] == "ORD1002" for r in results)
+    assert transport.calls == 1
+    assert backend.stats()["coalesced"] == 9
+
+
+def test_cancelled_caller_does_not_fail_coalesced_waiters(make_backend):
+    transport = CountingTransport(delay=0.05)
+    backend = make_backend(transport=transport)
+
+    async def lookups():
+        leader = asyncio.ensure_future(backend.aget("ORD1002"))
+        await asyncio.sleep(0.01)
+        follower = asyncio.ensure_future(backend.aget("ORD1002"))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(lookups())["order_id"] == "ORD1002"
+    assert transport.calls == 1
+    assert backend.stats()["coalesced"] == 1
+
+
+def test_timeout_is_not_cached(make_backend):
+    transport = CountingTransport(delay=0.5)
+    backend = make_backend(transport=transport, timeout=0.05)
+
+    with pytest.raises(OrderBackendError, match="timed out"):
+        backend.get("ORD1001")
+    transport.delay = 0
+    assert backend.get("ORD1001")["order_id"] == "ORD1001"
+    assert transport.calls == 2
+
+
+def test_graph_fetches_through_http_backend(make_backend):
+    transport = CountingTransport()
+    previous = configure_order_backend(make_backend(transport=transport))
+    try:
+        assert fetch_order.invoke({"order_id": "ORD1003"})["found"] is True
+
+        state = {"ticket_text": "ORD1003 and ORD1007 were both late", "messages": [], "admin_decision": "approve"}
+        result = asyncio.run(build_graph().ainvoke(state))
+        assert {oid: p["found"] for oid, p in result["evidence"]["orders"].items()} == {"ORD1003": True, "ORD1007": True}
+        # ORD1003 was cached by the first lookup
+        assert transport.calls == 2
+
+        configure_order_backend(make_backend(transport=CountingTransport(delay=0.5), timeout=0.05))
+        payload = fetch_order.invoke({"order_id": "ORD1004"})
+        assert payload["found"] is False and "timed out" in payload["error"]
+    finally:
+        configure_order_backend(previous)
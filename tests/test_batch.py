@@ -0,0 +1,92 @@
+import json
+import os
+import shutil
+
+from fastapi.testclient import TestClient
+
+from app.batch import BatchRunner, triage_batch
+from app.main import app
+from app.registry import MOCK_DIR, REGISTRY
+
+TICKETS = [
+    "I'd like a refund for order ORD1001. The mouse is not working.",
+    "My Bluetooth speaker (ORD1002) has not arrived yet.",
+    "",
+    "The smart watch I got (ORD1004) is not working.",
+    "Package ORD1006 came damaged",
+]
+
+
+def test_batch_preserves_order_with_small_chunks():
+    states = [{"ticket_text": t, "messages": []} for t in TICKETS]
+    results = triage_batch(states, executor="thread", max_workers=2, chunk_size=2, max_in_flight=1)
+
+    assert [r["index"] for r in results] == list(range(len(TICKETS)))
+    assert all(r["ok"] for r in results)
+    assert [r["result"].get("order_id") for r in results] == ["ORD1001", "ORD1002", None, "ORD1004", "ORD1006"]
+
+
+def test_batch_reports_per_item_errors():
+    with BatchRunner(executor="thread", max_workers=1, chunk_size=3) as runner:
+        results = runner.run([{"ticket_text": "late ORD1002"}, {"ticket_text": 42}, {"ticket_text": "refund ORD1001"}])
+
+    assert [r["ok"] for r in results] == [True, False, True]
+    assert "AttributeError" in results[1]["error"]
+    assert results[2]["result"]["issue_type"] == "refund_request"
+
+
+def test_batch_process_pool():
+    results = triage_batch([{"ticket_text": t} for t in TICKETS[:2]], executor="process", max_workers=2, chunk_size=1)
+    assert [r["result"]["issue_type"] for r in results] == ["refund_request", "late_delivery"]
+
+
+def test_process_workers_pick_up_reloaded_data(tmp_path):
+    for name in ("issues.json", "replies.json", "orders.json"):
+        shutil.copy(os.path.join(MOCK_DIR, name), tmp_path / name)
+    previous = (REGISTRY.data_dir, REGISTRY.catalog_path)
+    REGISTRY.use(str(tmp_path))
+    ticket = [{"ticket_text": "my zebra mug, ORD1002"}]
+    try:
+        with BatchRunner(executor="process", max_workers=1) as runner:
+            before = runner.run(ticket)[0]["result"]["issue_type"]
+            path = tmp_path / "issues.json"
+            issues = json.loads(path.read_text(encoding="utf-8"))
+            path.write_text(json.dumps([{"keyword": "zebra", "issue_type": "wrong_item"}, *issues]), encoding="utf-8")
+            st = os.stat(path)
+            os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+            after = runner.run(ticket)[0]["result"]["issue_type"]
+    finally:
+        REGISTRY.use(*previous)
+    assert before != "wrong_item"
+    assert after == "wrong_item"
+
+
+def test_batch_endpoint():
+    client = TestClient(app)
+    resp = client.post("/triage/batch", json={"items": [{"ticket_text": t} for t in TICKETS[:2]]})
+    assert resp.status_code == 200
+    results = resp.json()["results"]
+    assert [r["result"]["order_id"] for r in results] == ["ORD1001", "ORD1002"]
+
+
+def test_batch_runner_is_created_once(monkeypatch):
+    import threading
+    import time
+
+    import app.main as main
+
+    created = []
+
+    class SlowRunner:
+        def __init__(self):
+            time.sleep(0.05)
+            created.append(self)
+
+    monkeypatch.setattr(main, "BATCH_RUNNER", None)
+    monkeypatch.setattr(main, "BatchRunner", SlowRunner)
+    threads = [threading.Thread(target=main.get_batch_runner) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(created) == 1 and main.BATCH_RUNNER is created[0]
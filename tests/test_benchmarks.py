@@ -0,0 +1,60 @@
+import asyncio
+
+import httpx
+
+from app.registry import REGISTRY
+from benchmarks.loadtest import default_scenarios, find_knee, sweep
+from benchmarks.run import compare, run_benchmarks
+from benchmarks.synthetic import generate_issues, generate_orders, generate_tickets
+
+
+def test_generators_are_deterministic():
+    assert list(generate_orders(5, seed=1)) == list(generate_orders(5, seed=1))
+    issues = generate_issues(50)
+    assert len(issues) == 50
+    assert len({row["keyword"] for row in issues}) == 50
+    tickets = list(generate_tickets(3, 5, issues))
+    assert all(t["order_id"] in t["ticket_text"] for t in tickets)
+
+
+def test_run_benchmarks_small_scale_restores_registry(tmp_path):
+    before = REGISTRY.version
+    results = run_benchmarks(orders=50, keywords=30, tickets=15, catalog=True, workdir=str(tmp_path), history=10)
+
+    assert REGISTRY.version == before
+    assert REGISTRY.current.orders.get("ORD1001")["customer_name"] == "Ava Chen"
+    for name in ("node.ingest", "node.fetch_order", "graph.invoke", "templates.render_reply", "orders.get", "api.encode"):
+        assert results["benchmarks"][name]["n"] == 15, name
+    assert results["meta"]["catalog"] is True
+
+
+def test_compare_flags_regressions():
+    baseline = {"benchmarks": {"a": {"mean": 1.0}, "b": {"mean": 1.0}}}
+    results = {"benchmarks": {"a": {"mean": 1.2}, "b": {"mean": 1.5}, "new": {"mean": 9.0}}}
+    assert [r["name"] for r in compare(results, baseline, tolerance=0.25)] == ["b"]
+
+
+def test_find_knee():
+    levels = [
+        {"concurrency": 1, "throughput": 100.0},
+        {"concurrency": 2, "throughput": 190.0},
+        {"concurrency": 4, "throughput": 200.0},
+        {"concurrency": 8, "throughput": 150.0},
+    ]
+    assert find_knee(levels) == 4
+    assert find_knee(levels[:2]) is None
+
+
+def test_sweep_against_asgi_app():
+    from app.main import app
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await sweep(client, default_scenarios(), [1, 2], duration=5, max_requests=4)
+
+    report = asyncio.run(run())
+    assert set(report) == {"triage_invoke", "orders_get", "orders_search", "classify_issue"}
+    for data in report.values():
+        assert [lvl["concurrency"] for lvl in data["levels"]] == [1, 2]
+        assert all(lvl["requests"] == 4 and lvl["errors"] == 0 for lvl in data["levels"])
@@ -0,0 +1,76 @@
+from fastapi.testclient import TestClient
+
+import app.main as main
+from app.cache import TriageCache, cache_key
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_cache_key_normalizes_and_skips_stateful_requests():
+    a = cache_key({"ticket_text": "  Refund   for ORD1001 ", "messages": [], "evidence": {}}, "v1")
+    b = cache_key({"ticket_text": "refund for ord1001"}, "v1")
+    assert a == b
+    assert cache_key({"ticket_text": "refund for ord1001"}, "v2") != a
+    assert cache_key({"ticket_text": "refund for ord1001", "admin_decision": "approve"}, "v1") != a
+    assert cache_key({"ticket_text": "refund", "messages": [{"type": "human", "content": "hi"}]}, "v1") is None
+
+
+def test_lru_ttl_and_byte_bound():
+    clock = FakeClock()
+    cache = TriageCache(max_entries=2, max_bytes=10_000, ttl=10, clock=clock)
+    cache.put("a", {"v": 1})
+    cache.put("b", {"v": 2})
+    assert cache.get("a") == {"v": 1}
+    cache.put("c", {"v": 3})  # evicts "b", the least recently used
+    assert cache.get("b") is None
+
+    clock.now = 11
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["expirations"]) == (1, 2, 1, 1)
+
+    assert cache.put("big", "x" * 20_000) is False
+    assert cache.stats()["bytes"] <= 10_000
+
+
+def test_cached_results_are_independent_copies():
+    cache = TriageCache()
+    cache.put("k", {"messages": ["a"]})
+    cache.get("k")["messages"].append("b")
+    assert cache.get("k") == {"messages": ["a"]}
+
+
+def test_triage_invoke_serves_duplicates_from_cache(monkeypatch):
+    cache = TriageCache()
+    monkeypatch.setattr(main, "TRIAGE_CACHE", cache)
+    client = TestClient(main.app)
+
+    body = {"ticket_text": "I want a refund for order ORD1001.", "messages": []}
+    first = client.post("/triage/invoke", json=body).json()
+    second = client.post("/triage/invoke", json={**body, "ticket_text": "i want a refund for  order ORD1001."}).json()
+
+    assert second == first
+    stats = client.get("/cache/stats").json()
+    assert stats["enabled"] is True
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+
+def test_order_id_case_is_part_of_the_key(monkeypatch):
+    cache = TriageCache()
+    monkeypatch.setattr(main, "TRIAGE_CACHE", cache)
+    client = TestClient(main.app)
+
+    body = {"ticket_text": "my package is late"}
+    lower = client.post("/triage/invoke", json={**body, "order_id": "ord1002"}).json()
+    upper = client.post("/triage/invoke", json={**body, "order_id": "ORD1002"}).json()
+
+    assert lower["evidence"]["order"]["found"] is False
+    assert upper["evidence"]["order"]["found"] is True
+    assert upper["reply_draft"].startswith("Hi David Lee")
+    assert cache.stats()["hits"] == 0
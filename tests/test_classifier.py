@@ -0,0 +1,80 @@
+import numpy as np
+from fastapi.testclient import TestClient
+
+from app.classifier import IssueClassifier, classify_batch, featurize, sparse_dot
+from app.main import app
+from app.matcher import KeywordMatcher
+from app.registry import REGISTRY
+
+TEXTS = [
+    "charged twice", "double charge on my card", "billed two times",
+    "package is late", "parcel delayed", "still not arrived",
+    "screen cracked", "arrived broken", "box was damaged",
+]
+LABELS = ["duplicate_charge"] * 3 + ["late_delivery"] * 3 + ["damaged_item"] * 3
+
+
+def test_sparse_dot_matches_dense_product():
+    texts = ["a refund please", "", "refund refund"]
+    idx, values, offsets = featurize(texts, 64)
+    dense = np.zeros((len(texts), 64), dtype=np.float32)
+    for row in range(len(texts)):
+        dense[row, idx[offsets[row]:offsets[row + 1]]] = values[offsets[row]:offsets[row + 1]]
+    weights = np.random.default_rng(0).normal(size=(64, 3)).astype(np.float32)
+    assert np.allclose(sparse_dot(idx, values, offsets, weights), dense @ weights, atol=1e-5)
+    assert np.allclose(np.linalg.norm(dense[[0, 2]], axis=1), 1.0)
+
+
+def test_classifier_learns_and_calibrates():
+    model = IssueClassifier.train(TEXTS, LABELS)
+    assert [label for label, _ in model.predict(TEXTS)] == LABELS
+    assert model.predict(["my card was charged twice"])[0][0] == "duplicate_charge"
+
+    probs = model.predict_proba(["parcel is late", ""])
+    assert probs.shape == (2, 3)
+    assert np.allclose(probs.sum(axis=1), 1.0)
+    # A ticket with no features is not confidently anything
+    assert probs[1].max() < 0.5
+
+    # Too few examples per class to hold any out: no temperature is fitted
+    assert IssueClassifier.train(TEXTS[:2], LABELS[:2]).temperature == 1.0
+
+
+def test_classify_batch_prefers_keywords():
+    matcher = KeywordMatcher.from_rows([{"keyword": "refund", "issue_type": "refund_request"}])
+    model = IssueClassifier.train(TEXTS, LABELS)
+    results = classify_batch(["I want a REFUND", "parcel delayed again"], matcher, model, min_confidence=0)
+    assert results[0] == {"issue_type": "refund_request", "confidence": 1.0, "source": "keyword"}
+    assert results[1]["issue_type"] == "late_delivery"
+    assert results[1]["source"] == "model"
+    assert 0 < results[1]["confidence"] < 1
+
+    assert classify_batch(["parcel delayed"], matcher, None)[0]["issue_type"] == "unknown"
+    # Below the confidence floor the model's guess is not used
+    low = classify_batch(["parcel delayed again"], matcher, model, min_confidence=0.99)[0]
+    assert low["issue_type"] == "unknown"
+    assert low["confidence"] == results[1]["confidence"]
+
+
+def test_classify_endpoints_and_graph_use_model():
+    client = TestClient(app)
+    resp = client.post("/classify/issue", json={"ticket_text": "I was charged twice"})
+    assert resp.json() == {"issue_type": "duplicate_charge", "confidence": 1.0, "source": "keyword"}
+
+    resp = client.post("/classify/batch", json={"tickets": ["I was charged twice", "the item was brokn"]})
+    results = resp.json()["results"]
+    assert [r["source"] for r in results] == ["keyword", "model"]
+    assert results[1]["issue_type"] == "damaged_item"
+
+    assert REGISTRY.current.issue_classifier is REGISTRY.current.issue_classifier
+    body = client.post("/triage/invoke", json={"ticket_text": "the item was brokn"}).json()
+    assert body["issue_type"] == "damaged_item"
+
+
+def test_low_confidence_tickets_stay_unknown():
+    client = TestClient(app)
+    result = client.post("/classify/issue", json={"ticket_text": "hello"}).json()
+    assert result["issue_type"] == "unknown"
+    assert result["source"] == "model"
+    body = client.post("/triage/invoke", json={"ticket_text": "hello"}).json()
+    assert body["issue_type"] == "defective_product"
@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.backends import OrderBackend, OrderBackendError, configure_order_backend
+from app.batch import BatchRunner
+from app.graph import DirectGraph, build_engine, build_graph
+from app.main import app
+
+GRAPH = build_graph()
+DIRECT = DirectGraph()
+
+HISTORY = [{"type": "human" if i % 2 == 0 else "ai", "content": f"Earlier message {i}"} for i in range(120)]
+
+CASES = [
+    {"ticket_text": ""},
+    {"ticket_text": "   ", "messages": HISTORY[:3]},
+    {"ticket_text": "I'd like a refund for order ORD1001.", "admin_decision": "approve", "admin_notes": "ok"},
+    {"ticket_text": "ORD1003 and ord1007 were late, also ORD9999", "admin_decision": "reject"},
+    {"ticket_text": "My Bluetooth speaker (ORD1002) has not arrived yet.", "order_id": "ORD1004"},
+    {"ticket_text": "Something is wrong, please help"},
+    {"ticket_text": "the item was brokn", "issue_type": "wrong_item", "recommendation": "Call them.", "reply_draft": "Hi."},
+    {"ticket_text": "Please check order ORD1005, one sleeve is missing.", "messages": HISTORY},
+    {"ticket_text": "ORD1001 refund", "messages": [{"type": "human", "content": "ORD1001 refund"}], "needs_admin": False},
+    {"ticket_text": "ORD1001", "evidence": {"note": "kept"}, "order_ids": ["ORD1002"], "thread_id": "ignored"},
+]
+
+
+def comparable(state):
+    """Final state with message ids dropped; add_messages assigns random ones."""
+    state = dict(state)
+    state["messages"] = [{k: v for k, v in m.dict().items() if k != "id"} for m in state.get("messages", [])]
+    return state
+
+
+def assert_parity(expected, actual):
+    assert list(actual) == list(expected)
+    assert comparable(actual) == comparable(expected)
+
+
+@pytest.mark.parametrize("case", CASES)
+def test_direct_matches_langgraph(case):
+    assert_parity(GRAPH.invoke(dict(case)), DIRECT.invoke(dict(case)))
+
+
+@pytest.mark.parametrize("case", CASES[2:5])
+def test_direct_ainvoke_matches_langgraph(case):
+    expected = asyncio.run(GRAPH.ainvoke(dict(case)))
+    assert_parity(expected, asyncio.run(DIRECT.ainvoke(dict(case))))
+
+
+class FlakyBackend(OrderBackend):
+    """ORD1001 is unavailable, ORD1002 crashes the tool, the rest are missing."""
+
+    def get(self, order_id):
+        if order_id == "ORD1001":
+            raise OrderBackendError("order service timed out after 2s")
+        if order_id == "ORD1002":
+            raise RuntimeError("boom")
+        return None
+
+
+def test_direct_matches_langgraph_on_backend_errors():
+    previous = configure_order_backend(FlakyBackend())
+    try:
+        case = {"ticket_text": "ORD1001, ORD1002 and ORD1003 all failed"}
+        expected = GRAPH.invoke(dict(case))
+        assert any("boom" in str(m.content) for m in expected["messages"])
+        assert_parity(expected, DIRECT.invoke(dict(case)))
+        assert_parity(asyncio.run(GRAPH.ainvoke(dict(case))), asyncio.run(DIRECT.ainvoke(dict(case))))
+    finally:
+        configure_order_backend(previous)
+
+
+def test_engine_selection():
+    assert isinstance(build_engine("direct"), DirectGraph)
+    with pytest.raises(ValueError):
+        build_engine("pregel")
+    with pytest.raises(ValueError):
+        DIRECT.invoke(CASES[2], {"configurable": {"thread_id": "t1"}})
+
+    with BatchRunner(max_workers=2, chunk_size=2, engine="direct") as runner:
+        results = runner.run(dict(c) for c in CASES[2:6])
+    assert [r["result"]["issue_type"] for r in results] == [GRAPH.invoke(dict(c))["issue_type"] for c in CASES[2:6]]
+
+    client = TestClient(app)
+    ticket = {"ticket_text": "I'd like a refund for order ORD1001.", "admin_decision": "approve"}
+    direct = client.post("/triage/invoke", params={"engine": "direct"}, json=ticket).json()
+    compiled = client.post("/triage/invoke", params={"engine": "langgraph"}, json=ticket).json()
+    assert {k: v for k, v in direct.items() if k != "messages"} == {k: v for k, v in compiled.items() if k != "messages"}
+    assert client.post("/triage/invoke", params={"engine": "fast"}, json=ticket).status_code == 422
+    resp = client.post("/triage/invoke", params={"engine": "direct"}, json={**ticket, "thread_id": "t2"})
+    assert resp.status_code == 400
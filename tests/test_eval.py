@@ -0,0 +1,31 @@
+import json
+
+from eval_phase1 import check_thresholds, load_conversations, main, run_eval
+
+
+def test_run_eval_scores_demo_conversations_locally():
+    report = run_eval(load_conversations(), workers=3)
+    summary = report["summary"]
+
+    assert summary["scored"] == summary["conversations"] == 5
+    assert summary["errors"] == 0
+    assert summary["accuracy"] == {"issue_type_match": 1.0, "order_id_match": 1.0, "reply_template_match": 1.0}
+    assert [r["conversation_id"] for r in report["results"]] == [f"P1-DEMO-00{i}" for i in range(1, 6)]
+    assert all(r["latency"] > 0 for r in report["results"])
+
+
+def test_check_thresholds():
+    summary = {"accuracy": {"issue_type_match": 1.0, "order_id_match": 0.5}, "latency": {"p95": 0.2}}
+    assert check_thresholds(summary, min_accuracy=0.5, max_p95=0.3) == []
+    failures = check_thresholds(summary, min_accuracy=0.9, max_p95=0.1)
+    assert len(failures) == 2
+    assert failures[0].startswith("order_id_match") and failures[1].startswith("p95")
+
+
+def test_main_writes_reports_and_fails_on_threshold(tmp_path):
+    out, page = tmp_path / "eval.json", tmp_path / "eval.html"
+    assert main(["--out", str(out), "--html", str(page), "--max-p95", "10"]) == 0
+    assert json.loads(out.read_text())["failures"] == []
+    assert "P1-DEMO-005" in page.read_text()
+
+    assert main(["--max-p95", "0"]) == 1
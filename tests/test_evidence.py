@@ -0,0 +1,41 @@
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.registry import REGISTRY, MOCK_DIR, DataRegistry, resolve_evidence_fields
+from app.templates import build_templates
+from app.tools import fetch_order, project_order
+
+
+def test_evidence_fields_follow_templates_and_config():
+    templates = build_templates([{"issue_type": "late", "template": "{{customer_name}}: {{items.0.name}} is {{status}}"}])
+    assert resolve_evidence_fields(templates) == ("customer_name", "order_id", "items", "status")
+    assert resolve_evidence_fields(templates, ["email", ""]) == ("customer_name", "order_id", "items", "status", "email")
+    assert resolve_evidence_fields(templates, ["*"]) is None
+
+
+def test_fetch_order_stores_projected_order():
+    payload = fetch_order.invoke({"order_id": "ORD1001"})
+    assert payload == {"found": True, "order": {"customer_name": "Ava Chen", "order_id": "ORD1001"}}
+
+    full = DataRegistry(data_dir=MOCK_DIR, evidence_fields=["*"]).current
+    order = full.orders.get("ORD1001")
+    assert project_order(order, full.evidence_fields) is order
+    assert project_order(order, REGISTRY.current.evidence_fields) == payload["order"]
+
+
+def test_triage_invoke_field_selection():
+    client = TestClient(app)
+    ticket = {"ticket_text": "I'd like a refund for order ORD1001.", "admin_decision": "approve"}
+
+    resp = client.post("/triage/invoke", params={"fields": "issue_type,recommendation,reply_draft"}, json=ticket)
+    assert resp.status_code == 200
+    body = resp.json()
+    assert set(body) == {"issue_type", "recommendation", "reply_draft"}
+    assert body["issue_type"] == "refund_request"
+    assert body["reply_draft"].startswith("Hi Ava Chen")
+
+    assert "messages" in client.post("/triage/invoke", json=ticket).json()
+
+    resp = client.post("/triage/invoke", params={"fields": "issue_type,bogus"}, json=ticket)
+    assert resp.status_code == 400
+    assert "bogus" in resp.json()["detail"]
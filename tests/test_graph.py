@@ -0,0 +1,72 @@
+from fastapi.testclient import TestClient
+from langchain_core.messages import AIMessage, ToolMessage
+
+from app.graph import build_graph, ingest, request_fetch_order, store_order_evidence
+from app.main import app
+
+
+def test_ingest_extracts_all_order_ids_deduplicated():
+    update = ingest({"ticket_text": "ORD1003 and ord1007 were both late (ORD1003 twice)"})
+    assert update["order_id"] == "ORD1003"
+    assert update["order_ids"] == ["ORD1003", "ORD1007"]
+
+    update = ingest({"ticket_text": "ORD1003 and ORD1007 were late", "order_id": "ORD1007"})
+    assert "order_id" not in update
+    assert update["order_ids"] == ["ORD1007", "ORD1003"]
+
+    update = ingest({"ticket_text": "my order ORD1003 was late", "order_ids": ["ORD1001"]})
+    assert update["order_id"] == "ORD1001"
+    assert update["order_ids"] == ["ORD1001", "ORD1003"]
+
+
+def test_supplied_order_ids_are_fetched():
+    client = TestClient(app)
+    body = client.post(
+        "/triage/invoke", json={"ticket_text": "my orders were late", "order_ids": ["ORD1001", "ORD1002"]}
+    ).json()
+    assert body["order_id"] == "ORD1001"
+    assert set(body["evidence"]["orders"]) == {"ORD1001", "ORD1002"}
+    assert body["evidence"]["order"]["found"] is True
+    assert "share your order id" not in body["reply_draft"]
+
+
+def test_request_fetch_order_emits_one_call_per_order():
+    update = request_fetch_order({"order_id": "ORD1003", "order_ids": ["ORD1003", "ORD1007", "ORD1003"]})
+    calls = update["messages"][0].tool_calls
+    assert [c["args"]["order_id"] for c in calls] == ["ORD1003", "ORD1007"]
+    assert [c["id"] for c in calls] == ["call_fetch_order_1", "call_fetch_order_2"]
+
+
+def test_store_order_evidence_uses_latest_request_only():
+    def request(*ids):
+        return AIMessage(
+            content="",
+            tool_calls=[{"name": "fetch_order", "args": {"order_id": oid}, "id": f"c{i}"} for i, oid in enumerate(ids)],
+        )
+
+    def result(call_id, payload):
+        return ToolMessage(content=payload, name="fetch_order", tool_call_id=call_id)
+
+    messages = [
+        request("ORD0001"),
+        result("c0", '{"found": false, "order_id": "ORD0001"}'),
+        request("ORD1003", "ORD1007"),
+        result("c0", '{"found": true, "order": {"order_id": "ORD1003"}}'),
+        result("c1", '{"found": true, "order": {"order_id": "ORD1007"}}'),
+    ]
+    evidence = store_order_evidence({"messages": messages, "order_id": "ORD1007"})["evidence"]
+    assert list(evidence["orders"]) == ["ORD1003", "ORD1007"]
+    assert evidence["order"]["order"]["order_id"] == "ORD1007"
+
+
+def test_multi_order_ticket_in_one_run():
+    result = build_graph().invoke(
+        {"ticket_text": "ORD1003 and ORD1007 were both late", "messages": [], "admin_decision": "approve"}
+    )
+    assert result["order_ids"] == ["ORD1003", "ORD1007"]
+    orders = result["evidence"]["orders"]
+    assert {oid: p["found"] for oid, p in orders.items()} == {"ORD1003": True, "ORD1007": True}
+    assert result["evidence"]["order"] == orders["ORD1003"]
+    assert "ORD1003" in result["reply_draft"]
+    tool_results = [m for m in result["messages"] if isinstance(m, ToolMessage)]
+    assert sorted(m.tool_call_id for m in tool_results) == ["call_fetch_order_1", "call_fetch_order_2"]
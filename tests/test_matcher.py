@@ -0,0 +1,40 @@
+from app.matcher import KeywordMatcher
+from app.registry import REGISTRY
+
+
+def naive_classify(rows, text):
+    text = text.lower()
+    for row in rows:
+        kw = (row.get("keyword") or "").lower()
+        if kw and kw in text:
+            return row.get("issue_type")
+    return None
+
+
+def test_matcher_agrees_with_sequential_scan():
+    tickets = [
+        "I'd like a refund for order ORD1001. The mouse is not working.",
+        "My Bluetooth speaker (ORD1002) has not arrived yet.",
+        "The smart watch I got (ORD1004) is not working.",
+        "Package came LATE and the box was Damaged",
+        "I was charged twice, please help",
+        "hello there",
+        "",
+    ]
+    for ticket in tickets:
+        assert REGISTRY.current.issue_matcher.classify(ticket) == naive_classify(REGISTRY.current.issues, ticket), ticket
+
+
+def test_first_row_wins_over_earlier_position():
+    matcher = KeywordMatcher(
+        [
+            {"keyword": "she", "issue_type": "a"},
+            {"keyword": "he", "issue_type": "b"},
+            {"keyword": "hers", "issue_type": "c"},
+        ]
+    )
+    # "he" ends first in the text but "she" has the higher priority row
+    assert matcher.classify("ushers") == "a"
+    assert sorted(row for _, row in matcher.find_all("ushers")) == [0, 1, 2]
+    assert matcher.classify("hers") == "b"
+    assert matcher.classify("nothing") is None
@@ -0,0 +1,48 @@
+import re
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.metrics import Counter, Histogram, MetricsRegistry
+
+
+def sample(text, name, **labels):
+    label_text = ",".join(f'{k}="{v}"' for k, v in labels.items())
+    pattern = rf"^{re.escape(name)}{re.escape('{' + label_text + '}') if labels else ''} (\S+)$"
+    m = re.search(pattern, text, re.MULTILINE)
+    return float(m.group(1)) if m else None
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    hist = registry.register(Histogram("h_seconds", "demo", ["node"], buckets=[0.1, 1.0]))
+    errors = registry.register(Counter("errors_total", "demo", ["node"]))
+    for value in (0.05, 0.5, 5.0):
+        hist.labels("a").observe(value)
+    errors.labels(node="a").inc()
+
+    text = registry.render()
+    assert "# TYPE h_seconds histogram" in text
+    assert sample(text, "h_seconds_bucket", node="a", le="0.1") == 1
+    assert sample(text, "h_seconds_bucket", node="a", le="1.0") == 2
+    assert sample(text, "h_seconds_bucket", node="a", le="+Inf") == 3
+    assert sample(text, "h_seconds_count", node="a") == 3
+    assert sample(text, "errors_total", node="a") == 1
+
+
+def test_metrics_endpoint_reports_node_and_graph_latency():
+    client = TestClient(app)
+    before = sample(client.get("/metrics").text, "triage_graph_runs_total", mode="invoke") or 0
+
+    result = client.post(
+        "/triage/invoke", json={"ticket_text": "I want a refund for order ORD1001.", "messages": []}
+    ).json()
+    resp = client.get("/metrics")
+
+    assert resp.headers["content-type"].startswith("text/plain")
+    text = resp.text
+    assert sample(text, "triage_graph_runs_total", mode="invoke") == before + 1
+    for node in ("ingest", "classify_issue", "fetch_order", "draft_reply"):
+        assert sample(text, "triage_node_latency_seconds_count", node=node) >= 1, node
+    assert sample(text, "triage_graph_overhead_seconds_count", mode="invoke") >= 1
+    assert sample(text, "triage_state_messages") == len(result["messages"]) > 0
@@ -0,0 +1,116 @@
+import json
+import os
+import sqlite3
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.catalog import SqliteOrderCatalog, build_catalog
+from app.main import app
+from app.orders import OrderRepository
+from app.registry import REGISTRY
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+with open(os.path.join(ROOT, "mock_data", "orders.json"), "r", encoding="utf-8") as f:
+    ORDERS = json.load(f)
+
+
+def naive_search(orders, customer_email=None, q=None):
+    matches = []
+    for o in orders:
+        if customer_email and o["email"].lower() == customer_email.lower():
+            matches.append(o)
+        elif q and (o["order_id"].lower() in q.lower() or o["customer_name"].lower() in q.lower()):
+            matches.append(o)
+    return matches
+
+
+SEARCH_CASES = [
+    {"customer_email": "SARA.PATEL@example.com"},
+    {"q": "Where is ORD1007?"},
+    {"q": "this is noah kim and also ORD1001"},
+    {"q": "nobody"},
+    {"customer_email": "ava.chen@example.com", "q": "Owen Hart"},
+    {},
+]
+
+
+def test_repository_matches_linear_scan():
+    for case in SEARCH_CASES:
+        assert REGISTRY.current.orders.search(**case) == naive_search(ORDERS, **case), case
+
+
+def test_repository_get_and_incremental_add():
+    repo = OrderRepository(ORDERS[:2])
+    assert repo.get("ORD1001")["customer_name"] == "Ava Chen"
+    assert repo.get("ORD1003") is None
+
+    repo.add(ORDERS[2])
+    assert len(repo) == 3
+    assert repo.get("ORD1003") is ORDERS[2]
+    assert repo.find_by_email("sara.patel@example.com") == [ORDERS[2]]
+    assert repo.search(q="hi, Sara Patel here") == [ORDERS[2]]
+
+
+def test_order_routes_use_repository():
+    client = TestClient(app)
+    assert client.get("/orders/get", params={"order_id": "ORD1002"}).json()["customer_name"] == "David Lee"
+    assert client.get("/orders/get", params={"order_id": "ORD9999"}).status_code == 404
+    results = client.get("/orders/search", params={"q": "order ORD1005"}).json()["results"]
+    assert [o["order_id"] for o in results] == ["ORD1005"]
+
+
+def test_sqlite_catalog_matches_repository(tmp_path):
+    path = str(tmp_path / "orders.db")
+    assert build_catalog(ORDERS, path, batch_size=5) == len(ORDERS)
+
+    catalog = SqliteOrderCatalog(path)
+    assert len(catalog) == len(ORDERS)
+    assert catalog.get("ORD1003") == ORDERS[2]
+    assert catalog.get("ORD9999") is None
+    assert catalog.find_by_email("Sara.Patel@example.com") == [ORDERS[2]]
+    for case in SEARCH_CASES:
+        assert catalog.search(**case) == naive_search(ORDERS, **case), case
+
+
+def test_fuzzy_search_ranks_typos_and_adds_incrementally():
+    repo = OrderRepository(ORDERS)
+    hits = repo.fuzzy_search("Sara Patle")
+    assert hits[0][0]["order_id"] == "ORD1003"
+    assert 0.3 <= hits[0][1] < 1
+    assert [s for _, s in hits] == sorted((s for _, s in hits), reverse=True)
+
+    assert repo.fuzzy_search("ava.chen")[0] == (ORDERS[0], 1.0)
+    assert repo.fuzzy_search("wireles mous")[0][0]["order_id"] == "ORD1001"
+    assert repo.fuzzy_search("SKU-102-C", threshold=0.9) == [(ORDERS[1], 1.0)]
+    assert len(repo.fuzzy_search("SKU", threshold=0.1, limit=3)) == 3
+    assert repo.fuzzy_search("zzzz qqqq") == []
+
+    repo.add({"order_id": "ORD2001", "customer_name": "Sara Patil", "email": "sara.patil@example.com", "items": []})
+    assert [o["order_id"] for o, _ in repo.fuzzy_search("Sara Patle")] == ["ORD1003", "ORD2001"]
+
+
+def test_fuzzy_search_catalog_and_route(tmp_path):
+    path = str(tmp_path / "orders.db")
+    build_catalog(ORDERS, path)
+    catalog = SqliteOrderCatalog(path)
+    for q in ("Sara Patle", "bluetooth speker", "noah"):
+        assert catalog.fuzzy_search(q) == REGISTRY.current.orders.fuzzy_search(q), q
+    # The index is read from the file, with the same ranking as in memory
+    repo = OrderRepository(ORDERS)
+    for q, threshold, limit in (("SKU", 0.1, 3), ("wireles mous", 0.3, 10), ("zzzz", 0.3, 10), ("", 0.3, 10)):
+        assert catalog.fuzzy_search(q, threshold, limit) == repo.fuzzy_search(q, threshold, limit), q
+    assert catalog._conn().execute("SELECT COUNT(*) FROM fuzzy_docs").fetchone()[0] == len(repo._fuzzy)
+
+    with sqlite3.connect(path) as conn:
+        conn.execute("DROP TABLE fuzzy_grams")
+    with pytest.raises(RuntimeError, match="rebuild"):
+        SqliteOrderCatalog(path).fuzzy_search("noah")
+
+    client = TestClient(app)
+    body = client.get("/orders/search", params={"q": "Ingrd", "fuzzy": "true", "limit": 1}).json()
+    assert len(body["results"]) == len(body["scores"]) <= 1
+    body = client.get("/orders/search", params={"q": "Sara Patle", "fuzzy": "true"}).json()
+    assert body["results"][0]["order_id"] == "ORD1003"
+    assert client.get("/orders/search", params={"q": "x", "fuzzy": "true", "threshold": 0}).status_code == 422
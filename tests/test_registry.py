@@ -0,0 +1,86 @@
+import json
+import os
+import shutil
+import time
+
+import pytest
+
+from app.registry import MOCK_DIR, DataRegistry
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    for name in ("issues.json", "replies.json", "orders.json"):
+        shutil.copy(os.path.join(MOCK_DIR, name), tmp_path / name)
+    return tmp_path
+
+
+def write_issues(data_dir, rows):
+    path = data_dir / "issues.json"
+    path.write_text(json.dumps(rows), encoding="utf-8")
+    # Make sure the mtime moves even on coarse filesystem clocks
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def test_reload_swaps_snapshot_when_files_change(data_dir):
+    registry = DataRegistry(data_dir=str(data_dir))
+    before = registry.current
+    assert before.issue_matcher.classify("it is lost in transit") is None
+    assert registry.reload() is False
+
+    write_issues(data_dir, [{"keyword": "lost in transit", "issue_type": "late_delivery"}])
+    assert registry.reload() is True
+
+    after = registry.current
+    assert after.version != before.version
+    assert after.issue_matcher.classify("it is lost in transit") == "late_delivery"
+    # Readers holding the old snapshot keep a consistent view
+    assert before.issue_matcher.classify("it is lost in transit") is None
+    # The classifier is trained before the snapshot is published
+    assert "issue_classifier" in vars(after)
+
+
+def test_failed_reload_keeps_current_snapshot(data_dir, monkeypatch):
+    registry = DataRegistry(data_dir=str(data_dir))
+    before = registry.current
+    (data_dir / "replies.json").write_text("{not json", encoding="utf-8")
+    os.utime(data_dir / "replies.json", ns=(0, 1))
+
+    with pytest.raises(ValueError):
+        registry.reload()
+    assert registry.current is before
+
+    # The broken files are not parsed again until they change
+    builds = []
+    build = registry._build
+    monkeypatch.setattr(registry, "_build", lambda version: builds.append(version) or build(version))
+    assert registry.reload() is False
+    assert builds == []
+    shutil.copy(os.path.join(MOCK_DIR, "replies.json"), data_dir / "replies.json")
+    assert registry.reload() is True
+    assert len(builds) == 1
+
+
+def test_watcher_picks_up_changes(data_dir):
+    registry = DataRegistry(data_dir=str(data_dir))
+    registry.start_watching(0.01)
+    try:
+        write_issues(data_dir, [{"keyword": "lost in transit", "issue_type": "late_delivery"}])
+        deadline = time.monotonic() + 5
+        while registry.current.issue_matcher.classify("lost in transit") is None:
+            assert time.monotonic() < deadline, "watcher did not reload"
+            time.sleep(0.01)
+    finally:
+        registry.stop_watching()
+
+
+def test_bad_training_file_falls_back_to_keywords(data_dir, tmp_path):
+    training_dir = tmp_path / "training"
+    training_dir.mkdir()
+    (training_dir / "broken.json").write_text("[{not json", encoding="utf-8")
+    registry = DataRegistry(data_dir=str(data_dir), training_dir=str(training_dir))
+
+    snapshot = registry.current
+    assert snapshot.issue_classifier is None
+    assert snapshot.issue_matcher.classify("i want a refund") == "refund_request"
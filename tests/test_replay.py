@@ -0,0 +1,115 @@
+import json
+
+import pytest
+
+import app.replay as replay_module
+from app.batch import BatchRunner
+from app.replay import Line, replay, run_lines
+
+TICKETS = [
+    {"ticket_id": "T1", "ticket_text": "I'd like a refund for order ORD1001. The mouse is not working."},
+    {"ticket_id": "T2", "body": "My Bluetooth speaker (ORD1002) has not arrived yet."},
+    "not json",
+    {"id": "T4", "text": "The smart watch I got (ORD1004) is not working."},
+    [1, 2],
+    {"ticket_id": "T6", "ticket_text": "Package ORD1006 came damaged"},
+    {"ticket_id": "T7", "ticket_text": ""},
+]
+
+
+@pytest.fixture
+def tickets_file(tmp_path):
+    path = tmp_path / "tickets.jsonl"
+    lines = [t if isinstance(t, str) else json.dumps(t) for t in TICKETS]
+    path.write_text("\n".join(lines[:3]) + "\n\n" + "\n".join(lines[3:]) + "\n", encoding="utf-8")
+    return path
+
+
+def read_jsonl(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_replay_streams_results_in_order(tickets_file, tmp_path):
+    out = tmp_path / "out.jsonl"
+    checkpoint = replay(str(tickets_file), str(out), admin_decision="approve", max_workers=2, chunk_size=2)
+
+    records = read_jsonl(out)
+    assert [r["line"] for r in records] == [1, 2, 3, 5, 6, 7, 8]
+    assert [r["id"] for r in records] == ["T1", "T2", None, "T4", None, "T6", "T7"]
+    assert [r["ok"] for r in records] == [True, True, False, True, False, True, True]
+    assert "JSONDecodeError" in records[2]["error"]
+    assert [r["result"]["order_id"] for r in records if r["ok"]] == ["ORD1001", "ORD1002", "ORD1004", "ORD1006", None]
+    assert records[0]["result"]["issue_type"] == "refund_request"
+    assert records[0]["result"]["reply_draft"]
+    assert checkpoint["processed"] == 7 and checkpoint["line"] == 8
+    assert checkpoint["offset"] == tickets_file.stat().st_size
+
+
+def test_replay_resumes_after_crash(tickets_file, tmp_path, monkeypatch):
+    expected = tmp_path / "expected.jsonl"
+    replay(str(tickets_file), str(expected), max_workers=2, chunk_size=2)
+
+    out = tmp_path / "out.jsonl"
+    project = replay_module.project
+
+    def crash_on_line_6(item, outcome, fields):
+        if item.number == 6:
+            raise RuntimeError("crash")
+        return project(item, outcome, fields)
+
+    monkeypatch.setattr(replay_module, "project", crash_on_line_6)
+    with pytest.raises(RuntimeError):
+        replay(str(tickets_file), str(out), checkpoint_every=3, max_workers=2, chunk_size=2)
+    monkeypatch.setattr(replay_module, "project", project)
+
+    # Line 5 was written after the last checkpoint (3 results) and is redone
+    assert [r["line"] for r in read_jsonl(out)] == [1, 2, 3, 5]
+    assert json.loads((tmp_path / "out.jsonl.checkpoint").read_text())["line"] == 3
+
+    checkpoint = replay(str(tickets_file), str(out), checkpoint_every=2, max_workers=2, chunk_size=2)
+    assert out.read_bytes() == expected.read_bytes()
+    assert checkpoint["processed"] == 7
+
+
+def test_replay_starts_over_when_output_is_lost(tickets_file, tmp_path):
+    expected = tmp_path / "expected.jsonl"
+    replay(str(tickets_file), str(expected), max_workers=2, chunk_size=2)
+
+    out = tmp_path / "out.jsonl"
+    replay(str(tickets_file), str(out), max_workers=2, chunk_size=2)
+    out.unlink()
+    checkpoint = replay(str(tickets_file), str(out), max_workers=2, chunk_size=2)
+    assert out.read_bytes() == expected.read_bytes()
+    assert checkpoint["processed"] == 7
+
+    out.write_bytes(out.read_bytes()[:10])
+    replay(str(tickets_file), str(out), max_workers=2, chunk_size=2)
+    assert out.read_bytes() == expected.read_bytes()
+
+
+def test_bad_lines_are_not_buffered_without_bound(tmp_path):
+    pulled = []
+
+    def items():
+        for number in range(1, 51):
+            item = Line(number, number)
+            if number == 50:
+                item.state = {"ticket_text": "refund ORD1001", "messages": []}
+            else:
+                item.error = "ValueError: expected a JSON object"
+            pulled.append(number)
+            yield item
+
+    with BatchRunner(executor="thread", max_workers=1) as runner:
+        results = run_lines(items(), runner, max_errors=10)
+        first = next(results)
+        # The first bad line comes out after at most max_errors reads, not 49
+        assert first[0].number == 1 and len(pulled) == 10
+        rest = list(results)
+    assert [item.number for item, _ in [first, *rest]] == list(range(1, 51))
+    assert rest[-1][1]["ok"] is True
+
+    path = tmp_path / "bad.jsonl"
+    path.write_text("not json\n" * 25, encoding="utf-8")
+    checkpoint = replay(str(path), str(tmp_path / "out.jsonl"), checkpoint_every=5, max_workers=1)
+    assert checkpoint["processed"] == 25 and checkpoint["line"] == 25
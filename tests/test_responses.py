@@ -0,0 +1,67 @@
+import json
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+
+from app.graph import build_graph
+from app.main import TriageInput, app
+from langchain_core.messages import SystemMessage, convert_to_messages
+
+from app.responses import dumps
+
+MESSAGE_KEYS = {"type", "content", "id", "name", "tool_calls", "tool_call_id"}
+HISTORY = [{"role": "user" if i % 2 == 0 else "assistant", "content": f"message {i}"} for i in range(20)]
+
+
+def test_triage_input_has_one_message_schema():
+    body = TriageInput.model_validate({"ticket_text": "refund ORD1001", "messages": HISTORY})
+    assert body.messages == HISTORY
+
+
+def test_dumps_matches_fastapi_encoder_on_graph_state():
+    result = build_graph().invoke({"ticket_text": "refund ORD1001", "messages": HISTORY, "admin_decision": "approve"})
+    encoded = json.loads(dumps(result))
+    expected = json.loads(json.dumps(jsonable_encoder(result)))
+    messages, expected_messages = encoded.pop("messages"), expected.pop("messages")
+    assert encoded == expected
+    # Messages keep only the fields a request can carry
+    for message, full in zip(messages, expected_messages):
+        assert message.keys() <= MESSAGE_KEYS
+        assert {k: full[k] for k in message} == message
+
+
+def test_compaction_marker_round_trips():
+    marker = SystemMessage(
+        content="[3 earlier messages compacted]", id="compacted-history", additional_kwargs={"compacted": 3}
+    )
+    data = json.loads(dumps(marker))
+    assert data == {"type": "system", "content": marker.content, "id": marker.id, "compacted": 3}
+    assert convert_to_messages([data])[0] == marker
+
+
+def test_triage_invoke_returns_history_as_json():
+    client = TestClient(app)
+    resp = client.post("/triage/invoke", json={"ticket_text": "refund ORD1001", "messages": HISTORY})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == "application/json"
+    messages = resp.json()["messages"]
+    assert [m["content"] for m in messages[:2]] == ["message 0", "message 1"]
+    assert [m["type"] for m in messages[:2]] == ["human", "ai"]
+    assert client.get("/orders/get", params={"order_id": "ORD1001"}).json()["customer_name"] == "Ava Chen"
+
+
+def test_returned_messages_post_back_unchanged():
+    client = TestClient(app)
+    body = {"ticket_text": "refund ORD1001", "messages": []}
+    turns = []
+    for _ in range(3):
+        resp = client.post("/triage/invoke", json=body)
+        turns.append(resp.json()["messages"])
+        body = {"ticket_text": "refund ORD1001", "messages": turns[-1]}
+
+    for prev, cur in zip(turns, turns[1:]):
+        assert cur[: len(prev)] == prev
+    # Each turn appends the same messages rather than growing the old ones
+    added = [len(dumps(cur)) - len(dumps(prev)) for prev, cur in zip(turns, turns[1:])]
+    assert abs(added[1] - added[0]) < 16
+    assert all(m.keys() <= MESSAGE_KEYS for m in turns[-1])
@@ -0,0 +1,37 @@
+import subprocess
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.registry import DataRegistry
+from benchmarks.importtime import HEAVY_MODULES, ROOT, imported, measure
+
+
+def test_import_app_main_without_heavy_modules():
+    # The wall-clock budget is enforced by benchmarks/importtime.py, not here
+    result = measure("app.main", runs=1)
+    assert not imported(result["modules"], HEAVY_MODULES)
+
+
+def test_import_does_not_load_data():
+    code = "import app.main as m; print(m.REGISTRY.loaded, m.GRAPH is None)"
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True).stdout
+    assert out.split() == ["False", "True"]
+
+
+def test_registry_loads_on_first_access(tmp_path):
+    registry = DataRegistry(data_dir=str(tmp_path))
+    assert not registry.loaded
+    # Missing files only fail once the data is actually needed
+    with pytest.raises(FileNotFoundError):
+        registry.current
+    assert not registry.loaded
+
+
+def test_lifespan_compiles_graphs():
+    import app.main as main
+
+    with TestClient(main.app) as client:
+        assert main.GRAPH is not None and main.CHECKPOINT_GRAPH is not None
+        assert client.get("/health").status_code == 200
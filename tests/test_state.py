@@ -0,0 +1,38 @@
+from langchain_core.messages import AIMessage, HumanMessage
+
+from app.graph import build_graph
+from app.state import COMPACTION_MARKER_ID, MAX_MESSAGES, append_messages, compact_messages
+
+
+def test_reducer_appends_without_duplicates():
+    graph = build_graph()
+    result_1 = graph.invoke({"ticket_text": "I want a refund for order ORD1001.", "messages": []})
+    result_2 = graph.invoke({**result_1, "admin_decision": "approve", "admin_notes": "ok"})
+
+    contents = [m.content for m in result_2["messages"]]
+    assert contents[: len(result_1["messages"])] == [m.content for m in result_1["messages"]]
+    assert contents.count("I want a refund for order ORD1001.") == 1
+    assert contents[-1] == "Decision: approve. Notes: ok"
+    # The tool result is kept alongside earlier messages
+    assert any(m.type == "tool" for m in result_2["messages"])
+
+
+def test_compaction_keeps_tail_and_counts_dropped():
+    msgs = [HumanMessage(content=str(i), id=str(i)) for i in range(5)]
+    compacted = compact_messages(msgs, max_messages=3)
+    assert [m.content for m in compacted[1:]] == ["2", "3", "4"]
+    assert compacted[0].id == COMPACTION_MARKER_ID
+    assert compacted[0].additional_kwargs["compacted"] == 2
+
+    again = compact_messages(compacted + [AIMessage(content="5", id="5")], max_messages=3)
+    assert [m.content for m in again[1:]] == ["3", "4", "5"]
+    assert again[0].additional_kwargs["compacted"] == 3
+
+    assert compact_messages(msgs, max_messages=0) is msgs
+
+
+def test_append_reducer_bounds_incoming_history():
+    history = [{"type": "human", "content": f"turn {i}"} for i in range(500)]
+    merged = append_messages([], history)
+    assert len(merged) == MAX_MESSAGES + 1
+    assert merged[-1].content == "turn 499"
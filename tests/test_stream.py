@@ -0,0 +1,47 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+
+def parse_sse(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_stream_emits_one_event_per_node():
+    client = TestClient(app)
+    with client.stream(
+        "POST",
+        "/triage/stream",
+        json={"ticket_text": "I'd like a refund for order ORD1001.", "messages": []},
+    ) as resp:
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("text/event-stream")
+        events = parse_sse(resp.read().decode())
+
+    names = [name for name, _ in events]
+    assert names == [
+        "ingest",
+        "classify_issue",
+        "request_fetch_order",
+        "fetch_order",
+        "store_order_evidence",
+        "propose_recommendation",
+        "admin_review",
+        "draft_reply",
+        "end",
+    ]
+    deltas = dict(events)
+    assert deltas["classify_issue"]["issue_type"] == "refund_request"
+    assert deltas["store_order_evidence"]["evidence"]["order"]["found"] is True
+
+
+def test_stream_stops_early_on_empty_ticket():
+    client = TestClient(app)
+    resp = client.post("/triage/stream", json={"ticket_text": "", "messages": []})
+    assert [name for name, _ in parse_sse(resp.text)] == ["ingest", "end"]
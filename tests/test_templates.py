@@ -0,0 +1,41 @@
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.registry import REGISTRY
+from app.templates import CompiledTemplate, render_many, render_reply
+
+ORDER = {
+    "order_id": "ORD1005",
+    "customer_name": " Emily Rivera ",
+    "status": "shipped",
+    "items": [{"sku": "SKU-200-K", "name": "Laptop Sleeve", "quantity": 2}],
+}
+
+
+def test_compiled_template_renders_nested_fields():
+    template = CompiledTemplate("Hi {{customer_name}}, {{ items.0.name }} x{{items.0.quantity}} is {{status}}. Items: {{items}}.")
+    assert template.fields == ["customer_name", "items.0.name", "items.0.quantity", "status", "items"]
+    assert template.render(ORDER) == "Hi Emily Rivera, Laptop Sleeve x2 is shipped. Items: Laptop Sleeve."
+    assert CompiledTemplate("no placeholders").render(ORDER) == "no placeholders"
+
+
+def test_render_reply_defaults_and_fallback():
+    assert render_reply("refund_request", {}) == (
+        "Hi there, we are sorry for the inconvenience. We reviewed order your order and a refund will be processed shortly."
+    )
+    assert render_reply("unknown", ORDER).startswith("Hi there, thanks for reaching out.")
+    assert render_reply("unknown", ORDER, fallback=CompiledTemplate("Order {{order_id}}")) == "Order ORD1005"
+
+
+def test_render_many_matches_render_reply():
+    items = [("late_delivery", ORDER), ("missing_item", None), ("nope", ORDER)]
+    assert render_many(items) == [render_reply(issue_type, order) for issue_type, order in items]
+    assert render_many(items, templates=REGISTRY.current.templates, fallback="")[-1] == ""
+
+
+def test_reply_draft_endpoint():
+    client = TestClient(app)
+    reply = client.post("/reply/draft", json={"issue_type": "damaged_item", "order": ORDER}).json()["reply_text"]
+    assert reply == "Hi Emily Rivera, sorry your item arrived damaged. We will send a replacement for order ORD1005."
+    reply = client.post("/reply/draft", json={"issue_type": "other", "order": {}}).json()["reply_text"]
+    assert reply == "Hi Customer, we are reviewing order ."
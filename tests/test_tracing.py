@@ -0,0 +1,102 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import tracing
+from app.main import app
+from app.tracing import BatchExporter, HttpSink, Tracer, configure_tracing, observe
+
+
+@pytest.fixture
+def collector():
+    """Local stand-in for a trace collector that records every posted batch."""
+    received = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            received.extend(json.loads(body)["traces"])
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/traces", received
+    server.shutdown()
+
+
+@pytest.fixture
+def install():
+    previous = tracing.TRACER
+    yield configure_tracing
+    configure_tracing(previous)
+
+
+def test_sampled_request_exports_trace_with_node_spans(collector, install):
+    url, received = collector
+    exporter = BatchExporter(HttpSink(url), max_payload=300, flush_interval=0.01)
+    install(Tracer(exporter=exporter, sample_rate=1.0))
+
+    client = TestClient(app)
+    client.post("/triage/invoke", json={"ticket_text": "I want a refund for order ORD1001.", "messages": []})
+    exporter.flush()
+
+    assert len(received) == 1
+    trace = received[0]
+    assert trace["name"] == "triage_invoke"
+    assert trace["metadata"]["order_id"] is None
+    assert [s["name"] for s in trace["spans"]][:2] == ["ingest", "classify_issue"]
+    # Payloads are limited to allowlisted fields
+    assert "messages" not in trace["input"]
+    assert trace["spans"][1]["output"] == {"issue_type": "refund_request"}
+    # ...and truncated when too long
+    assert isinstance(trace["output"], str) and trace["output"].endswith("...[truncated]")
+
+
+def test_unsampled_requests_export_nothing(install):
+    batches = []
+    exporter = BatchExporter(batches.append, flush_interval=0.01)
+    install(Tracer(exporter=exporter, sample_rate=0.0))
+
+    @observe()
+    def root(state):
+        return inner(state)
+
+    @observe()
+    def inner(state):
+        return state
+
+    assert root({"x": 1}) == {"x": 1}
+    exporter.flush()
+    assert batches == []
+
+
+def test_errors_are_recorded_and_reraised(install):
+    batches = []
+    exporter = BatchExporter(batches.append, flush_interval=0.01)
+    install(Tracer(exporter=exporter, fields=None))
+
+    @observe(name="outer")
+    def outer(state):
+        return failing(state)
+
+    @observe()
+    def failing(state):
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        outer({"order_id": "ORD1001"})
+    exporter.flush()
+
+    (trace,) = [t for batch in batches for t in batch]
+    assert trace["name"] == "outer"
+    assert trace["error"] == "ValueError: boom"
+    assert trace["spans"][0]["error"] == "ValueError: boom"
+    assert trace["input"] == {"order_id": "ORD1001"}